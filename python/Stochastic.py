@@ -1,47 +1,119 @@
-import json
+import math
 import os
+import pandas
 import _AppProjectKit as APK
+from rolling_window import RollingExtremum, RollingMean
+from instrumentation import instrumented
 
 # Директория для хранения данных
 DATA_DIR = "storage"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)  # Создать директорию, если она отсутствует
 
 def load_data(filename):
-    """Загружает данные из JSON-файла."""
+    """Загружает данные из JSON-файла в DataFrame."""
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
-        # Проверка всех элементов на наличие необходимых ключей
+        data = pandas.read_json(filename)
+        # Проверка наличия необходимых столбцов
         required_columns = ['high', 'low', 'close']
-        if not all(all(col in item for col in required_columns) for item in data):
+        if not all(col in data.columns for col in required_columns):
             raise APK.InvalidInputError("Некоторые элементы данных не содержат обязательных ключей (high, low, close).")
         return data
     except FileNotFoundError:
         raise APK.DatabaseError("Файл данных не найден.")
-    except json.JSONDecodeError:
+    except ValueError:
         raise APK.InvalidInputError("Ошибка при чтении JSON-файла.")
 
+def stochastic_frame(dataFrame: pandas.DataFrame, period: int = 14,
+                     smooth_k: int = 1, smooth_d: int = 3) -> pandas.DataFrame:
+    """
+    Рассчитывает стохастический осциллятор для всего фрейма за O(n).
+
+    Экстремумы берутся по period свечам, предшествующим текущей
+    (как в исходном calculate_stochastic); скользящие max/min pandas
+    работают на монотонной деке, без пересканирования окна.
+
+    Args:
+        dataFrame: pandas DataFrame с колонками high, low, close
+        period: период осциллятора
+        smooth_k: период сглаживания %K (1 — быстрый стохастик)
+        smooth_d: период сглаживания %D
+
+    Returns:
+        pandas DataFrame с колонками:
+        - Stoch_K: линия %K (NaN для первых period свечей)
+        - Stoch_D: линия %D
+    """
+    highest_high = dataFrame['high'].rolling(window=period).max().shift(1)
+    lowest_low = dataFrame['low'].rolling(window=period).min().shift(1)
+    price_range = highest_high - lowest_low
+
+    raw_k = 100 * (dataFrame['close'] - lowest_low) / price_range.where(price_range != 0)
+    # Среднее значение в случае отсутствия движения
+    raw_k = raw_k.mask((price_range == 0), 50.0)
+
+    k = raw_k.rolling(window=smooth_k).mean() if smooth_k > 1 else raw_k
+    d = k.rolling(window=smooth_d).mean()
+    return pandas.DataFrame({'Stoch_K': k, 'Stoch_D': d}, index=dataFrame.index)
+
+@instrumented
 def calculate_stochastic(data, period=14):
-    """Рассчитывает стохастический осциллятор за заданный период."""
-    stochastic_values = []
-
-    for i in range(period, len(data)):
-        highest_high = max(item['high'] for item in data[i-period:i])
-        lowest_low = min(item['low'] for item in data[i-period:i])
-        close = data[i]['close']
-
-        if highest_high != lowest_low:  # Защита от деления на ноль
-            stochastic = ((close - lowest_low) / (highest_high - lowest_low)) * 100
-        else:
-            stochastic = 50  # Среднее значение в случае отсутствия движения
-
-        stochastic_values.append({
-            'date': data[i]['date'],
-            'stochastic': stochastic
-        })
-    
-    return stochastic_values
+    """
+    Рассчитывает стохастический осциллятор за заданный период.
+    data — DataFrame или список словарей с ключами high, low, close
+    и date (или begin, как в файлах storage/).
+    """
+    frame = data if isinstance(data, pandas.DataFrame) else pandas.DataFrame(data)
+    date_column = 'date' if 'date' in frame.columns else 'begin'
+
+    stochastic = stochastic_frame(frame, period)['Stoch_K'].iloc[period:]
+    dates = frame[date_column].iloc[period:]
+    return [{'date': date, 'stochastic': value} for date, value in zip(dates, stochastic)]
+
+class StochasticStream:
+    """
+    Потоковый стохастический осциллятор: обновление за O(1) амортизированно
+    на свечу, результаты совпадают со stochastic_frame.
+    """
+
+    def __init__(self, period: int = 14, smooth_k: int = 1, smooth_d: int = 3):
+        self.period = period
+        self.smooth_k = smooth_k
+        self.smooth_d = smooth_d
+        self.highs = RollingExtremum(period, "max")
+        self.lows = RollingExtremum(period, "min")
+        self.k_mean = RollingMean(smooth_k)
+        self.d_mean = RollingMean(smooth_d)
+        self.k = math.nan
+        self.d = math.nan
+
+    def update(self, high: float, low: float, close: float) -> tuple:
+        """Принимает свечу и возвращает (%K, %D)."""
+        # Экстремумы по предыдущим period свечам, текущая добавляется после расчёта
+        raw_k = math.nan
+        if self.highs.ready:
+            price_range = self.highs.value - self.lows.value
+            raw_k = 100 * (close - self.lows.value) / price_range if price_range != 0 else 50.0
+        self.highs.update(high)
+        self.lows.update(low)
+
+        self.k = self.k_mean.update(raw_k) if self.k_mean.window > 1 else raw_k
+        self.d = self.d_mean.update(self.k)
+        return self.k, self.d
+
+    def snapshot(self) -> dict:
+        return {'period': self.period, 'smooth_k': self.smooth_k, 'smooth_d': self.smooth_d,
+                'highs': self.highs.snapshot(), 'lows': self.lows.snapshot(),
+                'k_mean': self.k_mean.snapshot(), 'd_mean': self.d_mean.snapshot(),
+                'k': self.k, 'd': self.d}
+
+    @classmethod
+    def restore(cls, state: dict) -> "StochasticStream":
+        stream = cls(state['period'], state['smooth_k'], state['smooth_d'])
+        stream.highs = RollingExtremum.restore(state['highs'])
+        stream.lows = RollingExtremum.restore(state['lows'])
+        stream.k_mean = RollingMean.restore(state['k_mean'])
+        stream.d_mean = RollingMean.restore(state['d_mean'])
+        stream.k, stream.d = state['k'], state['d']
+        return stream
 
 def stochastic_strategy(stochastic_values):
     """Применяет торговую стратегию на основе значений стохастического осциллятора."""
@@ -58,8 +130,8 @@ def stochastic_strategy(stochastic_values):
 def save_signals_to_file(signals, filename="stochastic_signals_output.txt"):
     """Сохраняет сигналы в текстовый файл."""
     with open(filename, 'w') as file:
-        for signal in signals:
-            file.write(f"Дата: {signal[0]}, Сигнал: {signal[1]}, Описание: {signal[2]}\n")
+        file.write("".join(f"Дата: {date}, Сигнал: {name}, Описание: {description}\n"
+                           for date, name, description in signals))
 
 if __name__ == "__main__":
     try:
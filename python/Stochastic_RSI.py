@@ -1,16 +1,17 @@
 import pandas
 import numpy
 import _AppProjectKit as APK
-import os
-from rsi_call import current_rsi_call
+import indicator_graph as graph
+from rsi_call import current_rsi_call, rsi_node
+from instrumentation import instrumented
 
 # Директория для хранения данных
 DATA_DIR = "storage"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
 
+@instrumented
 def calculate_stochastic_rsi(dataFrame: pandas.DataFrame, period: int = 14, 
-                           smooth_k: int = 3, smooth_d: int = 3) -> pandas.DataFrame:
+                           smooth_k: int = 3, smooth_d: int = 3,
+                           rsi: pandas.Series = None, inplace: bool = False) -> pandas.DataFrame:
     """
     Рассчитывает Стохастический RSI (StochRSI).
     
@@ -19,6 +20,8 @@ def calculate_stochastic_rsi(dataFrame: pandas.DataFrame, period: int = 14,
         period: период для расчёта RSI и Стохастического осциллятора
         smooth_k: период сглаживания для %K линии
         smooth_d: период сглаживания для %D линии
+        rsi: уже рассчитанный RSI с тем же периодом (чтобы не считать его повторно)
+        inplace: дописать колонки прямо в dataFrame, без копии
     
     Returns:
         pandas DataFrame с добавленными колонками:
@@ -28,11 +31,11 @@ def calculate_stochastic_rsi(dataFrame: pandas.DataFrame, period: int = 14,
         - StochRSI_Signal: сигналы (-1, 0, 1)
     """
     try:
-        # Копируем DataFrame
-        df = dataFrame.copy()
+        # Копируем DataFrame (или пишем в исходный)
+        df = dataFrame if inplace else dataFrame.copy()
         
         # Получаем значения RSI
-        df['RSI'] = current_rsi_call(df, period)
+        df['RSI'] = rsi if rsi is not None else current_rsi_call(df, period)
         
         # Рассчитываем Стохастический RSI
         rsi_series = df['RSI']
@@ -67,6 +70,29 @@ def calculate_stochastic_rsi(dataFrame: pandas.DataFrame, period: int = 14,
     except Exception as e:
         raise APK.ApplicationError(f"Error calculating Stochastic RSI: {str(e)}")
 
+@graph.register_operation('stoch')
+def stoch_line(rsi: pandas.Series, lowest_low: pandas.Series, highest_high: pandas.Series) -> pandas.Series:
+    return 100 * (rsi - lowest_low) / (highest_high - lowest_low)
+
+
+@graph.register_operation('stoch_rsi_signal', warmup=1)
+def stoch_rsi_signal(k: pandas.Series, d: pandas.Series) -> pandas.Series:
+    """Пересечение %K и %D в зонах перепроданности (< 20) и перекупленности (> 80)."""
+    signal = pandas.Series(0, index=k.index)
+    signal[(k > d) & (k.shift(1) <= d.shift(1)) & (k < 20)] = 1
+    signal[(k < d) & (k.shift(1) >= d.shift(1)) & (k > 80)] = -1
+    return signal
+
+
+@graph.register_indicator('StochRSI', period=14, smooth_k=3, smooth_d=3)
+def stoch_rsi_indicator(period: int, smooth_k: int, smooth_d: int) -> dict:
+    """Колонки calculate_stochastic_rsi в виде узлов графа; RSI общий с индикатором RSI того же периода."""
+    rsi = rsi_node(period)
+    k = graph.rolling_mean(graph.node('stoch', rsi, graph.rolling_min(rsi, period), graph.rolling_max(rsi, period)),
+                           smooth_k)
+    d = graph.rolling_mean(k, smooth_d)
+    return {'StochRSI_K': k, 'StochRSI_D': d, 'StochRSI_Signal': graph.node('stoch_rsi_signal', k, d)}
+
 def get_stoch_rsi_summary(data: pandas.DataFrame) -> dict:
     """
     Создает сводку по текущим значениям Stochastic RSI
@@ -39,4 +39,27 @@ class instantCandleReport:
 class bollinger:
     def __init__(self, recommendation, dataFrame):
         self.recommendation = recommendation
-        self.dataFrame = dataFrame
\ No newline at end of file
+        self.dataFrame = dataFrame
+
+
+class signalEvent:
+    def __init__(self, ticker, begin, name, value, previous, latency):
+        self.ticker = ticker
+        self.begin = begin
+        self.name = name
+        self.value = value
+        self.previous = previous
+        self.latency = latency
+
+    def __repr__(self):
+        return f"{self.ticker} {self.begin}: {self.name} {self.previous} -> {self.value}"
+
+
+class backtestResult:
+    def __init__(self, equity, trades, summary):
+        self.equity = equity
+        self.trades = trades
+        self.summary = summary
+
+    def __repr__(self):
+        return f"Бэктест: {len(self.summary)} тикеров, {len(self.trades)} сделок\n{self.summary}"
@@ -0,0 +1,291 @@
+"""
+Векторный бэктест сигнальных колонок.
+
+Любая колонка сигналов (Signal, MA_Signal, StochRSI_Signal, Volume_Signal,
+флажки свечных паттернов) или правило, объединяющее несколько колонок,
+превращается в позицию, кривую капитала, список сделок и сводные метрики.
+Свечи всех тикеров склеиваются в общие массивы с границами групп, так что
+расчёт идёт операциями numpy/pandas без цикла по свечам и тикерам.
+
+Модель исполнения, как в bollinger_strategy.calculate_returns: позиция,
+решённая на закрытии свечи t, приносит доходность свечи t + 1.
+Издержки списываются на свече изменения позиции:
+    |новая позиция - старая| * (commission + slippage_bps / 10000)
+"""
+import numpy
+import pandas
+import _AppProjectKit as APK
+from instrumentation import instrumented
+
+
+# Медвежьи паттерны с булевыми флажками: True означает сигнал на продажу
+BEARISH_PATTERNS = {'HangingMan', 'ThreeBlackCrows'}
+
+TRADE_COLUMNS = ['ticker', 'direction', 'entry_begin', 'exit_begin', 'entry_price', 'exit_price',
+                 'bars', 'return', 'open']
+SUMMARY_COLUMNS = ['ticker', 'bars', 'total_return', 'sharpe', 'max_drawdown', 'trades', 'win_rate',
+                   'exposure', 'turnover', 'costs']
+
+
+def to_signal(values, name: str = None) -> numpy.ndarray:
+    """
+    Приводит колонку сигналов к числам -1, 0, 1.
+
+    Числа — знак значения (NaN — 0); булевы флажки — 1, для BEARISH_PATTERNS — -1;
+    метки is_engulfing ('Bullish ...', 'Bearish ...', False) — 1, -1 и 0.
+    """
+    values = numpy.asarray(values)
+    if values.dtype == object:
+        labels = values.astype(str)
+        return (numpy.char.startswith(labels, 'Bullish').astype(numpy.int8)
+                - numpy.char.startswith(labels, 'Bearish'))
+    if values.dtype == bool:
+        return values.astype(numpy.int8) * (-1 if name in BEARISH_PATTERNS else 1)
+    return numpy.sign(numpy.nan_to_num(values.astype(float))).astype(numpy.int8)
+
+
+def combine_signals(frame: pandas.DataFrame, columns, rule: str = 'all') -> numpy.ndarray:
+    """
+    Объединяет несколько колонок сигналов.
+
+    rule='all' -- сигнал, только если все колонки дают одно и то же ненулевое направление
+    rule='sum' -- знак суммы сигналов (большинство)
+    rule='any' -- первый ненулевой сигнал по порядку колонок
+    """
+    signals = numpy.stack([to_signal(frame[column], column) for column in columns])
+    if rule == 'all':
+        return numpy.where((signals == signals[0]).all(axis=0), signals[0], 0).astype(numpy.int8)
+    if rule == 'sum':
+        return numpy.sign(signals.sum(axis=0, dtype=numpy.int32)).astype(numpy.int8)
+    if rule == 'any':
+        first = numpy.argmax(signals != 0, axis=0)
+        return numpy.take_along_axis(signals, first[None, :], axis=0)[0]
+    raise APK.InvalidInputError(f"Неизвестное правило объединения сигналов: {rule}")
+
+
+def _frame_signal(frame: pandas.DataFrame, signal, rule: str) -> numpy.ndarray:
+    if callable(signal):
+        return to_signal(signal(frame))
+    if isinstance(signal, str):
+        if signal not in frame.columns:
+            raise APK.InvalidInputError(f"Отсутствует колонка сигналов {signal}.")
+        return to_signal(frame[signal], signal)
+    missing = [column for column in signal if column not in frame.columns]
+    if missing:
+        raise APK.InvalidInputError(f"Отсутствуют колонки сигналов: {', '.join(missing)}")
+    return combine_signals(frame, signal, rule)
+
+
+def _group_starts(lengths: numpy.ndarray) -> tuple:
+    """Начало групп и номер начала группы для каждой свечи."""
+    starts = numpy.concatenate(([0], numpy.cumsum(lengths)[:-1]))
+    return starts, numpy.repeat(starts, lengths)
+
+
+def positions(signal: numpy.ndarray, lengths, mode: str = 'hold', hold_bars: int = None,
+              direction: str = 'both') -> numpy.ndarray:
+    """
+    Направление позиции (-1, 0, 1) по сигналам склеенных тикеров.
+
+    mode='hold'     -- позиция — последний ненулевой сигнал, как Position в generate_signals;
+                       с hold_bars позиция закрывается через hold_bars свечей после сигнала
+    mode='exposure' -- сигнал и есть позиция на этой свече
+    direction -- 'both', 'long' (короткие позиции становятся 0) или 'short'
+    """
+    signal = numpy.asarray(signal, dtype=numpy.int8)
+    lengths = numpy.asarray(lengths)
+    if mode == 'exposure':
+        side = signal.copy()
+    elif mode == 'hold':
+        steps = numpy.arange(signal.size)
+        _, first = _group_starts(lengths)
+        # Индекс последнего ненулевого сигнала в пределах своей группы
+        last = numpy.maximum(numpy.maximum.accumulate(numpy.where(signal != 0, steps, 0)), first)
+        side = signal[last]
+        if hold_bars is not None:
+            side = numpy.where(steps - last < hold_bars, side, 0).astype(numpy.int8)
+    else:
+        raise APK.InvalidInputError(f"Неизвестный режим позиции: {mode}")
+
+    if direction == 'long':
+        side = numpy.maximum(side, 0)
+    elif direction == 'short':
+        side = numpy.minimum(side, 0)
+    elif direction != 'both':
+        raise APK.InvalidInputError(f"Неизвестное направление: {direction}")
+    return side
+
+
+def _rolling_std(returns: numpy.ndarray, first: numpy.ndarray, window: int) -> numpy.ndarray:
+    """Скользящее стандартное отклонение (ddof=1) внутри групп; неполное окно — NaN."""
+    s1 = numpy.concatenate(([0.0], numpy.cumsum(returns)))
+    s2 = numpy.concatenate(([0.0], numpy.cumsum(returns * returns)))
+    steps = numpy.arange(returns.size)
+    lo = steps - window + 1
+    total = s1[steps + 1] - s1[numpy.maximum(lo, 0)]
+    squares = s2[steps + 1] - s2[numpy.maximum(lo, 0)]
+    var = numpy.maximum(squares - total * total / window, 0) / (window - 1)
+    # Первое изменение цены группы неизвестно, окно должно начинаться после него
+    return numpy.where(lo > first, numpy.sqrt(var), numpy.nan)
+
+
+@instrumented
+def backtest(frames, signal='Signal', rule: str = 'all', mode: str = 'hold', hold_bars: int = None,
+             direction: str = 'both', size: float = 1.0, vol_target: float = None, vol_window: int = 20,
+             max_leverage: float = 1.0, commission: float = 0.0, slippage_bps: float = 0.0,
+             periods_per_year: int = 252) -> APK.backtestResult:
+    """
+    Бэктест сигнала по одному или многим тикерам.
+
+    Аргументы:
+    frames -- DataFrame со свечами и сигналами или словарь {тикер: DataFrame}
+    signal -- имя колонки, список колонок (объединяются по rule, см. combine_signals)
+              или функция frame -> сигналы
+    mode, hold_bars, direction -- логика позиции (см. positions)
+    size -- доля капитала в позиции
+    vol_target -- целевая волатильность доходности за свечу: размер позиции
+                  vol_target / std доходностей за vol_window свечей, не больше max_leverage;
+                  пока окно не набрано, позиции нет
+    commission -- комиссия, доля от оборота (0.0005 = 0.05%)
+    slippage_bps -- проскальзывание в базисных пунктах от оборота
+    periods_per_year -- число свечей в году для годового коэффициента Шарпа
+
+    Возвращает:
+    APK.backtestResult:
+        equity  -- по свечам: ticker, begin, close, position, returns, strategy_returns, costs, equity
+        trades  -- сделки: направление, вход и выход (begin, цена закрытия), число свечей,
+                   доходность с издержками входа и выхода, open — сделка не закрыта
+        summary -- по тикерам: total_return, sharpe, max_drawdown, trades, win_rate,
+                   exposure (доля свечей в позиции), turnover, costs
+    Без издержек и с size=1 total_return совпадает с Cumulative_Returns - 1 из calculate_returns.
+    """
+    if isinstance(frames, pandas.DataFrame):
+        frames = {None: frames}
+    frames = {ticker: frame for ticker, frame in frames.items() if len(frame)}
+    if not frames:
+        raise APK.InvalidInputError("Нет свечей для бэктеста.")
+    for frame in frames.values():
+        if 'close' not in frame.columns:
+            raise APK.InvalidInputError("Отсутствует обязательный столбец close.")
+
+    tickers = list(frames)
+    lengths = numpy.array([len(frame) for frame in frames.values()])
+    starts, first = _group_starts(lengths)
+    ends = starts + lengths
+    group = numpy.repeat(numpy.arange(len(tickers)), lengths)
+    close = numpy.concatenate([frame['close'].to_numpy(dtype=float) for frame in frames.values()])
+    signals = numpy.concatenate([_frame_signal(frame, signal, rule) for frame in frames.values()])
+    steps = numpy.arange(close.size)
+    head = steps == first
+
+    returns = numpy.zeros(close.size)
+    returns[1:] = close[1:] / close[:-1] - 1
+    returns[head | ~numpy.isfinite(returns)] = 0.0
+
+    side = positions(signals, lengths, mode, hold_bars, direction)
+    weight = numpy.full(close.size, float(size))
+    if vol_target is not None:
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            weight = numpy.minimum(vol_target / _rolling_std(returns, first, vol_window), max_leverage)
+        weight = numpy.nan_to_num(weight, nan=0.0, posinf=max_leverage) * size
+    position = side * weight
+
+    previous = numpy.zeros(close.size)
+    previous[1:] = position[:-1]
+    previous[head] = 0.0
+    gross = previous * returns
+    rate = commission + slippage_bps / 10000
+    turnover = numpy.abs(position - previous)
+    costs = turnover * rate
+    net = gross - costs
+
+    equity = pandas.Series(1 + net).groupby(group).cumprod().to_numpy()
+    peak = pandas.Series(equity).groupby(group).cummax().to_numpy()
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        drawdown = numpy.where(peak > 0, equity / peak - 1, -1.0)
+
+    begin = (numpy.concatenate([frame['begin'].to_numpy() for frame in frames.values()])
+             if all('begin' in frame.columns for frame in frames.values()) else steps - first)
+    ticker_labels = numpy.repeat(numpy.array(tickers, dtype=object), lengths)
+    curve = pandas.DataFrame({'ticker': ticker_labels, 'begin': begin, 'close': close, 'position': position,
+                              'returns': returns, 'strategy_returns': net, 'costs': costs, 'equity': equity})
+
+    trades, trade_group = _trades(curve, side, previous, gross, rate, head, group, ends)
+    summary = _summary(tickers, lengths, starts, equity, drawdown, net, position, turnover, costs,
+                       trades, trade_group, periods_per_year)
+    return APK.backtestResult(curve, trades, summary)
+
+
+def _trades(curve, side, previous, gross, rate, head, group, ends) -> tuple:
+    """
+    Сделки — участки подряд идущих свечей с одним ненулевым направлением.
+    Внутри участка издержки — это ребалансировка размера; на свечах входа
+    и выхода издержки делятся между закрываемой и открываемой сделкой.
+    Возвращает (DataFrame сделок, номер группы каждой сделки).
+    """
+    boundary = head.copy()
+    boundary[1:] |= side[1:] != side[:-1]
+    run_starts = numpy.flatnonzero(boundary)
+    run_ends = numpy.append(run_starts[1:], side.size)
+    # Участок не выходит за свою группу: конец — начало следующего участка или конец группы
+    run_ends = numpy.minimum(run_ends, ends[group[run_starts]])
+    keep = side[run_starts] != 0
+    a, b = run_starts[keep], run_ends[keep]
+    if a.size == 0:
+        return pandas.DataFrame(columns=TRADE_COLUMNS), a
+
+    position = curve['position'].to_numpy()
+    equity = curve['equity'].to_numpy()
+    closed = b < ends[group[a]]
+    exit_bar = numpy.where(closed, b, b - 1)
+
+    entry_cost = numpy.abs(position[a]) * rate
+    exit_cost = numpy.where(closed, numpy.abs(previous[numpy.minimum(b, side.size - 1)]) * rate, 0.0)
+    last_gross = numpy.where(closed, gross[numpy.minimum(b, side.size - 1)], 0.0)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        inner = numpy.where(b - 1 > a, equity[b - 1] / equity[a], 1.0)
+    result = (1 - entry_cost) * inner * (1 + last_gross - exit_cost) - 1
+
+    close = curve['close'].to_numpy()
+    begin = curve['begin'].to_numpy()
+    return pandas.DataFrame({
+        'ticker': curve['ticker'].to_numpy()[a],
+        'direction': side[a].astype(int),
+        'entry_begin': begin[a],
+        'exit_begin': begin[exit_bar],
+        'entry_price': close[a],
+        'exit_price': close[exit_bar],
+        'bars': exit_bar - a,
+        'return': result,
+        'open': ~closed,
+    }, columns=TRADE_COLUMNS), group[a]
+
+
+def _summary(tickers, lengths, starts, equity, drawdown, net, position, turnover, costs,
+             trades, trade_group, periods_per_year) -> pandas.DataFrame:
+    ends = starts + lengths
+    total = numpy.add.reduceat(net, starts)
+    squares = numpy.add.reduceat(net * net, starts)
+    # Первая свеча тикера без доходности, как strategy[:, 1:] в sweep_parameters
+    count = lengths - 1
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        std = numpy.sqrt(numpy.maximum(squares - total * mean, 0) / (count - 1))
+        sharpe = mean / std * numpy.sqrt(periods_per_year)
+        trade_count = numpy.bincount(trade_group, minlength=len(tickers))
+        wins = numpy.bincount(trade_group, weights=trades['return'].to_numpy(dtype=float) > 0,
+                              minlength=len(tickers))
+        win_rate = wins / trade_count
+
+    return pandas.DataFrame({
+        'ticker': tickers,
+        'bars': lengths,
+        'total_return': equity[ends - 1] - 1,
+        'sharpe': sharpe,
+        'max_drawdown': numpy.minimum.reduceat(drawdown, starts),
+        'trades': trade_count,
+        'win_rate': win_rate,
+        'exposure': numpy.add.reduceat((position != 0).astype(float), starts) / lengths,
+        'turnover': numpy.add.reduceat(turnover, starts),
+        'costs': numpy.add.reduceat(costs, starts),
+    }, columns=SUMMARY_COLUMNS)
@@ -0,0 +1,157 @@
+"""
+Пакетное обогащение всех свечных данных индикаторами.
+
+Файлы storage/*.json и/или разделы колоночного хранилища (тикер, интервал)
+раскладываются по пулу процессов. Каждый процесс сам читает свои данные,
+считает полный набор индикаторов из main.py (RSI, Боллинджер, свечные
+паттерны, MA, StochRSI, сигналы объёма) одним проходом по общему графу
+и записывает результат в выходную директорию. Родительский процесс
+получает только короткие сводки, поэтому масштабирование по ядрам близко
+к линейному.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas
+import _AppProjectKit as APK
+import indicator_graph as graph
+from candle_store import CandleStore, STORE_DIR
+
+
+# Путь к директории для хранения данных
+DATA_DIR = "storage"
+ENRICHED_DIR = os.path.join(DATA_DIR, "enriched")
+
+
+def list_jobs(source: str = "all", data_dir: str = DATA_DIR, store_root: str = STORE_DIR) -> list:
+    """
+    Перечисляет задания: ('json', путь к файлу) и ('store', тикер, интервал).
+
+    Аргументы:
+    source -- "json", "store" или "all"
+    """
+    if source not in ("json", "store", "all"):
+        raise APK.InvalidInputError(f"Неизвестный источник данных: {source}")
+    jobs = []
+    if source in ("json", "all") and os.path.isdir(data_dir):
+        jobs += [('json', os.path.join(data_dir, name)) for name in sorted(os.listdir(data_dir))
+                 if name.endswith(".json")]
+    if source in ("store", "all"):
+        store = CandleStore(store_root)
+        jobs += [('store', ticker, interval) for ticker in store.tickers() for interval in store.intervals(ticker)]
+    return jobs
+
+
+def job_name(job: tuple) -> str:
+    """Имя выходного файла задания без расширения."""
+    if job[0] == 'json':
+        return os.path.splitext(os.path.basename(job[1]))[0]
+    return f"{job[1]}_{job[2]}"
+
+
+def load_job(job: tuple, store_root: str = STORE_DIR) -> pandas.DataFrame:
+    if job[0] == 'json':
+        return pandas.read_json(job[1])
+    return CandleStore(store_root).read_frame(job[1], job[2])
+
+
+def enrich_job(job: tuple, output_dir: str = ENRICHED_DIR, indicators: dict = None,
+               store_root: str = STORE_DIR) -> dict:
+    """
+    Обогащает данные одного задания и записывает их в output_dir/<имя>.json.
+    Возвращает сводку: задание, число строк, выходной файл, время или ошибку.
+    Любое исключение задания попадает в сводку и не прерывает остальные задания.
+    """
+    started = time.perf_counter()
+    summary = {'job': job, 'rows': 0, 'output': None, 'error': None}
+    try:
+        frame = load_job(job, store_root)
+        enriched = graph.enrich(frame, indicators, inplace=True)
+        output = os.path.join(output_dir, job_name(job) + ".json")
+        enriched.to_json(output + ".tmp", force_ascii=False)
+        os.replace(output + ".tmp", output)
+        summary.update(rows=len(enriched), output=output)
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+    summary['seconds'] = time.perf_counter() - started
+    return summary
+
+
+def _enrich_chunk(jobs: list, output_dir: str, indicators: dict, store_root: str) -> list:
+    return [enrich_job(job, output_dir, indicators, store_root) for job in jobs]
+
+
+def print_progress(done: int, total: int, summary: dict) -> None:
+    status = summary['error'] or f"{summary['rows']} строк"
+    print(f"[{done}/{total}] {job_name(summary['job'])}: {status} ({summary['seconds']:.2f} с)")
+
+
+def batch_enrich(jobs: list = None, output_dir: str = ENRICHED_DIR, indicators: dict = None,
+                 max_workers: int = None, chunksize: int = None, progress=print_progress,
+                 errors: str = "raise", store_root: str = STORE_DIR) -> list:
+    """
+    Обогащает задания в пуле процессов.
+
+    Аргументы:
+    jobs -- список заданий (по умолчанию list_jobs())
+    indicators -- {имя: параметры} для graph.enrich; None — полный набор
+    max_workers -- число процессов (по умолчанию число ядер)
+    chunksize -- заданий на одну отправку в процесс; по умолчанию около
+                 четырёх порций на процесс, чтобы выровнять нагрузку
+    progress -- функция (готово, всего, сводка) или None
+    errors -- "raise": после завершения остальных заданий поднять APK.DatabaseError
+              по первой ошибке; "skip": вернуть ошибки в сводках
+
+    Возвращает:
+    Сводки заданий в порядке jobs.
+    """
+    if errors not in ("raise", "skip"):
+        raise APK.InvalidInputError("errors must be 'raise' or 'skip'")
+    if jobs is None:
+        jobs = list_jobs(store_root=store_root)
+    if not jobs:
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    max_workers = max_workers or os.cpu_count() or 1
+    chunksize = chunksize or max(1, len(jobs) // (max_workers * 4))
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=graph.load_indicators) as executor:
+        futures = {executor.submit(_enrich_chunk, chunk, output_dir, indicators, store_root): chunk
+                   for chunk in chunks}
+        for future in as_completed(futures):
+            try:
+                chunk_summaries = future.result()
+            except Exception as e:
+                # Порция не вернулась целиком (например, упал процесс пула)
+                chunk_summaries = [{'job': job, 'rows': 0, 'output': None, 'seconds': 0.0,
+                                    'error': f"{type(e).__name__}: {e}"} for job in futures[future]]
+            for summary in chunk_summaries:
+                results[summary['job']] = summary
+                if progress is not None:
+                    progress(len(results), len(jobs), summary)
+
+    summaries = [results[job] for job in jobs]
+    failed = [s for s in summaries if s['error']]
+    if failed and errors == "raise":
+        raise APK.DatabaseError(f"Не удалось обогатить {job_name(failed[0]['job'])}: {failed[0]['error']}")
+    return summaries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пакетный расчёт индикаторов по всему хранилищу")
+    parser.add_argument("--source", choices=("json", "store", "all"), default="all")
+    parser.add_argument("--output", default=ENRICHED_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summaries = batch_enrich(list_jobs(args.source), args.output, max_workers=args.workers,
+                             chunksize=args.chunksize, errors="skip")
+    rows = sum(s['rows'] for s in summaries)
+    failed = sum(1 for s in summaries if s['error'])
+    print(f"Готово: {len(summaries)} заданий, {rows} строк, ошибок: {failed}, "
+          f"{time.perf_counter() - started:.1f} с")
@@ -0,0 +1,355 @@
+"""
+Набор бенчмарков индикаторов и ввода-вывода на синтетических данных GBM.
+
+Для каждой комбинации (функция, число свечей на тикер, число тикеров)
+измеряются время (минимум и медиана по повторам) и пиковая память
+(tracemalloc, отдельным прогоном). Результаты сохраняются в JSON вместе
+с коммитом и версиями библиотек, чтобы сравнивать их между коммитами:
+
+    python benchmarks.py run --rows 1000 100000 --tickers 1 10
+    python benchmarks.py compare storage/benchmarks/a.json storage/benchmarks/b.json
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy
+import pandas
+import _AppProjectKit as APK
+
+
+# Путь к директории для хранения данных
+DATA_DIR = "storage"
+RESULTS_DIR = os.path.join(DATA_DIR, "benchmarks")
+
+# Сетки размеров: быстрая по умолчанию и полная (до 10M свечей и 1000 тикеров)
+DEFAULT_ROWS = (1_000, 10_000, 100_000)
+DEFAULT_TICKERS = (1, 10)
+FULL_ROWS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+FULL_TICKERS = (1, 10, 100, 1000)
+
+# Бенчмарки: имя -> (функция(фрейм), нужна ли свежая копия фрейма на каждый прогон,
+# подготовка входа вне замера, освобождение подготовленного входа)
+BENCHMARKS = {}
+
+
+def register_benchmark(name: str, mutates: bool = False, setup=None, teardown=None):
+    """
+    Декоратор, регистрирующий бенчмарк. Функция получает фрейм одного тикера.
+    mutates -- функция меняет фрейм, перед каждым прогоном делается копия (вне замера).
+    setup -- функция фрейма, готовящая вход вне замера (например, записывающая
+             данные на диск); функция бенчмарка получает её результат вместо фрейма.
+    teardown -- освобождает результат setup после всех прогонов.
+    mutates и setup несовместимы: вход из setup (путь, кортеж) не копируется
+    через frame.copy(); функции с setup не должны менять свой вход.
+    """
+    if mutates and setup is not None:
+        raise APK.InvalidInputError(f"Бенчмарк {name}: mutates=True несовместим с setup.")
+
+    def decorator(function):
+        BENCHMARKS[name] = (function, mutates, setup, teardown)
+        return function
+    return decorator
+
+
+def generate_ohlcv(rows: int, seed: int = 0, start: str = '2020-01-01', freq: str = 'min') -> pandas.DataFrame:
+    """
+    Свечи по геометрическому броуновскому движению, как в test_bollinger_strategy:
+    случайные S0, дрейф и волатильность, open/high/low вокруг цены закрытия.
+    """
+    rng = numpy.random.default_rng(seed)
+    s0 = rng.uniform(50, 150)
+    mu = rng.uniform(-0.001, 0.001)
+    sigma = rng.uniform(0.005, 0.02)
+    close = s0 * numpy.exp(numpy.cumsum((mu - 0.5 * sigma ** 2) + sigma * rng.normal(size=rows)))
+    open_ = close * rng.uniform(0.99, 1.01, size=rows)
+    volume = rng.integers(1000, 10000, size=rows).astype(float)
+    return pandas.DataFrame({
+        'begin': pandas.date_range(start=start, periods=rows, freq=freq),
+        'open': open_,
+        'high': numpy.maximum(open_, close) * rng.uniform(1.00, 1.02, size=rows),
+        'low': numpy.minimum(open_, close) * rng.uniform(0.98, 1.00, size=rows),
+        'close': close,
+        'volume': volume,
+        'value': volume * close,
+    })
+
+
+@register_benchmark('current_rsi_call')
+def bench_rsi(frame):
+    from rsi_call import current_rsi_call
+    current_rsi_call(frame, 18)
+
+
+@register_benchmark('current_candlestick_patterns', mutates=True)
+def bench_candlestick(frame):
+    from candlestick_patterns import current_candlestick_patterns
+    current_candlestick_patterns(frame)
+
+
+@register_benchmark('calculate_stochastic')
+def bench_stochastic(frame):
+    from Stochastic import calculate_stochastic
+    calculate_stochastic(frame, 14)
+
+
+@register_benchmark('calculate_stochastic_rsi')
+def bench_stochastic_rsi(frame):
+    from Stochastic_RSI import calculate_stochastic_rsi
+    calculate_stochastic_rsi(frame)
+
+
+@register_benchmark('current_ma_analysis')
+def bench_ma(frame):
+    from moving_averages import current_ma_analysis
+    current_ma_analysis(frame)
+
+
+@register_benchmark('bollinger_strings', mutates=True)
+def bench_bollinger(frame):
+    from bollinger_strategy import bollinger_strings
+    bollinger_strings(frame)
+
+
+@register_benchmark('volume_analysis')
+def bench_volume(frame):
+    from volume import find_support_resistance, volume_analysis
+    levels = find_support_resistance(frame)
+    volume_analysis(frame, levels.support_1, levels.resistance_1)
+
+
+@register_benchmark('enrich')
+def bench_enrich(frame):
+    import indicator_graph
+    indicator_graph.enrich(frame)
+
+
+@register_benchmark('enrich_compact', mutates=True)
+def bench_enrich_compact(frame):
+    import indicator_graph
+    from data_preprocessor import compact_candles
+    indicator_graph.enrich(compact_candles(frame, inplace=True), inplace=True, compact=True)
+
+
+@register_benchmark('backtest')
+def bench_backtest(frame):
+    from backtest import backtest
+    close = frame['close']
+    backtest(frame, lambda f: close.ewm(span=9, adjust=False).mean() - close.ewm(span=21, adjust=False).mean(),
+             commission=0.0005, slippage_bps=5)
+
+
+@register_benchmark('json_save_load')
+def bench_json(frame):
+    import data_storage
+    directory = tempfile.mkdtemp()
+    previous, data_storage.DATA_DIR = data_storage.DATA_DIR, directory
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            data_storage.save_json(frame, "bench.json")
+            data_storage.load_json("bench.json")
+    finally:
+        data_storage.DATA_DIR = previous
+        shutil.rmtree(directory)
+
+
+if importlib.util.find_spec("pyarrow") is not None:
+    @register_benchmark('parquet_save_load')
+    def bench_parquet(frame):
+        import data_storage
+        directory = tempfile.mkdtemp()
+        try:
+            data_storage.save_parquet(frame, "BENCH", root=directory)
+            data_storage.load_parquet("BENCH", root=directory)
+        finally:
+            shutil.rmtree(directory)
+
+    def _parquet_dataset(frame):
+        """Записывает фрейм во временное хранилище Parquet; возвращает (директория, начало последних 30 дней)."""
+        import data_storage
+        directory = tempfile.mkdtemp()
+        data_storage.save_parquet(frame, "BENCH", root=directory)
+        return directory, pandas.Timestamp(frame['begin'].iloc[-1]) - pandas.Timedelta(days=30)
+
+    def _remove_dataset(prepared):
+        shutil.rmtree(prepared[0])
+
+    @register_benchmark('parquet_close_last_30d', setup=_parquet_dataset, teardown=_remove_dataset)
+    def bench_parquet_projection(prepared):
+        # Замеряется только чтение: проекция колонок и отсечение партиций/row group по времени
+        import data_storage
+        directory, start = prepared
+        data_storage.load_parquet("BENCH", ['begin', 'close'], start=start, root=directory)
+
+
+def _run_once(function, frames, mutates) -> float:
+    inputs = [frame.copy() for frame in frames] if mutates else frames
+    started = time.perf_counter()
+    for frame in inputs:
+        function(frame)
+    return time.perf_counter() - started
+
+
+def measure(name: str, rows: int, tickers: int = 1, repeat: int = 3, memory: bool = True) -> dict:
+    """
+    Замеряет бенчмарк name на tickers тикерах по rows свечей.
+    Возвращает словарь с временем (минимум и медиана), свечами в секунду
+    и пиковой памятью в мегабайтах (без учёта входных данных).
+    """
+    if name not in BENCHMARKS:
+        raise APK.InvalidInputError(f"Неизвестный бенчмарк: {name}")
+    function, mutates, setup, teardown = BENCHMARKS[name]
+    frames = [generate_ohlcv(rows, seed) for seed in range(tickers)]
+    warmup = [frame.head(100) for frame in frames[:1]]
+    if setup is not None:
+        frames, warmup = [setup(frame) for frame in frames], [setup(frame) for frame in warmup]
+
+    try:
+        # Прогрев: импорты модулей и кэши pandas
+        _run_once(function, warmup, mutates)
+        times = [_run_once(function, frames, mutates) for _ in range(repeat)]
+
+        peak = None
+        if memory:
+            inputs = [frame.copy() for frame in frames] if mutates else frames
+            tracemalloc.start()
+            for frame in inputs:
+                function(frame)
+            peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            tracemalloc.stop()
+    finally:
+        if teardown is not None:
+            for prepared in frames + warmup:
+                teardown(prepared)
+
+    best = min(times)
+    return {
+        'name': name,
+        'rows': rows,
+        'tickers': tickers,
+        'repeat': repeat,
+        'min_s': best,
+        'median_s': float(numpy.median(times)),
+        'rows_per_s': rows * tickers / best if best > 0 else None,
+        'peak_mb': peak,
+    }
+
+
+def environment() -> dict:
+    """Коммит, версии интерпретатора и библиотек, платформа."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def run_suite(names=None, rows=DEFAULT_ROWS, tickers=DEFAULT_TICKERS, repeat: int = 3,
+              memory: bool = True, max_cells: int = 10_000_000, progress=print) -> dict:
+    """
+    Прогоняет бенчмарки по сетке размеров.
+
+    max_cells -- пропускать комбинации, где rows * tickers больше (полная сетка
+                 1000 тикеров x 10M свечей в память не помещается)
+    """
+    names = names or list(BENCHMARKS)
+    results = []
+    for name in names:
+        for row_count in rows:
+            for ticker_count in tickers:
+                if row_count * ticker_count > max_cells:
+                    continue
+                result = measure(name, row_count, ticker_count, repeat, memory)
+                results.append(result)
+                if progress is not None:
+                    peak = f"{result['peak_mb']:.1f} МБ" if result['peak_mb'] is not None else "-"
+                    progress(f"{name:30s} {row_count:>10d} x {ticker_count:<5d} "
+                             f"{result['min_s'] * 1000:10.2f} мс  {peak}")
+    return {'environment': environment(), 'results': results}
+
+
+def save_results(report: dict, filename: str = None) -> str:
+    """Сохраняет отчёт в JSON (по умолчанию storage/benchmarks/<коммит>_<время>.json)."""
+    if filename is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = report['environment']['timestamp'].replace(':', '')
+        filename = os.path.join(RESULTS_DIR, f"{report['environment']['commit'] or 'local'}_{stamp}.json")
+    with open(filename, 'w', encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    return filename
+
+
+def compare(baseline: dict, current: dict, threshold: float = 1.1) -> list:
+    """
+    Сравнивает два отчёта по совпадающим (имя, свечи, тикеры).
+    Возвращает строки с отношением времени и памяти; regression — замедление больше threshold.
+    """
+    def key(result):
+        return result['name'], result['rows'], result['tickers']
+
+    previous = {key(result): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        ratio = result['min_s'] / old['min_s'] if old['min_s'] > 0 else None
+        memory = (result['peak_mb'] / old['peak_mb']
+                  if result['peak_mb'] is not None and old['peak_mb'] else None)
+        rows.append({'name': result['name'], 'rows': result['rows'], 'tickers': result['tickers'],
+                     'time_ratio': ratio, 'memory_ratio': memory,
+                     'regression': ratio is not None and ratio > threshold})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарки индикаторов и ввода-вывода")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run")
+    run.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS))
+    run.add_argument("--rows", nargs="*", type=int, default=None)
+    run.add_argument("--tickers", nargs="*", type=int, default=None)
+    run.add_argument("--full", action="store_true", help="полная сетка до 10M свечей и 1000 тикеров")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--no-memory", action="store_true")
+    run.add_argument("--output", default=None)
+
+    diff = commands.add_parser("compare")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=1.1)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        rows = args.rows or (FULL_ROWS if args.full else DEFAULT_ROWS)
+        tickers = args.tickers or (FULL_TICKERS if args.full else DEFAULT_TICKERS)
+        report = run_suite(args.only, rows, tickers, args.repeat, not args.no_memory)
+        print(f"Результаты сохранены в {save_results(report, args.output)}")
+    else:
+        with open(args.baseline, 'r', encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding="utf-8") as f:
+            current = json.load(f)
+        for row in compare(baseline, current, args.threshold):
+            mark = "РЕГРЕССИЯ" if row['regression'] else ""
+            memory = f"{row['memory_ratio']:.2f}" if row['memory_ratio'] is not None else "-"
+            print(f"{row['name']:30s} {row['rows']:>10d} x {row['tickers']:<5d} "
+                  f"время x{row['time_ratio']:.2f}  память x{memory}  {mark}")
@@ -1,13 +1,13 @@
+import numpy
 import pandas as pd
 import json
-import matplotlib.pyplot as plt
 import os
 import _AppProjectKit as APK
+import indicator_graph as graph
+from instrumentation import instrumented
 
 # Директория для хранения данных
 DATA_DIR = "storage"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)  # Создать директорию, если она отсутствует
 
 def load_data(filename):
     """Загружает данные из JSON-файла и конвертирует их в DataFrame."""
@@ -45,12 +45,107 @@ def calculate_returns(data):
     data['Cumulative_Returns'] = (1 + data['Strategy_Returns']).cumprod()
     return data
 
+def _hold(signal: numpy.ndarray) -> numpy.ndarray:
+    """Позиция по последней оси: последний ненулевой сигнал, как в generate_signals."""
+    steps = numpy.arange(signal.shape[-1])
+    last = numpy.maximum.accumulate(numpy.where(signal != 0, steps, 0), axis=-1)
+    return numpy.take_along_axis(signal, last, axis=-1)
+
+
+def sweep_parameters(frames, windows=(10, 20, 30), ks=(1.5, 2, 2.5), periods_per_year: int = 252) -> pd.DataFrame:
+    """
+    Перебор параметров стратегии Полос Боллинджера по сетке (window, k).
+
+    Для каждого окна скользящие SMA/STD считаются один раз, а полосы, сигналы,
+    позиции и доходности для всех k получаются одним проходом по двумерным
+    массивам (k x свечи). Исходные фреймы не изменяются и не копируются.
+
+    Аргументы:
+    frames -- DataFrame с колонкой close или словарь {тикер: DataFrame}
+    windows, ks -- значения window и k для перебора
+    periods_per_year -- число свечей в году для годового коэффициента Шарпа
+
+    Возвращает:
+    DataFrame с колонками ticker, window, k, total_return, sharpe, max_drawdown, trades.
+    Total_return совпадает с Cumulative_Returns - 1 из calculate_returns.
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = {None: frames}
+    ks = numpy.asarray(ks, dtype=float)[:, None]
+    rows = []
+    for ticker, frame in frames.items():
+        if 'close' not in frame.columns:
+            raise APK.InvalidInputError("Отсутствует обязательный столбец close.")
+        close = frame['close']
+        prices = close.to_numpy(dtype=float)
+        returns = numpy.nan_to_num(close.pct_change().to_numpy(dtype=float))
+
+        for window in windows:
+            rolling = close.rolling(window=window)
+            sma = rolling.mean().to_numpy()
+            std = rolling.std().to_numpy()
+            upper = sma + ks * std
+            lower = sma - ks * std
+
+            signal = (prices < lower).astype(numpy.int8) - (prices > upper)
+            position = _hold(signal)
+            strategy = numpy.zeros(position.shape)
+            strategy[:, 1:] = returns[1:] * position[:, :-1]
+
+            equity = numpy.cumprod(1 + strategy, axis=1)
+            drawdown = equity / numpy.maximum.accumulate(equity, axis=1) - 1
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                sharpe = (strategy[:, 1:].mean(axis=1) / strategy[:, 1:].std(axis=1, ddof=1)
+                          * numpy.sqrt(periods_per_year))
+            trades = numpy.count_nonzero(numpy.diff(position, axis=1, prepend=0), axis=1)
+
+            for i, k in enumerate(ks[:, 0]):
+                rows.append({'ticker': ticker, 'window': window, 'k': k,
+                             'total_return': equity[i, -1] - 1, 'sharpe': sharpe[i],
+                             'max_drawdown': drawdown[i].min(), 'trades': int(trades[i])})
+    return pd.DataFrame(rows, columns=['ticker', 'window', 'k', 'total_return', 'sharpe',
+                                       'max_drawdown', 'trades'])
+
+
+@graph.register_operation('band')
+def band(sma: pd.Series, std: pd.Series, k: float) -> pd.Series:
+    return sma + (k * std)
+
+
+@graph.register_operation('band_signal')
+def band_signal(close: pd.Series, upper: pd.Series, lower: pd.Series) -> pd.Series:
+    """Сигнал как в generate_signals: 1 — ниже нижней полосы, -1 — выше верхней."""
+    signal = pd.Series(0, index=close.index)
+    signal[close < lower] = 1
+    signal[close > upper] = -1
+    return signal
+
+
+@graph.register_operation('hold', warmup=None)
+def hold_position(signal: pd.Series) -> pd.Series:
+    """Позиция — последний ненулевой сигнал (численно, без object-колонки)."""
+    return signal.where(signal != 0).ffill().fillna(0)
+
+
+@graph.register_indicator('Bollinger', window=20, k=2)
+def bollinger_indicator(window: int, k: float) -> dict:
+    """Колонки bollinger_strings в виде узлов графа."""
+    sma = graph.rolling_mean('close', window)
+    std = graph.rolling_std('close', window)
+    upper = graph.node('band', sma, std, k=k)
+    lower = graph.node('band', sma, std, k=-k)
+    signal = graph.node('band_signal', 'close', upper, lower)
+    return {'Upper': upper, 'Lower': lower, 'Signal': signal, 'Position': graph.node('hold', signal)}
+
 def save_signals_to_file(data, filename="bollinger_signals_output.txt"):
     """Сохраняет сигналы и рекомендации в файл."""
+    # Ненулевые сигналы выбираются маской и записываются одним блоком
+    signal = data['Signal'].to_numpy()
+    mask = signal != 0
+    names = numpy.where(signal[mask] == 1, 'Покупка', 'Продажа')
+    lines = [f"Дата: {index}, Сигнал: {name}\n" for index, name in zip(data.index[mask], names)]
     with open(filename, 'w') as file:
-        for i in range(len(data)):
-            if data['Signal'].iloc[i] != 0:
-                file.write(f"Дата: {data.index[i]}, Сигнал: {'Покупка' if data['Signal'].iloc[i] == 1 else 'Продажа'}\n")
+        file.write("".join(lines))
         file.write("\nАнализ последних данных:\n")
         recommendation = generate_recommendation(data)
         file.write(recommendation + '\n')
@@ -68,6 +163,7 @@ def generate_recommendation(data):
 
 def plot_bollinger_bands(data):
     """Строит график Полос Боллинджера."""
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12,6))
     plt.plot(data.index, data['close'], label='Цена закрытия')
     plt.plot(data.index, data['Upper'], label='Верхняя полоса', linestyle='--')
@@ -79,6 +175,7 @@ def plot_bollinger_bands(data):
 
 def plot_strategy_performance(data):
     """Строит график эффективности стратегии."""
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12,6))
     plt.plot(data.index, data['Cumulative_Returns'], label='Кумулятивная доходность стратегии')
     plt.legend()
@@ -86,6 +183,7 @@ def plot_strategy_performance(data):
     plt.show()
 
 
+@instrumented
 def bollinger_strings(dataFrame: pd.DataFrame) -> APK.bollinger:
     try:
         # Загрузка данных
@@ -0,0 +1,355 @@
+"""
+Колоночное хранилище свечей на memory-mapped бинарных файлах.
+
+Каждая пара (тикер, интервал) хранится в отдельной директории
+storage/candles/<TICKER>/<interval>/, где каждая колонка лежит в своём
+файле фиксированной ширины (<column>.bin). При чтении файлы открываются
+через numpy.memmap, так что индикаторы получают массивы без копирования.
+"""
+import os
+import re as regular
+import numpy
+import pandas
+import _AppProjectKit as APK
+from instrumentation import instrumented
+
+
+# Путь к директории для хранения данных
+DATA_DIR = "storage"
+STORE_DIR = os.path.join(DATA_DIR, "candles")
+
+# Колонки хранилища и их бинарные типы.
+# begin хранится как количество секунд с эпохи (наивное московское время)
+COLUMNS = {
+    'begin': numpy.dtype('<i8'),
+    'open': numpy.dtype('<f8'),
+    'high': numpy.dtype('<f8'),
+    'low': numpy.dtype('<f8'),
+    'close': numpy.dtype('<f8'),
+    'volume': numpy.dtype('<f8'),
+    'value': numpy.dtype('<f8'),
+}
+
+# Медианный шаг свечей (в минутах) -> код интервала MOEX ISS
+_INTERVAL_STEPS = [
+    (1, 1),
+    (10, 10),
+    (60, 60),
+    (24 * 60, 24),
+    (7 * 24 * 60, 7),
+    (31 * 24 * 60, 31),
+    (92 * 24 * 60, 4),
+]
+
+# Выгрузки data_collector.ask_moex: {ticker}_{start}_{period}_[HHMMSS].json,
+# например FEES_2024-11-10_3D_[183522].json; preprocessed_*.json и прочие
+# производные файлы под шаблон не подходят
+JSON_NAME = regular.compile(r'^([A-Za-z0-9]+)_\d{4}-\d{2}-\d{2}_[A-Za-z0-9]+_\[\d{6}\]\.json$')
+
+
+def json_ticker(filename: str):
+    """Тикер по имени выгрузки {ticker}_{start}_{period}_[HHMMSS].json (в верхнем регистре) или None."""
+    match = JSON_NAME.match(os.path.basename(filename))
+    return match.group(1).upper() if match else None
+
+
+def infer_interval(begin: pandas.Series) -> int:
+    """
+    Определяет код интервала MOEX по медианному шагу между свечами.
+    """
+    stamps = pandas.to_datetime(begin).sort_values()
+    if stamps.size < 2:
+        raise APK.InvalidInputError("Недостаточно свечей для определения интервала.")
+
+    step = stamps.diff().median().total_seconds() / 60
+    for minutes, interval in _INTERVAL_STEPS:
+        # Допускаем пропуски (выходные, клиринг) — берём ближайший сверху шаг
+        if step <= minutes * 1.5:
+            return interval
+    raise APK.InvalidInputError(f"Не удалось определить интервал по шагу {step} мин.")
+
+
+def to_columns(frame: pandas.DataFrame) -> dict:
+    """
+    Приводит свечной фрейм к словарю numpy-массивов типов из COLUMNS,
+    отсортированному по begin и без повторяющихся свечей (последняя побеждает).
+    """
+    if 'begin' not in frame.columns:
+        raise APK.InvalidInputError("Data does not contain 'begin' column.")
+
+    begin = pandas.to_datetime(frame['begin']).to_numpy(dtype='datetime64[s]').astype(COLUMNS['begin'])
+    columns = {'begin': begin}
+    for name, dtype in COLUMNS.items():
+        if name == 'begin':
+            continue
+        if name in frame.columns:
+            columns[name] = pandas.to_numeric(frame[name]).to_numpy(dtype=dtype)
+        else:
+            columns[name] = numpy.full(begin.size, numpy.nan, dtype=dtype)
+
+    # Стабильная сортировка + оставляем последнее вхождение каждого begin
+    order = numpy.argsort(begin, kind='stable')
+    begin_sorted = begin[order]
+    keep = numpy.ones(begin_sorted.size, dtype=bool)
+    keep[:-1] = begin_sorted[1:] != begin_sorted[:-1]
+    order = order[keep]
+    return {name: values[order] for name, values in columns.items()}
+
+
+class CandleStore:
+    """
+    Хранилище свечей, разбитое по тикерам и интервалам.
+    """
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+
+    def _path(self, ticker: str, interval: int) -> str:
+        return os.path.join(self.root, ticker.upper(), str(interval))
+
+    def _column_path(self, ticker: str, interval: int, column: str) -> str:
+        return os.path.join(self._path(ticker, interval), f"{column}.bin")
+
+    def tickers(self) -> list:
+        """Список тикеров, присутствующих в хранилище."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, name)))
+
+    def intervals(self, ticker: str) -> list:
+        """Список интервалов, сохранённых для тикера."""
+        path = os.path.join(self.root, ticker.upper())
+        if not os.path.isdir(path):
+            return []
+        return sorted(int(name) for name in os.listdir(path) if name.isdigit())
+
+    def exists(self, ticker: str, interval: int) -> bool:
+        return os.path.exists(self._column_path(ticker, interval, 'begin'))
+
+    def length(self, ticker: str, interval: int) -> int:
+        """
+        Количество свечей. Если запись была прервана и колонки имеют разную
+        длину, учитывается только общая (минимальная) часть.
+        """
+        if not self.exists(ticker, interval):
+            return 0
+        sizes = []
+        for name, dtype in COLUMNS.items():
+            path = self._column_path(ticker, interval, name)
+            sizes.append(os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    @instrumented
+    def write(self, ticker: str, interval: int, frame: pandas.DataFrame) -> int:
+        """
+        Полностью перезаписывает свечи (тикер, интервал) содержимым фрейма.
+        Возвращает количество записанных свечей.
+        """
+        columns = to_columns(frame)
+        path = self._path(ticker, interval)
+        os.makedirs(path, exist_ok=True)
+
+        # Пишем во временные файлы и атомарно подменяем
+        for name, values in columns.items():
+            target = self._column_path(ticker, interval, name)
+            values.tofile(target + ".tmp")
+            os.replace(target + ".tmp", target)
+        return columns['begin'].size
+
+    def last_begin(self, ticker: str, interval: int):
+        """
+        Время начала последней сохранённой свечи (pandas.Timestamp) или None.
+        """
+        rows = self.length(ticker, interval)
+        if rows == 0:
+            return None
+        begin = numpy.memmap(self._column_path(ticker, interval, 'begin'),
+                             dtype=COLUMNS['begin'], mode='r', offset=(rows - 1) * COLUMNS['begin'].itemsize,
+                             shape=(1,))
+        return pandas.Timestamp(int(begin[0]), unit='s')
+
+    @instrumented
+    def append(self, ticker: str, interval: int, frame: pandas.DataFrame) -> int:
+        """
+        Дописывает в конец колонок свечи новее последней сохранённой.
+        Свечи раньше последней отбрасываются, свеча с тем же begin заменяет
+        последнюю (она могла быть ещё не закрыта на момент прошлого запроса).
+        Возвращает количество добавленных свечей.
+        """
+        rows = self.length(ticker, interval)
+        if rows == 0:
+            return self.write(ticker, interval, frame)
+
+        columns = to_columns(frame)
+        last = self.last_begin(ticker, interval).value // 10**9
+        boundary = numpy.flatnonzero(columns['begin'] == last)
+        fresh = columns['begin'] > last
+
+        # begin пишется последним: при сбое length() отрежет недописанный хвост
+        for name in [c for c in COLUMNS if c != 'begin'] + ['begin']:
+            itemsize = COLUMNS[name].itemsize
+            with open(self._column_path(ticker, interval, name), 'r+b') as f:
+                f.truncate(rows * itemsize)
+                if boundary.size:
+                    f.seek((rows - 1) * itemsize)
+                    f.write(columns[name][boundary[-1]:boundary[-1] + 1].tobytes())
+                f.seek(rows * itemsize)
+                f.write(columns[name][fresh].tobytes())
+        return int(fresh.sum())
+
+    def read_arrays(self, ticker: str, interval: int, start=None, end=None) -> dict:
+        """
+        Возвращает словарь memory-mapped массивов только для чтения.
+        begin отдаётся как datetime64[s]. start/end (включительно) ограничивают
+        диапазон по времени; срез memmap не копирует данные.
+        """
+        if not self.exists(ticker, interval):
+            raise APK.DatabaseError(f"Свечи {ticker} ({interval}) отсутствуют в хранилище.")
+
+        rows = self.length(ticker, interval)
+        arrays = {}
+        for name, dtype in COLUMNS.items():
+            if rows == 0:
+                arrays[name] = numpy.empty(0, dtype=dtype)
+            else:
+                arrays[name] = numpy.memmap(self._column_path(ticker, interval, name),
+                                            dtype=dtype, mode='r', shape=(rows,))
+        arrays['begin'] = arrays['begin'].view('datetime64[s]')
+
+        lo, hi = 0, rows
+        if start is not None:
+            lo = numpy.searchsorted(arrays['begin'], numpy.datetime64(pandas.Timestamp(start), 's'), side='left')
+        if end is not None:
+            hi = numpy.searchsorted(arrays['begin'], numpy.datetime64(pandas.Timestamp(end), 's'), side='right')
+        if lo != 0 or hi != rows:
+            arrays = {name: values[lo:hi] for name, values in arrays.items()}
+        return arrays
+
+    @instrumented
+    def read_frame(self, ticker: str, interval: int, start=None, end=None,
+                   columns: list = None) -> pandas.DataFrame:
+        """
+        Возвращает свечи как DataFrame поверх memory-mapped массивов (без копирования).
+        Значения свечей доступны только для чтения, новые колонки добавлять можно.
+        """
+        arrays = self.read_arrays(ticker, interval, start, end)
+        if columns is not None:
+            arrays = {name: arrays[name] for name in columns}
+        return pandas.DataFrame(arrays, copy=False)
+
+    def delete(self, ticker: str, interval: int) -> None:
+        """Удаляет свечи (тикер, интервал) из хранилища."""
+        path = self._path(ticker, interval)
+        if not os.path.isdir(path):
+            return
+        for name in os.listdir(path):
+            os.remove(os.path.join(path, name))
+        os.rmdir(path)
+
+
+def combine_candles(frames: list) -> pandas.DataFrame:
+    """
+    Объединяет свечные фреймы одного тикера и интервала: begin приводится
+    ко времени, повторы удаляются (побеждает более поздний фрейм), свечи
+    сортируются по begin.
+    """
+    merged = pandas.concat(frames, ignore_index=True)
+    merged['begin'] = pandas.to_datetime(merged['begin'], format='mixed')
+    merged = merged.drop_duplicates('begin', keep='last')
+    return merged.sort_values('begin', kind='stable', ignore_index=True)
+
+
+def iter_json_dumps(data_dir: str = DATA_DIR, interval: int = None):
+    """
+    Читает JSON-выгрузки data_dir по одной, в порядке изменения файлов
+    (более поздний — последним), и отдаёт (имя файла, (тикер, интервал), DataFrame).
+    Для файлов без свечей или с неопределимым интервалом вместо ключа
+    отдаётся None, а вместо фрейма — причина пропуска.
+
+    Аргументы:
+    interval -- код интервала; если не задан, определяется по шагу свечей
+    """
+    if not os.path.isdir(data_dir):
+        raise APK.DatabaseError(f"Директория {data_dir} не найдена.")
+
+    files = sorted((f for f in os.listdir(data_dir) if JSON_NAME.match(f)),
+                   key=lambda f: (os.path.getmtime(os.path.join(data_dir, f)), f))
+    for filename in files:
+        try:
+            frame = pandas.read_json(os.path.join(data_dir, filename))
+        except ValueError as e:
+            yield filename, None, f"не удалось прочитать JSON: {e}"
+            continue
+        if 'begin' not in frame.columns or frame.empty:
+            yield filename, None, "нет свечей"
+            continue
+        try:
+            file_interval = interval if interval is not None else infer_interval(frame['begin'])
+        except APK.InvalidInputError as e:
+            yield filename, None, str(e)
+            continue
+        yield filename, (json_ticker(filename), file_interval), frame
+
+
+def load_json_groups(data_dir: str = DATA_DIR, interval: int = None) -> tuple:
+    """
+    Читает JSON-файлы вида {ticker}_{start}_{period}_[HHMMSS].json и группирует их
+    по (тикер, интервал). Каждая выгрузка покрывает лишь часть истории тикера,
+    поэтому файлы одной группы нужно объединять (combine_candles), а не
+    обрабатывать по отдельности.
+
+    Аргументы:
+    interval -- код интервала; если не задан, определяется по шагу свечей
+
+    Возвращает:
+    (groups, skipped): groups — {(ticker, interval): [(имя файла, DataFrame)]}
+    в порядке изменения файлов (более поздний — последним), skipped — список
+    (имя файла, причина) для файлов без свечей или с неопределимым интервалом.
+    """
+    groups, skipped = {}, []
+    for filename, key, frame in iter_json_dumps(data_dir, interval):
+        if key is None:
+            skipped.append((filename, frame))
+        else:
+            groups.setdefault(key, []).append((filename, frame))
+    return groups, skipped
+
+
+def migrate_json_storage(store: CandleStore = None, data_dir: str = DATA_DIR,
+                         interval: int = None) -> list:
+    """
+    Однократно импортирует JSON-файлы вида {ticker}_{start}_{period}_[HHMMSS].json
+    из data_dir в колоночное хранилище. Файлы одного тикера и интервала
+    объединяются; при пересечении побеждает более поздний файл.
+
+    Аргументы:
+    store -- целевое хранилище (по умолчанию storage/candles)
+    data_dir -- директория с JSON-файлами
+    interval -- код интервала; если не задан, определяется по шагу свечей
+
+    Возвращает:
+    список кортежей (ticker, interval, количество свечей, список файлов)
+    """
+    store = store or CandleStore()
+    groups, _ = load_json_groups(data_dir, interval)
+
+    report = []
+    for (ticker, file_interval), parts in groups.items():
+        frames = [frame for _, frame in parts]
+        if store.exists(ticker, file_interval):
+            frames.insert(0, store.read_frame(ticker, file_interval))
+        merged = pandas.concat(frames, ignore_index=True)
+        # Отпускаем memmap до перезаписи файлов
+        del frames
+        rows = store.write(ticker, file_interval, merged)
+        report.append((ticker, file_interval, rows, [filename for filename, _ in parts]))
+    return report
+
+
+if __name__ == "__main__":
+    try:
+        for ticker, interval, rows, sources in migrate_json_storage():
+            print(f"{ticker} ({interval}): {rows} свечей из {len(sources)} файлов")
+    except APK.ApplicationError as e:
+        print(f"Ошибка: {e}")
@@ -1,10 +1,12 @@
-import requests
 import pandas
+import numpy
 import datetime
 import os
 import re as regular
 import datetime
 import _AppProjectKit as APK
+import indicator_graph as graph
+from instrumentation import instrumented
 
 
 #быстрые проверки трендов, window - количество свеч
@@ -22,11 +24,9 @@ def is_uptrend(dataFrame, index, window):
 
 # Директория для хранения данных
 DATA_DIR = "storage"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)  # Создать директорию, если она отсутствует
 
 
-# Функция для идентификации паттерна "Молот"
+# Функция для идентификации паттерна "Молот" (построчная проверка одной свечи)
 def is_hammer(row, dataFrame, index, window):
     body = abs(row['close'] - row['open'])
     lower_shadow = row['open'] - row['low'] if row['close'] > row['open'] else row['close'] - row['low']
@@ -61,7 +61,167 @@ def is_engulfing(df, index):
     return False
 
 
-def current_candlestick_patterns(dataFrame: pandas.DataFrame, window: int = 3) -> pandas.DataFrame:
+# Реестр векторных правил: имя колонки -> функция(признаки свечей) -> массив флажков
+PATTERNS = {}
+
+# Колонки, которые current_candlestick_patterns считает по умолчанию
+DEFAULT_PATTERNS = ['Hammer', 'HangingMan', 'Engulfing']
+
+
+def register_pattern(name: str):
+    """
+    Декоратор, регистрирующий векторное правило паттерна под именем колонки.
+    Правило получает словарь признаков из candle_features и возвращает
+    numpy-массив длиной в количество свечей.
+    """
+    def decorator(rule):
+        PATTERNS[name] = rule
+        return rule
+    return decorator
+
+
+def shift(values: numpy.ndarray, periods: int = 1) -> numpy.ndarray:
+    """Сдвигает массив на periods свечей назад, заполняя начало NaN."""
+    result = numpy.full(values.shape, numpy.nan)
+    if periods < values.size:
+        result[periods:] = values[:values.size - periods]
+    return result
+
+
+def _trend_before(close: numpy.ndarray, window: int, decreasing: bool) -> numpy.ndarray:
+    """
+    Векторный аналог is_downtrend/is_uptrend: для каждой свечи i проверяет,
+    что close[i-window:i] монотонна (нестрого), и i >= window.
+    """
+    n = close.size
+    flags = numpy.zeros(n, dtype=bool)
+    if window <= 0:
+        flags[:] = True
+        return flags
+    if n < window:
+        return flags
+
+    steps = numpy.diff(close)
+    with numpy.errstate(invalid='ignore'):
+        good = steps <= 0 if decreasing else steps >= 0
+    # good_count[j] — количество «правильных» шагов среди steps[:j]
+    good_count = numpy.concatenate(([0], numpy.cumsum(good)))
+    index = numpy.arange(window, n)
+    flags[window:] = good_count[index - 1] - good_count[index - window] == window - 1
+    return flags
+
+
+def candle_features(dataFrame: pandas.DataFrame, window: int = 3) -> dict:
+    """
+    Считает за один проход общие для всех паттернов признаки свечей:
+    тело, тени, трендовые флажки и сдвинутые на одну свечу цены.
+    """
+    open_ = dataFrame['open'].to_numpy(dtype=float)
+    high = dataFrame['high'].to_numpy(dtype=float)
+    low = dataFrame['low'].to_numpy(dtype=float)
+    close = dataFrame['close'].to_numpy(dtype=float)
+
+    body_top = numpy.maximum(open_, close)
+    body_bottom = numpy.minimum(open_, close)
+    return {
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'body': numpy.abs(close - open_),
+        'lower_shadow': body_bottom - low,
+        'upper_shadow': high - body_top,
+        'downtrend': _trend_before(close, window, decreasing=True),
+        'uptrend': _trend_before(close, window, decreasing=False),
+        'prev_open': shift(open_),
+        'prev_close': shift(close),
+    }
+
+
+def _labels(bullish: numpy.ndarray, bearish: numpy.ndarray, name: str) -> numpy.ndarray:
+    """Колонка в формате is_engulfing: 'Bullish <name>', 'Bearish <name>' или False."""
+    labels = numpy.full(bullish.size, False, dtype=object)
+    labels[bearish] = f'Bearish {name}'
+    labels[bullish] = f'Bullish {name}'
+    return labels
+
+
+@register_pattern('Hammer')
+def hammer_rule(f: dict) -> numpy.ndarray:
+    with numpy.errstate(invalid='ignore'):
+        return (f['lower_shadow'] > f['body'] * 2) & (f['upper_shadow'] < f['body']) & f['downtrend']
+
+
+@register_pattern('HangingMan')
+def hanging_man_rule(f: dict) -> numpy.ndarray:
+    with numpy.errstate(invalid='ignore'):
+        return (f['lower_shadow'] > f['body'] * 2) & (f['upper_shadow'] < f['body']) & f['uptrend']
+
+
+@register_pattern('Engulfing')
+def engulfing_rule(f: dict) -> numpy.ndarray:
+    o, c, po, pc = f['open'], f['close'], f['prev_open'], f['prev_close']
+    with numpy.errstate(invalid='ignore'):
+        bullish = (pc < po) & (c > o) & (o < pc) & (c > po)
+        bearish = (pc > po) & (c < o) & (o > pc) & (c < po)
+    return _labels(bullish, bearish, 'Engulfing')
+
+
+@register_pattern('Doji')
+def doji_rule(f: dict) -> numpy.ndarray:
+    """Тело не больше 10% диапазона свечи."""
+    with numpy.errstate(invalid='ignore'):
+        return (f['high'] > f['low']) & (f['body'] <= 0.1 * (f['high'] - f['low']))
+
+
+@register_pattern('Harami')
+def harami_rule(f: dict) -> numpy.ndarray:
+    """Тело свечи целиком внутри тела предыдущей свечи противоположного цвета."""
+    o, c, po, pc = f['open'], f['close'], f['prev_open'], f['prev_close']
+    with numpy.errstate(invalid='ignore'):
+        bullish = (pc < po) & (c > o) & (o > pc) & (c < po)
+        bearish = (pc > po) & (c < o) & (o < pc) & (c > po)
+    return _labels(bullish, bearish, 'Harami')
+
+
+@register_pattern('MorningStar')
+def morning_star_rule(f: dict) -> numpy.ndarray:
+    """
+    Длинная медвежья свеча, за ней свеча с маленьким телом,
+    затем бычья свеча, закрывшаяся выше середины тела первой.
+    """
+    o, c, body = f['open'], f['close'], f['body']
+    o1, c1, body1 = shift(o, 2), shift(c, 2), shift(body, 2)
+    body2 = shift(body, 1)
+    with numpy.errstate(invalid='ignore'):
+        return (c1 < o1) & (body2 < 0.3 * body1) & (c > o) & (c > (o1 + c1) / 2)
+
+
+@register_pattern('ThreeWhiteSoldiers')
+def three_white_soldiers_rule(f: dict) -> numpy.ndarray:
+    """Три бычьи свечи подряд, каждая открывается внутри тела предыдущей и закрывается выше."""
+    o, c = f['open'], f['close']
+    with numpy.errstate(invalid='ignore'):
+        bullish = c > o
+        higher = (c > f['prev_close']) & (o > f['prev_open']) & (o <= f['prev_close'])
+        step = bullish & higher & (shift(c) > shift(o))
+        return step & (shift(step.astype(float)) == 1)
+
+
+@register_pattern('ThreeBlackCrows')
+def three_black_crows_rule(f: dict) -> numpy.ndarray:
+    """Три медвежьи свечи подряд, каждая открывается внутри тела предыдущей и закрывается ниже."""
+    o, c = f['open'], f['close']
+    with numpy.errstate(invalid='ignore'):
+        bearish = c < o
+        lower = (c < f['prev_close']) & (o < f['prev_open']) & (o >= f['prev_close'])
+        step = bearish & lower & (shift(c) < shift(o))
+        return step & (shift(step.astype(float)) == 1)
+
+
+@instrumented
+def current_candlestick_patterns(dataFrame: pandas.DataFrame, window: int = 3,
+                                 patterns: list = None) -> pandas.DataFrame:
     """
     Модифицирует переданный свечной фрейм, добавляя к нему колонки с булевыми флажками,
     помечающими наличие того или иного паттерна.
@@ -75,26 +235,46 @@ def current_candlestick_patterns(dataFrame: pandas.DataFrame, window: int = 3) -
     Медвежье поглощение (Bearish Engulfing):
     Описание: Появляется на вершине восходящего тренда и также состоит из двух свечей. Первая – бычья, а вторая – медвежья, которая полностью перекрывает тело первой.
     Сигналы: Сильный сигнал разворота вниз, особенно при закрытии второй свечи ниже тела первой.
+
+    Все паттерны считаются векторно из общих признаков candle_features.
+    patterns -- список зарегистрированных паттернов (по умолчанию DEFAULT_PATTERNS),
+    например ['Doji', 'Harami', 'MorningStar', 'ThreeWhiteSoldiers'].
     """
-    #преобразование фрейма:
-    dataFrame['Hammer'] = False
-    dataFrame['HangingMan'] = False
-    dataFrame['Engulfing'] = False
+    names = patterns or DEFAULT_PATTERNS
+    unknown = [name for name in names if name not in PATTERNS]
+    if unknown:
+        raise APK.InvalidInputError(f"Неизвестные паттерны: {', '.join(unknown)}")
+
+    features = candle_features(dataFrame, window)
 
     #расстановка флажков
-    dataFrame['Hammer'] = [is_hammer(row, dataFrame, i, window) for i, row in dataFrame.iterrows()]
-    dataFrame['HangingMan'] = [is_hanging_man(row, dataFrame, i, window) for i, row in dataFrame.iterrows()]
-    #Не более 100 шгагов назад
-    dataFrame['Engulfing'] = [is_engulfing(dataFrame, i) for i in range(max(len(dataFrame), 100))]
+    for name in names:
+        dataFrame[name] = PATTERNS[name](features)
+
+    return dataFrame[names]
+
+
+@graph.register_operation('candle_features', warmup=lambda window: max(window, 1))
+def candle_features_operation(open_: pandas.Series, high: pandas.Series, low: pandas.Series,
+                              close: pandas.Series, window: int) -> dict:
+    return candle_features(pandas.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close}), window)
+
+
+@graph.register_operation('pattern', warmup=2)
+def pattern_operation(features: dict, close: pandas.Series, name: str) -> pandas.Series:
+    return pandas.Series(PATTERNS[name](features), index=close.index)
 
-    columns_to_keep = ['Hammer', 'HangingMan', 'Engulfing']
 
-    return dataFrame[columns_to_keep]
+@graph.register_indicator('Candlestick', window=3, patterns=tuple(DEFAULT_PATTERNS))
+def candlestick_indicator(window: int, patterns: tuple) -> dict:
+    """Колонки паттернов в виде узлов графа с общими признаками свечей."""
+    features = graph.node('candle_features', 'open', 'high', 'low', 'close', window=window)
+    return {name: graph.node('pattern', features, 'close', name=name) for name in patterns}
 
 
 if __name__ == "__main__":
     # Чтение данных из файла
-    data = pandas.read_json("storage\FEES_2024-11-10_3D_[183522].json")
+    data = pandas.read_json(os.path.join(DATA_DIR, "FEES_2024-11-10_3D_[183522].json"))
     
     # Проверка наличия необходимого столбца 'close'
     if data.empty:
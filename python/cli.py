@@ -0,0 +1,241 @@
+"""
+Командная строка торгового бота.
+
+    python cli.py fetch SBER GAZP --interval 1 --start 2024-11-01 --resample 5m 1h 1D
+    python cli.py enrich --source all --workers 4
+    python cli.py signals storage/MOEX_2024-11-12_1D_[191120].json --tail 17
+    python cli.py signals SBER --interval 24
+    python cli.py backtest SBER GAZP --interval 24 --signal MA_Signal StochRSI_Signal --rule sum
+    python cli.py report SBER GAZP --interval 24 --formats csv parquet
+    python cli.py bench --only current_rsi_call enrich --rows 1000 100000
+
+Модули импортируются внутри подкоманд, только те, что ей нужны: запуск
+для cron не платит за pandas, requests и модули индикаторов, которые
+подкоманда не использует.
+
+Этапы подкоманд (cli.load, cli.indicators, cli.output и т.п.) замеряются
+instrumentation.timed: с TRADEBOT_INSTRUMENT=1 их время печатается в сводке.
+"""
+import argparse
+import os
+import sys
+from instrumentation import timed
+
+
+# Путь к директории для хранения данных
+DATA_DIR = "storage"
+BANNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "banner.txt")
+
+# Колонки отчёта signals
+SIGNAL_COLUMNS = ['begin', 'close', 'RSI', 'Signal', 'MA_Signal', 'StochRSI_Signal', 'Volume_Signal',
+                  'Hammer', 'HangingMan', 'Engulfing']
+
+
+def load_source(source: str, interval: int = 24):
+    """
+    Свечи по аргументу командной строки: путь к JSON-файлу, имя файла
+    в DATA_DIR или тикер колоночного хранилища (с интервалом interval).
+    """
+    import pandas
+    import _AppProjectKit as APK
+    from candle_store import CandleStore
+
+    with timed("cli.load") as stage:
+        frame = None
+        for path in (source, os.path.join(DATA_DIR, source)):
+            if source.endswith(".json") and os.path.isfile(path):
+                frame = pandas.read_json(path)
+                break
+        if frame is None:
+            store = CandleStore()
+            if not store.exists(source.upper(), interval):
+                raise APK.DatabaseError(f"Нет ни файла, ни свечей {source} ({interval}) в хранилище.")
+            frame = store.read_frame(source.upper(), interval).copy()
+        if stage is not None:
+            stage.rows = len(frame)
+    return frame
+
+
+def default_sources() -> list:
+    """JSON-файлы DATA_DIR: источник по умолчанию для signals и backtest."""
+    if not os.path.isdir(DATA_DIR):
+        return []
+    return sorted(name for name in os.listdir(DATA_DIR) if name.endswith(".json"))
+
+
+def fetch(args) -> int:
+    from moex_fetcher import MoexFetcher, print_error
+    failed = []
+
+    def on_error(key, error):
+        print_error(key, error)
+        failed.append(key)
+
+    with timed("cli.fetch"), MoexFetcher(max_workers=args.workers) as fetcher:
+        if args.resample:
+            from resample import update_timeframes
+            report = update_timeframes(fetcher, args.tickers, args.interval, args.resample, args.start)
+            for ticker, appended in report.items():
+                print(f"{ticker}: {appended}")
+        else:
+            for (ticker, interval), count in fetcher.update_store(args.tickers, args.interval, args.start,
+                                                                  errors="skip", on_error=on_error).items():
+                print(f"{ticker} ({interval}): +{count} свечей")
+    return 1 if failed else 0
+
+
+def enrich(args) -> int:
+    from batch_enrich import batch_enrich, list_jobs, ENRICHED_DIR
+    with timed("cli.enrich"):
+        summaries = batch_enrich(list_jobs(args.source), args.output or ENRICHED_DIR, max_workers=args.workers,
+                                 errors="skip")
+    failed = [summary for summary in summaries if summary['error']]
+    print(f"Готово: {len(summaries)} заданий, {sum(s['rows'] for s in summaries)} строк, ошибок: {len(failed)}")
+    return 1 if failed else 0
+
+
+def signals(args) -> int:
+    import pandas
+    import indicator_graph as graph
+    from bollinger_strategy import generate_recommendation
+
+    pandas.set_option('future.no_silent_downcasting', True)
+    try:
+        from colorama import Fore, Style
+        cyan, reset = Fore.CYAN, Style.RESET_ALL
+    except ImportError:
+        cyan = reset = ""
+
+    if not args.quiet and os.path.exists(BANNER):
+        with open(BANNER, 'r', encoding="UTF-8") as banner_file:
+            print(banner_file.read())
+    for source in args.sources or default_sources():
+        candles = load_source(source, args.interval)
+        with timed("cli.indicators", len(candles)):
+            data = graph.enrich(candles)
+            recommendation = generate_recommendation(data)
+        with timed("cli.output"):
+            print(f"{cyan}{source}\nМгновенные рекомендации:\n{recommendation}\n{reset}")
+            print(data[[column for column in SIGNAL_COLUMNS if column in data.columns]].tail(args.tail).to_string())
+    return 0
+
+
+def backtest(args) -> int:
+    import pandas
+    import indicator_graph as graph
+    from backtest import backtest as run_backtest
+
+    frames = {source: load_source(source, args.interval) for source in args.sources or default_sources()}
+    with timed("cli.indicators", sum(len(frame) for frame in frames.values())):
+        frames = {source: graph.enrich(frame) for source, frame in frames.items()}
+    signal = args.signal[0] if len(args.signal) == 1 else args.signal
+    with timed("cli.backtest"):
+        result = run_backtest(frames, signal, rule=args.rule, direction=args.direction,
+                              commission=args.commission, slippage_bps=args.slippage_bps)
+    with timed("cli.output"), pandas.option_context('display.width', 200, 'display.max_columns', 20):
+        print(result.summary.to_string(index=False))
+        if args.trades:
+            print(result.trades.to_string(index=False))
+    return 0
+
+
+def report(args) -> int:
+    from report import generate_report, load_frames, REPORTS_DIR
+    if args.sources:
+        from candle_store import combine_candles, json_ticker
+        # Несколько выгрузок одного тикера объединяются, а не перезаписывают друг друга
+        parts = {}
+        for source in args.sources:
+            ticker = json_ticker(source) if source.endswith(".json") else source.upper()
+            parts.setdefault(ticker or os.path.basename(source), []).append(load_source(source, args.interval))
+        frames = {ticker: combine_candles(group) for ticker, group in parts.items()}
+    else:
+        with timed("cli.load"):
+            frames = load_frames(DATA_DIR)
+    with timed("cli.report", sum(len(frame) for frame in frames.values())):
+        paths = generate_report(frames, args.output or REPORTS_DIR, args.formats)
+    for kind, path in paths.items():
+        print(f"{kind}: {path}")
+    return 0
+
+
+def bench(args) -> int:
+    import benchmarks
+    report = benchmarks.run_suite(args.only, args.rows or benchmarks.DEFAULT_ROWS,
+                                  args.tickers or benchmarks.DEFAULT_TICKERS, args.repeat, not args.no_memory)
+    print(f"Результаты сохранены в {benchmarks.save_results(report, args.output)}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Торговый бот: данные, индикаторы, сигналы")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("fetch", help="догрузить свечи ISS в хранилище")
+    command.add_argument("tickers", nargs="+")
+    command.add_argument("--interval", type=int, default=10)
+    command.add_argument("--start", default=None, help="начало для тикеров без сохранённых свечей")
+    command.add_argument("--resample", nargs="*", default=None, metavar="TIMEFRAME",
+                         help="построить старшие таймфреймы (5m 15m 1h 1D 1W) из загруженных свечей")
+    command.add_argument("--workers", type=int, default=8)
+    command.set_defaults(handler=fetch)
+
+    command = commands.add_parser("enrich", help="рассчитать индикаторы по всем данным")
+    command.add_argument("--source", choices=("json", "store", "all"), default="all")
+    command.add_argument("--output", default=None)
+    command.add_argument("--workers", type=int, default=None)
+    command.set_defaults(handler=enrich)
+
+    command = commands.add_parser("signals", help="последние сигналы и рекомендация")
+    command.add_argument("sources", nargs="*", help="JSON-файлы или тикеры хранилища (по умолчанию storage/*.json)")
+    command.add_argument("--interval", type=int, default=24)
+    command.add_argument("--tail", type=int, default=17)
+    command.add_argument("--quiet", action="store_true", help="без баннера")
+    command.set_defaults(handler=signals)
+
+    command = commands.add_parser("backtest", help="бэктест сигнальной колонки")
+    command.add_argument("sources", nargs="*")
+    command.add_argument("--interval", type=int, default=24)
+    command.add_argument("--signal", nargs="+", default=["Signal"])
+    command.add_argument("--rule", choices=("all", "sum", "any"), default="all")
+    command.add_argument("--direction", choices=("both", "long", "short"), default="both")
+    command.add_argument("--commission", type=float, default=0.0)
+    command.add_argument("--slippage-bps", type=float, default=0.0)
+    command.add_argument("--trades", action="store_true", help="напечатать список сделок")
+    command.set_defaults(handler=backtest)
+
+    command = commands.add_parser("report", help="отчёт по сигналам всех индикаторов")
+    command.add_argument("sources", nargs="*")
+    command.add_argument("--interval", type=int, default=24)
+    command.add_argument("--formats", nargs="+", choices=("csv", "jsonl", "parquet"), default=["csv"])
+    command.add_argument("--output", default=None)
+    command.set_defaults(handler=report)
+
+    command = commands.add_parser("bench", help="бенчмарки индикаторов")
+    command.add_argument("--only", nargs="*", default=None)
+    command.add_argument("--rows", nargs="*", type=int, default=None)
+    command.add_argument("--tickers", nargs="*", type=int, default=None)
+    command.add_argument("--repeat", type=int, default=3)
+    command.add_argument("--no-memory", action="store_true")
+    command.add_argument("--output", default=None)
+    command.set_defaults(handler=bench)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        # Ошибки приложения печатаются без трассировки
+        import _AppProjectKit as APK
+        if isinstance(e, APK.ApplicationError):
+            print(f"Ошибка: {e}", file=sys.stderr)
+            return 1
+        raise
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ import datetime
 import os 
 import re as regular
 import _AppProjectKit as APK
+from candle_store import CandleStore
 
 
 """class ApplicationError(Exception):
@@ -21,28 +22,32 @@ class InvalidInputError(ApplicationError):
         
 # Путь к директории для сохранения данных
 DATA_DIR = "storage"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+
+
+def period_start(period: str) -> datetime.datetime:
+    """
+    Переводит строку периода ("3D" — три дня, "M5" — пять минут) в момент начала окна.
+    """
+    match period:
+        #_D сколько-то дней
+        case period if regular.fullmatch(r'\d[A-Za-z]', period): 
+            return datetime.datetime.now() - datetime.timedelta(days=int(period[0]))
+
+        #M_ сколько-то минут
+        case period if regular.fullmatch(r'[A-Za-z]\d', period): 
+            return datetime.datetime.now() - datetime.timedelta(minutes=int(period[1]))
+
+        #Ошибка ввода
+        case _:
+            raise APK.InvalidInputError("wrong period")
 
 
 def ask_moex(ticker: str = "FEES", interval: int = 10, period: str = "1D", end: str = None) -> pandas.DataFrame:
     with requests.Session() as session:
 
         #установка анализируемого интервала
-        match period:
-            #_D сколько-то дней
-            case period if regular.fullmatch(r'\d[A-Za-z]', period): 
-                buf = datetime.datetime.now() - datetime.timedelta(days=int(period[0]))
-                start = buf.strftime('%Y-%m-%d')
-
-            #M_ сколько-то минут
-            case period if regular.fullmatch(r'[A-Za-z]\d', period): 
-                buf = datetime.datetime.now() - datetime.timedelta(minutes=int(period[1]))
-                start = buf.strftime('%Y-%m-%d')
-
-            #Ошибка ввода
-            case _:
-                raise APK.InvalidInputError("wrong period")
+        buf = period_start(period)
+        start = buf.strftime('%Y-%m-%d')
             
         #список словарей свечек
         try:
@@ -67,10 +72,41 @@ def ask_moex(ticker: str = "FEES", interval: int = 10, period: str = "1D", end:
         #перегон в датафрейм
         dataFrame = pandas.DataFrame(candles)
         buf = buf.strftime("[%H%M%S]")
-        dataFrame.to_json("storage/{}_{}_{}_{}.json".format(ticker, start, period, buf))
+        os.makedirs(DATA_DIR, exist_ok=True)
+        dataFrame.to_json(os.path.join(DATA_DIR, "{}_{}_{}_{}.json".format(ticker, start, period, buf)))
         return dataFrame
 
 
+def update_moex(ticker: str = "FEES", interval: int = 10, period: str = "1D",
+                store: CandleStore = None) -> int:
+    """
+    Инкрементально дополняет колоночное хранилище свежими свечами.
+
+    Если для (ticker, interval) в хранилище уже есть свечи, с биржи запрашиваются
+    только свечи начиная с последней сохранённой; она перезаписывается
+    (могла быть не закрыта), остальные дописываются в конец.
+    Иначе загружается окно period, как в ask_moex.
+
+    Возвращает количество добавленных свечей.
+    """
+    store = store or CandleStore()
+    last = store.last_begin(ticker, interval)
+    if last is not None:
+        start = last.strftime('%Y-%m-%d %H:%M:%S')
+    else:
+        start = period_start(period).strftime('%Y-%m-%d')
+
+    with requests.Session() as session:
+        try:
+            candles = apimoex.get_board_candles(session, ticker, interval, start)
+        except requests.exceptions.RequestException as e:
+            raise APK.DatabaseError(f"Ошибка запроса свечей {ticker}: {e}")
+
+    if not candles:
+        return 0
+    return store.append(ticker, interval, pandas.DataFrame(candles))
+
+
 if __name__ == "__main__":
     fetchedData = ask_moex(ticker = "MOEX", period = "1D")
     print(fetchedData)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import numpy as np
 import pandas as pd
 import json
 import datetime
@@ -18,6 +19,91 @@ def load_data(filename: str) -> pd.DataFrame:
     print(f"Данные загружены из файла: {filename}")
     return data
 
+# Колонки цен, которые можно хранить в float32
+PRICE_COLUMNS = ['open', 'close', 'high', 'low']
+
+# Колонки времени
+TIME_COLUMNS = ['begin', 'end', 'date']
+
+# Колонки сигналов со значениями от -2 до 2
+SIGNAL_COLUMNS = ['Signal', 'Position', 'MA_Signal', 'StochRSI_Signal', 'Volume_Signal', 'Stochastic_Signal']
+
+def fits_float32(values: np.ndarray, max_decimals: int = 6) -> bool:
+    """
+    Проверяет, что цены переживают округление до float32: число знаков после
+    запятой определяется по данным, и каждое значение float32, округлённое
+    до этого числа знаков, должно совпасть с исходным.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return True
+    for decimals in range(max_decimals + 1):
+        if np.array_equal(np.round(values, decimals), values):
+            restored = values.astype(np.float32).astype(np.float64)
+            return bool(np.array_equal(np.round(restored, decimals), values))
+    return False
+
+def compact_candles(data: pd.DataFrame, float_prices: bool = None, inplace: bool = False) -> pd.DataFrame:
+    """
+    Приводит свечной фрейм к компактным типам:
+    begin/end -- datetime64 вместо строк,
+    open/close/high/low -- float32, если позволяет точность (float_prices=None),
+    volume -- наименьший целый тип.
+
+    float_prices -- True/False принудительно включает/выключает float32 для цен
+
+    Индикаторы по float32-ценам совпадают с исходными до ~1e-6, но сигналы
+    на границах (точные равенства линий) изредка могут отличаться.
+    """
+    df = data if inplace else data.copy()
+    for name in TIME_COLUMNS:
+        if name in df.columns and not pd.api.types.is_datetime64_any_dtype(df[name]):
+            df[name] = pd.to_datetime(df[name])
+    for name in PRICE_COLUMNS:
+        if name in df.columns:
+            use_float32 = float_prices if float_prices is not None else fits_float32(df[name].to_numpy())
+            if use_float32:
+                df[name] = df[name].astype(np.float32)
+    if 'volume' in df.columns:
+        volume = df['volume']
+        if pd.api.types.is_float_dtype(volume) and volume.notna().all() and (volume % 1 == 0).all():
+            volume = volume.astype(np.int64)
+        if pd.api.types.is_integer_dtype(volume):
+            df['volume'] = pd.to_numeric(volume, downcast='integer')
+    return df
+
+def compact_indicators(data: pd.DataFrame, columns=None, float32: bool = True) -> pd.DataFrame:
+    """
+    Сжимает колонки индикаторов на месте: сигналы -- int8, метки паттернов
+    (строки/False) -- category, остальные float64 -- float32 (если float32=True).
+    columns -- какие колонки обрабатывать (по умолчанию все, кроме свечных).
+    """
+    if columns is None:
+        columns = [c for c in data.columns if c not in PRICE_COLUMNS + TIME_COLUMNS + ['volume', 'value']]
+    for name in columns:
+        values = data[name]
+        if name in SIGNAL_COLUMNS and values.notna().all():
+            data[name] = values.astype(np.int8)
+        elif values.dtype == object:
+            data[name] = values.astype('category')
+        elif float32 and values.dtype == np.float64:
+            data[name] = values.astype(np.float32)
+    return data
+
+def memory_per_million(data: pd.DataFrame) -> dict:
+    """
+    Память фрейма в мегабайтах в пересчёте на миллион свечей:
+    по колонкам и итог ('total').
+    """
+    if len(data) == 0:
+        return {'total': 0.0}
+    usage = data.memory_usage(deep=True, index=False)
+    scale = 1_000_000 / len(data) / 1024 ** 2
+    report = {name: float(size * scale) for name, size in usage.items()}
+    report['total'] = float(usage.sum() * scale)
+    return report
+
 def preprocess_data(data: pd.DataFrame) -> pd.DataFrame:
     """
     Применяет предобработку к данным.
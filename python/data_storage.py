@@ -1,14 +1,19 @@
 import os
 import json
+import numpy
 import pandas as pd
 from typing import List, Dict, Any
+import _AppProjectKit as APK
+from candle_store import CandleStore, infer_interval, combine_candles, load_json_groups
+from data_preprocessor import compact_candles
+from instrumentation import instrumented
 
 # Путь к директории для хранения данных
 DATA_DIR = "storage"
 
-# Проверяем наличие директории, если она не существует — создаем
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+# Колоночное хранилище Parquet: <PARQUET_DIR>/ticker=SBER/interval=24/month=2024-11/*.parquet
+PARQUET_DIR = os.path.join(DATA_DIR, "parquet")
+
 
 def list_files(extension: str = ".json") -> List[str]:
     """
@@ -17,22 +22,36 @@ def list_files(extension: str = ".json") -> List[str]:
     """
     return [f for f in os.listdir(DATA_DIR) if f.endswith(extension)]
 
-def load_json(filename: str) -> pd.DataFrame:
+@instrumented
+def load_json(filename: str, compact: bool = False) -> pd.DataFrame:
     """
     Загружает данные из указанного JSON-файла и возвращает как DataFrame.
+    compact -- привести к компактным типам (datetime64, float32-цены, см. compact_candles).
     """
     filepath = os.path.join(DATA_DIR, filename)
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Файл {filename} не найден в директории {DATA_DIR}.")
     
     data = pd.read_json(filepath)
+    if compact:
+        data = compact_candles(data, inplace=True)
     print(f"Данные загружены из файла: {filename}")
     return data
 
+@instrumented
+def load_candles(ticker: str, interval: int, start=None, end=None) -> pd.DataFrame:
+    """
+    Загружает свечи тикера из колоночного хранилища (memory-mapped, без разбора JSON).
+    start/end ограничивают диапазон по времени.
+    """
+    return CandleStore().read_frame(ticker, interval, start, end)
+
+@instrumented
 def save_json(data: pd.DataFrame, filename: str) -> None:
     """
     Сохраняет переданный DataFrame в JSON-файл с указанным именем.
     """
+    os.makedirs(DATA_DIR, exist_ok=True)
     filepath = os.path.join(DATA_DIR, filename)
     data.to_json(filepath, indent=4, force_ascii=False)
     print(f"Данные сохранены в файл: {filename}")
@@ -48,6 +67,7 @@ def delete_file(filename: str) -> None:
     else:
         print(f"Файл {filename} не найден.")
 
+@instrumented
 def load_all_json() -> List[Dict[str, Any]]:
     """
     Загружает все JSON-файлы из директории DATA_DIR и возвращает их содержимое.
@@ -61,4 +81,128 @@ def load_all_json() -> List[Dict[str, Any]]:
             all_data.append({file: data})
     return all_data
 
+def _pyarrow():
+    """Ленивый импорт pyarrow: он нужен только для Parquet."""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError:
+        raise APK.ApplicationError("Для хранилища Parquet нужен pyarrow: pip install pyarrow")
+    return pyarrow
+
+def _partitioning(pa):
+    schema = pa.schema([('ticker', pa.string()), ('interval', pa.int32()), ('month', pa.string())])
+    return pa.dataset.partitioning(schema, flavor="hive")
+
+@instrumented
+def save_parquet(data: pd.DataFrame, ticker: str, interval: int = None, root: str = None) -> None:
+    """
+    Сохраняет свечи тикера в Parquet с разбиением ticker/interval/month.
+    Месяцы, попавшие в data, переписываются целиком, поэтому уже сохранённые
+    свечи этих месяцев сначала читаются и объединяются с data (combine_candles,
+    при совпадении begin побеждает data): сохранение части месяца, например
+    свечей за сегодня, дополняет историю, а не стирает её. Остальные месяцы
+    не трогаются.
+    interval -- код интервала MOEX; по умолчанию определяется по шагу begin.
+    """
+    pa = _pyarrow()
+    if 'begin' not in data.columns:
+        raise APK.InvalidInputError("Data does not contain 'begin' column.")
+    root = root or PARQUET_DIR
+    ticker = ticker.upper()
+    frame = data.copy()
+    frame['begin'] = pd.to_datetime(frame['begin'])
+    interval = interval if interval is not None else infer_interval(frame['begin'])
+    if not frame.empty and ticker in list_parquet_tickers(root):
+        existing = load_parquet(ticker, interval=interval, root=root,
+                                start=frame['begin'].min().to_period('M').start_time,
+                                end=frame['begin'].max().to_period('M').end_time)
+        if not existing.empty:
+            frame = combine_candles([existing, frame])
+    frame = frame.sort_values('begin', kind='stable')
+    frame['ticker'] = ticker
+    frame['interval'] = interval
+    # Метка месяца через numpy: dt.strftime на миллионе свечей занимает секунды
+    months, codes = numpy.unique(frame['begin'].to_numpy().astype('datetime64[M]'), return_inverse=True)
+    frame['month'] = months.astype(str)[codes]
+    pa.dataset.write_dataset(pa.Table.from_pandas(frame, preserve_index=False), root,
+                             format="parquet", partitioning=_partitioning(pa),
+                             existing_data_behavior="delete_matching",
+                             basename_template="part-{i}.parquet")
+
+@instrumented
+def load_parquet(ticker: str = None, columns: List[str] = None, start=None, end=None,
+                 interval: int = None, root: str = None) -> pd.DataFrame:
+    """
+    Загружает свечи из Parquet. Читаются только нужные колонки и только
+    файлы месяцев из диапазона [start, end]; внутри файлов строки
+    отсекаются по статистикам групп строк.
+
+    Аргументы:
+    ticker -- тикер (по умолчанию все, тогда в результат добавляется колонка ticker)
+    columns -- список колонок (по умолчанию все колонки свечей)
+    start, end -- границы по begin включительно
+    """
+    pa = _pyarrow()
+    root = root or PARQUET_DIR
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"Хранилище Parquet {root} не найдено.")
+    dataset = pa.dataset.dataset(root, format="parquet", partitioning=_partitioning(pa))
+
+    field = pa.dataset.field
+    conditions = []
+    if ticker is not None:
+        conditions.append(field('ticker') == ticker.upper())
+    if interval is not None:
+        conditions.append(field('interval') == interval)
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions += [field('month') >= start.strftime('%Y-%m'), field('begin') >= start.to_datetime64()]
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions += [field('month') <= end.strftime('%Y-%m'), field('begin') <= end.to_datetime64()]
+    condition = None
+    for item in conditions:
+        condition = item if condition is None else condition & item
+
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name not in ('ticker', 'interval', 'month')]
+        if ticker is None:
+            columns.append('ticker')
+    data = dataset.to_table(columns=list(columns), filter=condition).to_pandas()
+    if 'begin' in data.columns:
+        data = data.sort_values(['ticker', 'begin'] if 'ticker' in data.columns else 'begin',
+                                kind='stable', ignore_index=True)
+    return data
+
+def list_parquet_tickers(root: str = None) -> List[str]:
+    """
+    Перечисляет тикеры, сохранённые в хранилище Parquet.
+    """
+    root = root or PARQUET_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(name.split("=", 1)[1] for name in os.listdir(root) if name.startswith("ticker="))
+
+def convert_json_to_parquet(root: str = None, data_dir: str = DATA_DIR) -> List[str]:
+    """
+    Переносит все выгрузки data_dir (см. candle_store.JSON_NAME) в хранилище Parquet.
+
+    Каждый файл — выгрузка части истории тикера, поэтому файлы группируются
+    по (тикер, интервал) и объединяются без повторов (более поздний файл
+    побеждает) перед одной записью на группу; save_parquet дополняет уже
+    сохранённые месяцы.
+    Файлы без свечей или с неопределимым интервалом (меньше двух свечей)
+    пропускаются с сообщением.
+    Возвращает список перенесённых файлов.
+    """
+    root = root or PARQUET_DIR
+    groups, skipped = load_json_groups(data_dir)
+    for filename, reason in skipped:
+        print(f"Файл {filename} пропущен: {reason}")
 
+    converted = []
+    for (ticker, interval), parts in groups.items():
+        save_parquet(combine_candles([frame for _, frame in parts]), ticker, interval, root=root)
+        converted += [filename for filename, _ in parts]
+    return converted
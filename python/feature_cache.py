@@ -0,0 +1,278 @@
+"""
+Персистентный кэш рассчитанных индикаторов.
+
+Запись кэша определяется тикером, интервалом, именем индикатора и его
+параметрами; её содержимое действительно, пока совпадает отпечаток
+входного фрейма. Если к фрейму лишь дописали свечи, кэш дорасчитывает
+только хвост (с запасом lookback свечей для прогрева окна).
+Размер кэша ограничен, лишние записи вытесняются по LRU.
+
+Хвост совпадает с полным пересчётом точно для оконных индикаторов.
+Рекурсивные сглаживания (EMA, Уайлдер) помнят всю историю, поэтому для них
+хвост верен лишь приближённо: погрешность убывает как (1 - alpha)^lookback.
+cached_enrich берёт прогрев из графа индикаторов (indicator_graph.warmup,
+для EMA — с точностью EWM_TOLERANCE), а индикаторы, зависящие от всей
+истории (позиция Боллинджера, статические уровни объёма), пересчитывает целиком.
+"""
+import hashlib
+import json
+import os
+import time
+import numpy
+import pandas
+import _AppProjectKit as APK
+import indicator_graph as graph
+
+
+# Путь к директории для хранения данных
+DATA_DIR = "storage"
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+
+def frame_fingerprint(frame: pandas.DataFrame, rows: int = None) -> str:
+    """
+    Отпечаток содержимого фрейма (или его первых rows строк):
+    хэш имён колонок и байтов их значений. Колонки не числовых типов
+    (object, category, даты с часовым поясом) хэшируются по значениям через
+    hash_pandas_object, чтобы отпечаток не зависел от адресов объектов
+    и совпадал между процессами.
+    """
+    if rows is not None:
+        frame = frame.iloc[:rows]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(len(frame)).encode())
+    for name in frame.columns:
+        values = frame[name]
+        digest.update(str(name).encode())
+        if not (isinstance(values.dtype, numpy.dtype) and values.dtype.kind in 'biufcmM'):
+            values = pandas.util.hash_pandas_object(values, index=False)
+        digest.update(numpy.ascontiguousarray(values.to_numpy()).tobytes())
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    Кэш индикаторов на диске с LRU-вытеснением.
+
+    Аргументы:
+    root -- директория кэша
+    max_bytes -- предельный суммарный размер файлов кэша
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = 512 * 1024 ** 2):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.counters = {'hits': 0, 'misses': 0, 'extensions': 0, 'evictions': 0}
+        self._index_path = os.path.join(root, "index.json")
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        if not os.path.exists(self._index_path):
+            return {}
+        with open(self._index_path, 'r', encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_index(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._index_path + ".tmp", 'w', encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(self._index_path + ".tmp", self._index_path)
+
+    @staticmethod
+    def make_key(ticker: str, interval: int, indicator: str, params: dict) -> str:
+        description = json.dumps([ticker.upper(), interval, indicator, params or {}],
+                                 sort_keys=True, default=str)
+        return hashlib.blake2b(description.encode(), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.pkl")
+
+    def _read(self, key: str):
+        self._index[key]['last_used'] = time.time()
+        return pandas.read_pickle(self._path(key))
+
+    def _write(self, key: str, value, rows: int, fingerprint: str, description: dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        pandas.to_pickle(value, self._path(key))
+        self._index[key] = {**description, 'rows': rows, 'fingerprint': fingerprint,
+                            'bytes': os.path.getsize(self._path(key)), 'last_used': time.time()}
+        self._evict(keep=key)
+        self._save_index()
+
+    def _evict(self, keep: str = None) -> None:
+        """Удаляет давно не использованные записи, пока кэш не влезет в max_bytes."""
+        total = sum(entry['bytes'] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._index[key]['bytes']
+            self.invalidate(key)
+            self.counters['evictions'] += 1
+
+    def invalidate(self, key: str) -> None:
+        """Удаляет запись из кэша."""
+        self._index.pop(key, None)
+        if os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+    def get(self, ticker: str, interval: int, frame: pandas.DataFrame, indicator: str,
+            params: dict, fingerprint: str = None):
+        """Результат из кэша для точно такого же фрейма или None (промах)."""
+        key = self.make_key(ticker, interval, indicator, params)
+        entry = self._index.get(key)
+        fingerprint = fingerprint or frame_fingerprint(frame)
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            try:
+                value = self._read(key)
+                self.counters['hits'] += 1
+                return value
+            except (OSError, EOFError, ValueError):
+                # Повреждённая или удалённая вручную запись
+                self.invalidate(key)
+        self.counters['misses'] += 1
+        return None
+
+    def put(self, ticker: str, interval: int, frame: pandas.DataFrame, indicator: str,
+            params: dict, value, fingerprint: str = None) -> None:
+        """Сохраняет результат индикатора для фрейма."""
+        if len(value) != len(frame):
+            raise APK.InvalidInputError(f"Индикатор {indicator} вернул {len(value)} строк вместо {len(frame)}.")
+        key = self.make_key(ticker, interval, indicator, params)
+        description = {'ticker': ticker.upper(), 'interval': interval, 'indicator': indicator}
+        self._write(key, value, len(frame), fingerprint or frame_fingerprint(frame), description)
+
+    def get_prefix(self, ticker: str, interval: int, frame: pandas.DataFrame, indicator: str,
+                   params: dict, fingerprints: dict = None):
+        """
+        Результат, сохранённый для начала фрейма, если к нему лишь дописали свечи:
+        пара (число строк в кэше, значение) или None.
+
+        fingerprints -- общий словарь {rows: отпечаток} для нескольких вызовов
+        по одному фрейму, чтобы не хэшировать одно и то же начало повторно.
+        """
+        key = self.make_key(ticker, interval, indicator, params)
+        entry = self._index.get(key)
+        if entry is None or entry['rows'] >= len(frame):
+            return None
+        fingerprints = {} if fingerprints is None else fingerprints
+        if entry['rows'] not in fingerprints:
+            fingerprints[entry['rows']] = frame_fingerprint(frame, entry['rows'])
+        if fingerprints[entry['rows']] != entry['fingerprint']:
+            return None
+        try:
+            value = self._read(key)
+        except (OSError, EOFError, ValueError):
+            self.invalidate(key)
+            return None
+        # Промах превратился в дорасчёт хвоста
+        self.counters['misses'] -= 1
+        self.counters['extensions'] += 1
+        return entry['rows'], value
+
+    def get_or_compute(self, ticker: str, interval: int, frame: pandas.DataFrame,
+                       indicator: str, params: dict, compute, lookback: int = None):
+        """
+        Возвращает результат compute(frame) из кэша или рассчитывает и сохраняет его.
+
+        Аргументы:
+        compute -- функция фрейма, возвращающая Series/DataFrame той же длины
+        lookback -- сколько предыдущих свечей нужно индикатору для прогрева окна;
+                    если задан и к фрейму только дописали свечи, пересчитывается
+                    лишь хвост. None — всегда полный пересчёт при изменении.
+                    Для рекурсивных сглаживаний (EMA, Уайлдер) хвост приближённый,
+                    lookback выбирается под нужную точность (см. описание модуля).
+        """
+        fingerprint = frame_fingerprint(frame)
+        value = self.get(ticker, interval, frame, indicator, params, fingerprint)
+        if value is not None:
+            return value
+
+        prefix = None
+        if lookback is not None:
+            prefix = self.get_prefix(ticker, interval, frame, indicator, params)
+        if prefix is not None:
+            rows, cached = prefix
+            start = max(0, rows - lookback)
+            tail = compute(frame.iloc[start:]).iloc[rows - start:]
+            value = pandas.concat([cached, tail])
+            self.put(ticker, interval, frame, indicator, params, value, fingerprint)
+            return value
+
+        value = compute(frame)
+        self.put(ticker, interval, frame, indicator, params, value, fingerprint)
+        return value
+
+    def flush(self) -> None:
+        """Сохраняет индекс (время использования записей) на диск."""
+        self._save_index()
+
+    def stats(self) -> dict:
+        """Счётчики попаданий, промахов, дорасчётов и вытеснений и размер кэша."""
+        return {**self.counters,
+                'entries': len(self._index),
+                'bytes': sum(entry['bytes'] for entry in self._index.values())}
+
+    def clear(self) -> None:
+        for key in list(self._index):
+            self.invalidate(key)
+        self._save_index()
+
+
+def cached_enrich(frame: pandas.DataFrame, ticker: str, interval: int, indicators: dict = None,
+                  cache: FeatureCache = None) -> pandas.DataFrame:
+    """
+    graph.enrich с кэшем: каждый индикатор берётся из кэша по (тикер, интервал,
+    отпечаток фрейма, параметры), а все промахи считаются одним проходом по графу.
+
+    Если к фрейму лишь дописали свечи, индикаторы с конечным прогревом
+    (indicator_graph.indicator_warmup) считаются только по хвосту фрейма
+    и приклеиваются к сохранённому началу; зависящие от всей истории
+    пересчитываются целиком.
+    """
+    cache = cache or FeatureCache()
+    graph.load_indicators()
+    if indicators is None:
+        indicators = {name: None for name in graph.INDICATORS}
+
+    fingerprint = frame_fingerprint(frame)
+    values, missing, prefixes, fingerprints = {}, {}, {}, {}
+    for name, params in indicators.items():
+        full_params = {**graph.INDICATORS[name][1], **(params or {})}
+        value = cache.get(ticker, interval, frame, name, full_params, fingerprint)
+        if value is not None:
+            values[name] = value
+            continue
+        missing[name] = full_params
+        lookback = graph.indicator_warmup(name, full_params)
+        prefix = None
+        if lookback is not None:
+            prefix = cache.get_prefix(ticker, interval, frame, name, full_params, fingerprints)
+        if prefix is not None:
+            prefixes[name] = (prefix[0] - lookback, *prefix)
+
+    if missing:
+        # Общий проход по графу начинается с самой ранней нужной свечи
+        start = 0
+        if len(prefixes) == len(missing):
+            start = max(0, min(first for first, _, _ in prefixes.values()))
+        source = frame.iloc[start:]
+        outputs = {name: graph.build_plan({name: params})[0] for name, params in missing.items()}
+        _, order = graph.build_plan(missing)
+        computed = graph.evaluate(source, order)
+        for name, columns in outputs.items():
+            value = pandas.DataFrame({column: computed[item] for column, item in columns.items()},
+                                     index=source.index)
+            if name in prefixes:
+                _, rows, cached = prefixes[name]
+                value = pandas.concat([cached, value.iloc[rows - start:]])
+            values[name] = value
+            cache.put(ticker, interval, frame, name, missing[name], values[name], fingerprint)
+    cache.flush()
+
+    result = frame.copy()
+    for name in indicators:
+        for column in values[name].columns:
+            result[column] = values[name][column]
+    return result
@@ -0,0 +1,267 @@
+"""
+Общий граф вычисления индикаторов.
+
+Модули индикаторов описывают свои выходные колонки как узлы графа над
+общими промежуточными величинами (diff(close), rolling_mean(close, n),
+ewm(close, span) ...). Движок собирает узлы всех запрошенных индикаторов
+в один DAG, вычисляет каждый промежуточный узел один раз на фрейм и
+раздаёт его всем потребителям.
+
+Узел — кортеж (операция, входные узлы, параметры), поэтому одинаковые
+вычисления из разных модулей дают равные ключи и совпадают в графе.
+"""
+import importlib
+import math
+import time
+import pandas
+import _AppProjectKit as APK
+from instrumentation import instrumented
+from data_preprocessor import compact_indicators
+
+
+# Операции графа: имя -> функция(*входные ряды, **параметры)
+OPERATIONS = {}
+
+# Прогрев операций: имя -> сколько предыдущих свечей нужно для значения
+# (число или функция параметров); None — значение зависит от всей истории
+WARMUP = {}
+
+# Допустимая относительная погрешность EMA, посчитанной по хвосту фрейма
+# вместо всей истории: вклад отброшенных свечей убывает как (1 - alpha)^n
+EWM_TOLERANCE = 1e-12
+
+# Индикаторы: имя -> (функция(**параметры) -> {колонка: узел}, параметры по умолчанию)
+INDICATORS = {}
+
+# Модули, регистрирующие индикаторы при импорте
+INDICATOR_MODULES = ['rsi_call', 'moving_averages', 'bollinger_strategy',
+                     'Stochastic_RSI', 'candlestick_patterns', 'volume']
+
+
+def register_operation(name: str, warmup=0):
+    """
+    Декоратор, регистрирующий операцию графа.
+
+    warmup -- сколько предыдущих значений входов нужно операции: число,
+    функция параметров узла или None, если результат зависит от всей
+    истории (тогда индикатор при дописывании свечей пересчитывается целиком).
+    """
+    def decorator(function):
+        OPERATIONS[name] = function
+        WARMUP[name] = warmup
+        return function
+    return decorator
+
+
+def register_indicator(name: str, **defaults):
+    """
+    Декоратор, регистрирующий индикатор. Функция принимает параметры
+    индикатора и возвращает словарь {выходная колонка: узел}.
+    """
+    def decorator(function):
+        INDICATORS[name] = (function, defaults)
+        return function
+    return decorator
+
+
+def node(operation: str, *inputs, **params) -> tuple:
+    """Создаёт узел графа. Строковые входы означают колонки фрейма."""
+    inputs = tuple(column(i) if isinstance(i, str) else i for i in inputs)
+    return (operation, inputs, tuple(sorted(params.items())))
+
+
+def column(name: str) -> tuple:
+    return ('column', (), (('name', name),))
+
+
+# Базовые промежуточные величины
+def diff(source) -> tuple:
+    return node('diff', source)
+
+def gain(source) -> tuple:
+    return node('gain', source)
+
+def loss(source) -> tuple:
+    return node('loss', source)
+
+def pct_change(source) -> tuple:
+    return node('pct_change', source)
+
+def shift(source, periods: int = 1) -> tuple:
+    return node('shift', source, periods=periods)
+
+def rolling_mean(source, window: int, min_periods: int = None) -> tuple:
+    return node('rolling_mean', source, window=window, min_periods=min_periods)
+
+def rolling_std(source, window: int) -> tuple:
+    return node('rolling_std', source, window=window)
+
+def rolling_min(source, window: int) -> tuple:
+    return node('rolling_min', source, window=window)
+
+def rolling_max(source, window: int) -> tuple:
+    return node('rolling_max', source, window=window)
+
+def ewm(source, span: int) -> tuple:
+    return node('ewm', source, span=span)
+
+
+def ewm_warmup(span: int) -> int:
+    """Число свечей, после которых EMA забывает начальное значение с точностью EWM_TOLERANCE."""
+    return math.ceil(math.log(EWM_TOLERANCE) / math.log(1 - 2 / (span + 1)))
+
+
+def _window_warmup(window: int, **params) -> int:
+    return window - 1
+
+
+register_operation('diff', warmup=1)(lambda s: s.diff())
+register_operation('gain')(lambda s: s.where(s > 0, 0))
+register_operation('loss')(lambda s: s.where(s < 0, 0).abs())
+register_operation('pct_change', warmup=1)(lambda s: s.pct_change())
+register_operation('shift', warmup=lambda periods: periods)(lambda s, periods: s.shift(periods))
+register_operation('rolling_mean', warmup=_window_warmup)(lambda s, window, min_periods: s.rolling(window=window, min_periods=min_periods).mean())
+register_operation('rolling_std', warmup=_window_warmup)(lambda s, window: s.rolling(window=window).std())
+register_operation('rolling_min', warmup=_window_warmup)(lambda s, window: s.rolling(window=window).min())
+register_operation('rolling_max', warmup=_window_warmup)(lambda s, window: s.rolling(window=window).max())
+register_operation('ewm', warmup=ewm_warmup)(lambda s, span: s.ewm(span=span, adjust=False).mean())
+
+
+def load_indicators() -> None:
+    """Импортирует модули индикаторов, чтобы они зарегистрировались."""
+    for module in INDICATOR_MODULES:
+        importlib.import_module(module)
+
+
+def build_plan(indicators: dict) -> tuple:
+    """
+    Строит план вычислений.
+
+    Аргументы:
+    indicators -- {имя индикатора: словарь параметров или None}
+
+    Возвращает:
+    (outputs, order): outputs — {колонка: узел}, order — уникальные узлы
+    в топологическом порядке (входы раньше потребителей).
+    """
+    outputs = {}
+    for name, params in indicators.items():
+        if name not in INDICATORS:
+            raise APK.InvalidInputError(f"Неизвестный индикатор: {name}")
+        function, defaults = INDICATORS[name]
+        outputs.update(function(**{**defaults, **(params or {})}))
+
+    order, visited = [], set()
+
+    def visit(item):
+        if item in visited:
+            return
+        visited.add(item)
+        for source in item[1]:
+            visit(source)
+        order.append(item)
+
+    for item in outputs.values():
+        visit(item)
+    return outputs, order
+
+
+def warmup(item: tuple):
+    """
+    Сколько предыдущих свечей нужно узлу, чтобы его значение на хвосте фрейма
+    совпало со значением на всей истории (для EMA — с точностью EWM_TOLERANCE).
+    None — узел зависит от всей истории.
+    """
+    operation, inputs, params = item
+    if operation == 'column':
+        return 0
+    own = WARMUP.get(operation)
+    if callable(own):
+        own = own(**dict(params))
+    if own is None:
+        return None
+    sources = [warmup(source) for source in inputs]
+    if None in sources:
+        return None
+    return own + max(sources, default=0)
+
+
+def indicator_warmup(name: str, params: dict = None):
+    """Прогрев индикатора — максимум по его выходным колонкам (None — вся история)."""
+    outputs, _ = build_plan({name: params})
+    sources = [warmup(item) for item in outputs.values()]
+    return None if None in sources else max(sources, default=0)
+
+
+def evaluate(frame: pandas.DataFrame, order: list) -> dict:
+    """Вычисляет узлы плана по порядку, каждый ровно один раз."""
+    cache = {}
+    for operation, inputs, params in order:
+        key = (operation, inputs, params)
+        if operation == 'column':
+            cache[key] = frame[dict(params)['name']]
+            continue
+        if operation not in OPERATIONS:
+            raise APK.InvalidInputError(f"Неизвестная операция графа: {operation}")
+        cache[key] = OPERATIONS[operation](*(cache[i] for i in inputs), **dict(params))
+    return cache
+
+
+@instrumented
+def enrich(frame: pandas.DataFrame, indicators: dict = None, inplace: bool = False,
+           compact: bool = False) -> pandas.DataFrame:
+    """
+    Добавляет во фрейм колонки всех запрошенных индикаторов за один проход по графу.
+
+    Аргументы:
+    frame -- свечной фрейм (open, high, low, close, volume)
+    indicators -- {имя: параметры}; по умолчанию все зарегистрированные с параметрами по умолчанию
+    inplace -- писать колонки прямо в frame вместо копии
+    compact -- сигналы в int8, метки паттернов в category, значения в float32
+    """
+    load_indicators()
+    if indicators is None:
+        indicators = {name: None for name in INDICATORS}
+
+    outputs, order = build_plan(indicators)
+    cache = evaluate(frame, order)
+
+    result = frame if inplace else frame.copy()
+    for name, item in outputs.items():
+        result[name] = cache[item]
+    if compact:
+        compact_indicators(result, list(outputs))
+    return result
+
+
+if __name__ == "__main__":
+    import numpy
+    # Модули индикаторов регистрируются в импортируемом модуле, а не в __main__
+    import indicator_graph as engine
+
+    # Сравнение: отдельные вызовы модулей против общего графа
+    from rsi_call import current_rsi_call
+    from moving_averages import current_ma_analysis
+    from bollinger_strategy import calculate_bollinger_bands, generate_signals
+    from Stochastic_RSI import calculate_stochastic_rsi
+
+    rng = numpy.random.default_rng(0)
+    close = 100 * numpy.exp(numpy.cumsum(rng.normal(0, 0.01, size=1_000_000)))
+    data = pandas.DataFrame({'close': close})
+    indicators = {'RSI': {'candle_frame': 14}, 'MA': None, 'Bollinger': None, 'StochRSI': None}
+
+    started = time.perf_counter()
+    current_rsi_call(data, 14)
+    current_ma_analysis(data)
+    generate_signals(calculate_bollinger_bands(data.copy()))
+    calculate_stochastic_rsi(data)
+    separate = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine.load_indicators()
+    outputs, order = engine.build_plan(indicators)
+    engine.enrich(data, indicators)
+    shared = time.perf_counter() - started
+
+    print(f"Отдельные вызовы: {separate:.3f} с")
+    print(f"Общий граф: {shared:.3f} с ({len(order)} узлов на {len(outputs)} колонок)")
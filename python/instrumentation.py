@@ -0,0 +1,215 @@
+"""
+Лёгкая инструментовка горячих путей.
+
+Декоратор instrumented и контекстный менеджер timed записывают по каждому
+вызову время, число обработанных строк, строк в секунду и (если включено
+отслеживание памяти) пиковый объём выделенной памяти.
+
+Включается переменными окружения:
+    TRADEBOT_INSTRUMENT=1   -- сбор статистики и сводка при выходе из процесса
+    TRADEBOT_PROFILE=<dir>  -- дополнительно cProfile и tracemalloc; при выходе
+                               в <dir> сохраняются <pid>.prof и <pid>.snapshot
+или вызовом enable(). В выключенном состоянии обёртка делает одну проверку
+флага и сразу вызывает функцию.
+"""
+import atexit
+import cProfile
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class _State:
+    enabled = False
+    memory = False
+    profiler = None
+    profile_dir = None
+    exit_report = False
+
+
+_state = _State()
+_lock = threading.Lock()
+_local = threading.local()
+
+# Статистика: имя -> {calls, seconds, max_seconds, rows, peak_bytes}
+STATS = {}
+
+
+def enable(memory: bool = False, profile_dir: str = None, report_at_exit: bool = True) -> None:
+    """
+    Включает сбор статистики.
+
+    Аргументы:
+    memory -- отслеживать пиковую память вызовов через tracemalloc
+    profile_dir -- включить cProfile и сохранить профили в эту директорию при выходе
+    report_at_exit -- напечатать сводку при завершении процесса
+    """
+    _state.enabled = True
+    if memory or profile_dir:
+        _state.memory = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(25 if profile_dir else 1)
+    if profile_dir and _state.profiler is None:
+        _state.profile_dir = profile_dir
+        _state.profiler = cProfile.Profile()
+        _state.profiler.enable()
+    if report_at_exit and not _state.exit_report:
+        _state.exit_report = True
+        atexit.register(_at_exit)
+
+
+def disable() -> None:
+    """Выключает сбор статистики (накопленная статистика сохраняется)."""
+    _state.enabled = False
+    if _state.profiler is not None:
+        _state.profiler.disable()
+    if _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.memory = False
+
+
+def reset() -> None:
+    with _lock:
+        STATS.clear()
+
+
+def _rows(value) -> int:
+    """Число строк у DataFrame/Series/массива, иначе 0."""
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return int(shape[0])
+    return 0
+
+
+def _record(name: str, seconds: float, rows: int, peak: int) -> None:
+    with _lock:
+        entry = STATS.get(name)
+        if entry is None:
+            entry = STATS[name] = {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0, 'peak_bytes': 0}
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['max_seconds'] = max(entry['max_seconds'], seconds)
+        entry['rows'] += rows
+        entry['peak_bytes'] = max(entry['peak_bytes'], peak)
+
+
+class _Measurement:
+    """Один замер: время и пик памяти с учётом вложенных замеров."""
+
+    def __init__(self, name: str, rows: int = 0):
+        self.name = name
+        self.rows = rows
+        self.peak = 0
+
+    def __enter__(self):
+        if _state.memory:
+            stack = getattr(_local, 'stack', None)
+            if stack is None:
+                stack = _local.stack = []
+            current, peak = tracemalloc.get_traced_memory()
+            # Пик до вложенного замера принадлежит внешнему
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak - stack[-1].base)
+            tracemalloc.reset_peak()
+            self.base = current
+            stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.started
+        if _state.memory and getattr(_local, 'stack', None):
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1] - self.base)
+            _local.stack.pop()
+        _record(self.name, seconds, self.rows, self.peak)
+        return False
+
+
+def instrumented(function=None, *, name: str = None):
+    """
+    Декоратор точки входа: записывает время, строки (по первому аргументу
+    с shape, иначе по результату) и пиковую память каждого вызова.
+    """
+    def decorator(function):
+        label = name or f"{function.__module__}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return function(*args, **kwargs)
+            rows = next((_rows(arg) for arg in args if getattr(arg, 'shape', None)), 0)
+            with _Measurement(label, rows) as measurement:
+                result = function(*args, **kwargs)
+                if not measurement.rows:
+                    measurement.rows = _rows(result)
+            return result
+        return wrapper
+
+    return decorator(function) if function is not None else decorator
+
+
+@contextmanager
+def timed(name: str, rows: int = 0):
+    """Контекстный менеджер для этапа конвейера (чтение файла, вывод и т.п.)."""
+    if not _state.enabled:
+        yield None
+        return
+    with _Measurement(name, rows) as measurement:
+        yield measurement
+
+
+def report() -> list:
+    """Сводка по всем точкам, отсортированная по суммарному времени."""
+    with _lock:
+        items = [(name, dict(entry)) for name, entry in STATS.items()]
+    rows = []
+    for name, entry in sorted(items, key=lambda item: -item[1]['seconds']):
+        entry['name'] = name
+        entry['mean_seconds'] = entry['seconds'] / entry['calls']
+        entry['rows_per_s'] = entry['rows'] / entry['seconds'] if entry['seconds'] > 0 else None
+        rows.append(entry)
+    return rows
+
+
+def format_report(rows: list = None) -> str:
+    rows = report() if rows is None else rows
+    lines = [f"{'Точка':55s} {'вызовов':>8s} {'всего, с':>10s} {'среднее, мс':>12s} "
+             f"{'строк/с':>12s} {'пик, МБ':>9s}"]
+    for entry in rows:
+        speed = f"{entry['rows_per_s']:,.0f}" if entry['rows_per_s'] else "-"
+        peak = f"{entry['peak_bytes'] / 1024 ** 2:.1f}" if entry['peak_bytes'] else "-"
+        lines.append(f"{entry['name'][:55]:55s} {entry['calls']:>8d} {entry['seconds']:>10.3f} "
+                     f"{entry['mean_seconds'] * 1000:>12.3f} {speed:>12s} {peak:>9s}")
+    return "\n".join(lines)
+
+
+def dump_profiles(directory: str) -> list:
+    """Сохраняет профиль cProfile и снимок tracemalloc. Возвращает пути файлов."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    if _state.profiler is not None:
+        path = os.path.join(directory, f"{os.getpid()}.prof")
+        _state.profiler.dump_stats(path)
+        paths.append(path)
+    if tracemalloc.is_tracing():
+        path = os.path.join(directory, f"{os.getpid()}.snapshot")
+        tracemalloc.take_snapshot().dump(path)
+        paths.append(path)
+    return paths
+
+
+def _at_exit() -> None:
+    if _state.profiler is not None:
+        _state.profiler.disable()
+    if _state.profile_dir:
+        for path in dump_profiles(_state.profile_dir):
+            print(f"Профиль сохранён: {path}")
+    if STATS:
+        print(format_report())
+
+
+if os.environ.get("TRADEBOT_INSTRUMENT") or os.environ.get("TRADEBOT_PROFILE"):
+    enable(memory=bool(os.environ.get("TRADEBOT_PROFILE")), profile_dir=os.environ.get("TRADEBOT_PROFILE"))
@@ -0,0 +1,282 @@
+"""
+Событийный цикл живых сигналов.
+
+Для каждого тикера из списка наблюдения движок держит потоковые состояния
+индикаторов (streaming_indicators) и на каждую новую свечу обновляет их
+за O(1). Изменения сигналов (Signal Боллинджера, MA_Signal, StochRSI_Signal,
+Volume_Signal, Engulfing) отдаются как события APK.signalEvent.
+Время обработки каждой свечи замеряется и сравнивается с бюджетом задержки.
+
+Источник свечей — любой итерируемый поток пар (тикер, свеча): опрос ISS
+(moex_poll) или воспроизведение сохранённых данных (frame_feed).
+"""
+import json
+import os
+import sys
+import time
+from collections import deque
+import numpy
+import pandas
+import _AppProjectKit as APK
+from replay import merge
+from streaming_indicators import (
+    RSIState,
+    BollingerState,
+    MAState,
+    StochRSIState,
+    VolumeSignalState,
+    EngulfingState
+)
+
+
+# Сигналы, изменения которых отдаются как события
+EVENT_FIELDS = ('Signal', 'MA_Signal', 'StochRSI_Signal', 'Volume_Signal', 'Engulfing')
+
+
+def begin_timestamp(begin) -> pandas.Timestamp:
+    """Время свечи как pandas.Timestamp: строки разных форматов, datetime и Timestamp сравнимы."""
+    try:
+        return pandas.Timestamp(begin)
+    except (TypeError, ValueError) as e:
+        raise APK.InvalidInputError(f"Некорректное время свечи {begin!r}: {e}")
+
+
+class TickerState:
+    """Потоковые состояния всех индикаторов одного тикера."""
+
+    def __init__(self, rsi_period: int = 18):
+        self.rsi = RSIState(rsi_period)
+        self.bollinger = BollingerState()
+        self.ma = MAState()
+        self.stoch_rsi = StochRSIState()
+        self.volume = VolumeSignalState()
+        self.engulfing = EngulfingState()
+        self.last_begin = None
+        self.values = {}
+
+    def update(self, candle: dict) -> dict:
+        """Обновляет индикаторы по закрытой свече и возвращает их текущие значения."""
+        close = float(candle['close'])
+        bollinger = self.bollinger.update(close)
+        ma = self.ma.update(close)
+        stoch = self.stoch_rsi.update(close)
+        self.values = {
+            'RSI': self.rsi.update(close),
+            'Upper': bollinger['Upper'],
+            'Lower': bollinger['Lower'],
+            'Signal': bollinger['Signal'],
+            'Position': bollinger['Position'],
+            'SMA': ma['SMA'],
+            'EMA': ma['EMA'],
+            'Volatility': ma['Volatility'],
+            'MA_Signal': ma['MA_Signal'],
+            'StochRSI_K': stoch['StochRSI_K'],
+            'StochRSI_D': stoch['StochRSI_D'],
+            'StochRSI_Signal': stoch['StochRSI_Signal'],
+            'Volume_Signal': self.volume.update(close, float(candle['volume'])),
+            'Engulfing': self.engulfing.update(float(candle['open']), close),
+        }
+        self.last_begin = candle.get('begin')
+        return self.values
+
+    def snapshot(self) -> dict:
+        return {'rsi': self.rsi.snapshot(), 'bollinger': self.bollinger.snapshot(),
+                'ma': self.ma.snapshot(), 'stoch_rsi': self.stoch_rsi.snapshot(),
+                'volume': self.volume.snapshot(), 'engulfing': self.engulfing.snapshot(),
+                'last_begin': self.last_begin, 'values': self.values}
+
+    @classmethod
+    def restore(cls, state: dict) -> "TickerState":
+        ticker = cls()
+        ticker.rsi = RSIState.restore(state['rsi'])
+        ticker.bollinger = BollingerState.restore(state['bollinger'])
+        ticker.ma = MAState.restore(state['ma'])
+        ticker.stoch_rsi = StochRSIState.restore(state['stoch_rsi'])
+        ticker.volume = VolumeSignalState.restore(state['volume'])
+        ticker.engulfing = EngulfingState.restore(state['engulfing'])
+        ticker.last_begin = state['last_begin']
+        ticker.values = state['values']
+        return ticker
+
+
+class LiveEngine:
+    """
+    Движок живых сигналов.
+
+    Аргументы:
+    watchlist -- тикеры для наблюдения; свечи остальных тикеров игнорируются
+    on_event -- функция, вызываемая для каждого APK.signalEvent
+    latency_budget -- бюджет обработки одной свечи, секунды; превышения считаются
+    history -- сколько последних замеров задержки хранить
+    """
+
+    def __init__(self, watchlist, on_event=None, latency_budget: float = 0.001, history: int = 10000):
+        self.watchlist = [ticker.upper() for ticker in watchlist]
+        self.states = {ticker: TickerState() for ticker in self.watchlist}
+        self.on_event = on_event
+        self.latency_budget = latency_budget
+        self.latencies = deque(maxlen=history)
+        self.ticks = 0
+        self.over_budget = 0
+
+    def process(self, ticker: str, candle: dict) -> list:
+        """
+        Обрабатывает одну закрытую свечу. Свечи не из списка наблюдения и свечи
+        не новее последней обработанной пропускаются.
+        Возвращает список событий изменения сигналов.
+        """
+        ticker = ticker.upper()
+        state = self.states.get(ticker)
+        if state is None:
+            return []
+        begin = candle.get('begin')
+        if (begin is not None and state.last_begin is not None
+                and begin_timestamp(begin) <= begin_timestamp(state.last_begin)):
+            return []
+
+        started = time.perf_counter()
+        previous = state.values
+        values = state.update(candle)
+        changed = [name for name in EVENT_FIELDS
+                   if previous and values[name] != previous[name]
+                   or not previous and values[name] not in (0, False)]
+        latency = time.perf_counter() - started
+
+        self.ticks += 1
+        self.latencies.append(latency)
+        if latency > self.latency_budget:
+            self.over_budget += 1
+
+        events = [APK.signalEvent(ticker, begin, name, values[name], previous.get(name), latency)
+                  for name in changed]
+        if self.on_event is not None:
+            for event in events:
+                self.on_event(event)
+        return events
+
+    def run(self, feed, max_ticks: int = None) -> list:
+        """
+        Обрабатывает поток пар (тикер, свеча) до его окончания или max_ticks свечей.
+        Возвращает все события.
+        """
+        events = []
+        for processed, (ticker, candle) in enumerate(feed, 1):
+            events.extend(self.process(ticker, candle))
+            if max_ticks is not None and processed >= max_ticks:
+                break
+        return events
+
+    def latency_report(self) -> dict:
+        """Статистика задержки обработки свечи по последним замерам, микросекунды."""
+        if not self.latencies:
+            return {'ticks': 0}
+        latencies = numpy.array(self.latencies) * 1e6
+        return {
+            'ticks': self.ticks,
+            'mean_us': float(latencies.mean()),
+            'p50_us': float(numpy.percentile(latencies, 50)),
+            'p99_us': float(numpy.percentile(latencies, 99)),
+            'max_us': float(latencies.max()),
+            'budget_us': self.latency_budget * 1e6,
+            'over_budget': self.over_budget,
+        }
+
+    def values(self, ticker: str) -> dict:
+        """Текущие значения индикаторов тикера."""
+        return self.states[ticker.upper()].values
+
+    def save_state(self, filename: str) -> None:
+        """Сохраняет состояния всех тикеров в JSON для горячего перезапуска."""
+        with open(filename + ".tmp", 'w', encoding="utf-8") as f:
+            json.dump({ticker: state.snapshot() for ticker, state in self.states.items()}, f, default=str)
+        os.replace(filename + ".tmp", filename)
+
+    def load_state(self, filename: str) -> None:
+        """Восстанавливает состояния тикеров из save_state."""
+        try:
+            with open(filename, 'r', encoding="utf-8") as f:
+                states = json.load(f)
+        except FileNotFoundError:
+            raise APK.DatabaseError(f"Файл состояния {filename} не найден.")
+        for ticker, state in states.items():
+            if ticker in self.states:
+                self.states[ticker] = TickerState.restore(state)
+
+
+def _frame_source(ticker: str, frame, source: int):
+    """
+    Свечи фрейма в виде (ключ времени, номер источника, тикер, свеча) для replay.merge.
+    Ключ — begin в наносекундах; у фрейма без begin — номер строки.
+    """
+    if 'begin' in frame.columns:
+        begin = frame['begin']
+        if not pandas.api.types.is_datetime64_any_dtype(begin):
+            begin = pandas.to_datetime(begin, format='mixed')
+        keys = begin.to_numpy(dtype='datetime64[ns]').astype('<i8')
+    else:
+        keys = numpy.arange(len(frame))
+    order = numpy.argsort(keys, kind='stable')
+    records = frame.to_dict('records')
+    for i in order.tolist():
+        yield int(keys[i]), source, ticker, records[i]
+
+
+def frame_feed(frames: dict):
+    """
+    Воспроизводит сохранённые свечи: {тикер: DataFrame} -> пары (тикер, свеча)
+    в порядке begin (при равенстве — в порядке тикеров). Время сравнивается
+    как Timestamp, поэтому строки разных форматов упорядочиваются верно;
+    фреймы без begin идут в порядке строк.
+    """
+    yield from merge([_frame_source(ticker, frame, source)
+                      for source, (ticker, frame) in enumerate(frames.items())])
+
+
+def print_fetch_error(ticker: str, error: Exception) -> None:
+    print(f"Ошибка загрузки {ticker}: {error}", file=sys.stderr)
+
+
+def moex_poll(fetcher, watchlist, interval: int = 10, start: str = None, poll_interval: float = 60.0,
+              on_error=print_fetch_error):
+    """
+    Опрашивает ISS и отдаёт новые закрытые свечи.
+
+    Последняя свеча в ответе ISS ещё формируется, поэтому свеча отдаётся
+    только когда у тикера появилась следующая. Генератор бесконечный.
+    Ошибки загрузки тикера передаются в on_error(ticker, ошибка), и тикер
+    повторно запрашивается на следующем опросе; on_error=None — поднять ошибку.
+    """
+    pending = {}
+    since = {(ticker, interval): start for ticker in watchlist}
+    while True:
+        for (ticker, _), result in fetcher.iter_fetch(list(since), interval, since):
+            if isinstance(result, APK.DatabaseError):
+                if on_error is None:
+                    raise result
+                on_error(ticker, result)
+                continue
+            if result.empty:
+                continue
+            candles = result.to_dict('records')
+            if (ticker in pending and begin_timestamp(pending[ticker]['begin'])
+                    < begin_timestamp(candles[0]['begin'])):
+                candles.insert(0, pending[ticker])
+            for candle in candles[:-1]:
+                yield ticker, candle
+            pending[ticker] = candles[-1]
+            since[(ticker, interval)] = candles[-1]['begin']
+        time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    from moex_fetcher import MoexFetcher
+
+    def print_event(event):
+        print(event)
+
+    engine = LiveEngine(["SBER", "GAZP", "LKOH"], on_event=print_event)
+    with MoexFetcher() as fetcher:
+        try:
+            engine.run(moex_poll(fetcher, engine.watchlist, 10))
+        except KeyboardInterrupt:
+            print(engine.latency_report())
@@ -0,0 +1,234 @@
+"""
+Параллельная загрузка свечей MOEX ISS для списка тикеров.
+
+Все запросы идут через одну requests.Session с пулом keep-alive соединений,
+число одновременных запросов ограничено размером пула потоков.
+"""
+import sys
+import time
+import requests
+import pandas
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+import _AppProjectKit as APK
+from candle_store import CandleStore
+
+
+ISS_URL = "https://iss.moex.com/iss"
+CANDLES_PATH = "/engines/{engine}/markets/{market}/boards/{board}/securities/{ticker}/candles.json"
+CANDLES_COLUMNS = ("begin", "open", "close", "high", "low", "value", "volume")
+
+# ISS отдаёт свечи страницами не более чем по 500 строк
+PAGE_SIZE = 500
+
+# Ответы, после которых имеет смысл повторить запрос
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Допустимые значения аргумента errors
+ERROR_MODES = ("raise", "skip")
+
+# Ошибки записи свечей в хранилище: некорректные свечи (APK, разбор begin
+# и чисел в to_columns) и ввод-вывод файлов колонок
+STORE_ERRORS = (APK.ApplicationError, ValueError, TypeError, OSError)
+
+
+def print_error(key: tuple, error: Exception) -> None:
+    """Обработчик on_error по умолчанию: печатает пропущенный тикер в stderr."""
+    print(f"Ошибка {key[0]} ({key[1]}): {error}", file=sys.stderr)
+
+
+class MoexFetcher:
+    """
+    Загрузчик свечей с общим пулом соединений и ограниченным параллелизмом.
+
+    Аргументы:
+    base_url -- адрес ISS (в тестах — локальная заглушка)
+    max_workers -- максимальное число одновременных запросов
+    timeout -- тайм-аут одного HTTP-запроса, секунды
+    retries -- число повторов при сетевых ошибках и ответах 429/5xx
+    backoff -- начальная пауза между повторами, удваивается с каждой попыткой
+    """
+
+    def __init__(self, base_url: str = ISS_URL, max_workers: int = 8, timeout: float = 10.0,
+                 retries: int = 3, backoff: float = 0.5,
+                 board: str = "TQBR", market: str = "shares", engine: str = "stock"):
+        if max_workers < 1:
+            raise APK.InvalidInputError("max_workers must be positive")
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.board = board
+        self.market = market
+        self.engine = engine
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _get(self, url: str, params: dict) -> dict:
+        """GET с повторами и экспоненциальной паузой."""
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = requests.exceptions.HTTPError(f"HTTP {response.status_code}", response=response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            except requests.exceptions.RequestException as e:
+                raise APK.DatabaseError(f"Ошибка запроса {url}: {e}")
+
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt)
+        raise APK.DatabaseError(f"Ошибка запроса {url} после {self.retries + 1} попыток: {error}")
+
+    def fetch_candles(self, ticker: str, interval: int = 10, start: str = None,
+                      end: str = None) -> pandas.DataFrame:
+        """
+        Загружает все свечи тикера за интервал дат (постранично).
+        Колонки совпадают с apimoex.get_board_candles.
+        """
+        url = self.base_url + CANDLES_PATH.format(engine=self.engine, market=self.market,
+                                                  board=self.board, ticker=ticker)
+        params = {
+            'interval': interval,
+            'iss.meta': 'off',
+            'iss.only': 'candles',
+            'candles.columns': ','.join(CANDLES_COLUMNS),
+        }
+        if start is not None:
+            params['from'] = start
+        if end is not None:
+            params['till'] = end
+
+        rows = []
+        columns = list(CANDLES_COLUMNS)
+        offset = 0
+        while True:
+            params['start'] = offset
+            block = self._get(url, params)['candles']
+            columns = block['columns']
+            rows.extend(block['data'])
+            if len(block['data']) < PAGE_SIZE:
+                break
+            offset += len(block['data'])
+        return pandas.DataFrame(rows, columns=columns)
+
+    def iter_fetch(self, jobs, interval: int = 10, start: str = None, end: str = None):
+        """
+        Загружает свечи параллельно и отдаёт результаты по мере готовности.
+
+        jobs -- список тикеров или пар (ticker, interval); для тикеров без
+        интервала используется interval. start может быть строкой или словарём
+        {(ticker, interval): start} — для инкрементальной догрузки.
+
+        Генерирует пары ((ticker, interval), DataFrame | APK.DatabaseError).
+        Любая ошибка загрузки тикера (в том числе разбора неожиданного ответа ISS)
+        отдаётся как APK.DatabaseError и не прерывает остальные загрузки.
+        """
+        keys = [job if isinstance(job, tuple) else (job, interval) for job in jobs]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            for key in keys:
+                key_start = start.get(key) if isinstance(start, dict) else start
+                futures[pool.submit(self.fetch_candles, key[0], key[1], key_start, end)] = key
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except APK.DatabaseError as e:
+                    yield futures[future], e
+                except Exception as e:
+                    ticker, key_interval = futures[future]
+                    yield futures[future], APK.DatabaseError(
+                        f"Некорректный ответ ISS для {ticker} ({key_interval}): {type(e).__name__}: {e}")
+
+    def fetch_many(self, jobs, interval: int = 10, start: str = None, end: str = None,
+                   errors: str = "raise", on_error=print_error) -> dict:
+        """
+        Загружает свечи для всех jobs и возвращает словарь {(ticker, interval): DataFrame}.
+
+        errors -- "raise": после загрузки остальных выбросить APK.DatabaseError
+        со списком неудачных тикеров; "skip": пропустить их, передав каждую
+        ошибку в on_error((ticker, interval), ошибка) (по умолчанию — печать
+        в stderr; None — без сообщений).
+        """
+        _check_errors(errors)
+        results, failed = {}, {}
+        for key, result in self.iter_fetch(jobs, interval, start, end):
+            if isinstance(result, APK.DatabaseError):
+                failed[key] = result
+                if errors == "skip" and on_error is not None:
+                    on_error(key, result)
+            else:
+                results[key] = result
+        if failed and errors == "raise":
+            raise APK.DatabaseError(f"Не удалось загрузить: {', '.join(f'{t} ({i})' for t, i in failed)}")
+        return results
+
+    def update_store(self, jobs, interval: int = 10, start: str = None,
+                     store: CandleStore = None, errors: str = "raise", on_error=print_error) -> dict:
+        """
+        Параллельно догружает в хранилище только свечи новее последней сохранённой
+        (см. CandleStore.append). Для пар без сохранённых свечей используется start.
+        Возвращает словарь {(ticker, interval): количество добавленных свечей}.
+
+        errors, on_error -- как в fetch_many; при "skip" пропускаются и тикеры,
+        свечи которых не удалось записать в хранилище (STORE_ERRORS): ошибка
+        записи передаётся в on_error как APK.DatabaseError.
+        """
+        _check_errors(errors)
+        store = store or CandleStore()
+        keys = [job if isinstance(job, tuple) else (job, interval) for job in jobs]
+        starts = {}
+        for key in keys:
+            last = store.last_begin(*key)
+            starts[key] = last.strftime('%Y-%m-%d %H:%M:%S') if last is not None else start
+
+        appended = {}
+        for key, frame in self.fetch_many(keys, start=starts, errors=errors, on_error=on_error).items():
+            try:
+                appended[key] = store.append(key[0], key[1], frame) if not frame.empty else 0
+            except STORE_ERRORS as e:
+                if errors == "raise":
+                    raise
+                if on_error is not None:
+                    on_error(key, APK.DatabaseError(f"Не удалось записать {key[0]} ({key[1]}) в хранилище: {e}"))
+        return appended
+
+
+def _check_errors(errors: str) -> None:
+    if errors not in ERROR_MODES:
+        raise APK.InvalidInputError(f"errors must be one of {ERROR_MODES}, got {errors!r}")
+
+
+def fetch_many(tickers, interval: int = 10, start: str = None, end: str = None,
+               max_workers: int = 8, **options) -> dict:
+    """
+    Разовая параллельная загрузка свечей для списка тикеров.
+    """
+    with MoexFetcher(max_workers=max_workers, **options) as fetcher:
+        return fetcher.fetch_many(tickers, interval, start, end)
+
+
+if __name__ == "__main__":
+    try:
+        started = time.perf_counter()
+        frames = fetch_many(["MOEX", "FEES", "SBER", "GAZP"], interval=10, start="2024-11-12")
+        for (ticker, interval), frame in frames.items():
+            print(f"{ticker} ({interval}): {len(frame)} свечей")
+        print(f"Время загрузки: {time.perf_counter() - started:.2f} с")
+    except APK.ApplicationError as e:
+        print(f"Ошибка: {e}")
@@ -1,14 +1,15 @@
 import pandas
 import numpy
 import _AppProjectKit as APK
-import os
+import indicator_graph as graph
+from instrumentation import instrumented
 
 # Директория для хранения данных
 DATA_DIR = "storage"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)  # Создать директорию, если она отсутствует
 
-def current_ma_analysis(dataFrame: pandas.DataFrame, short_period: int = 9, long_period: int = 21) -> pandas.DataFrame:
+@instrumented
+def current_ma_analysis(dataFrame: pandas.DataFrame, short_period: int = 9, long_period: int = 21,
+                        inplace: bool = False) -> pandas.DataFrame:
     """
     Добавляет колонки с индикаторами скользящих средних в DataFrame.
     
@@ -16,6 +17,7 @@ def current_ma_analysis(dataFrame: pandas.DataFrame, short_period: int = 9, long
         dataFrame: pandas DataFrame с данными
         short_period: период короткой скользящей средней (по умолчанию 9)
         long_period: период длинной скользящей средней (по умолчанию 21)
+        inplace: дописать колонки прямо в dataFrame, без копии
     
     Returns:
         pandas DataFrame с добавленными колонками:
@@ -32,8 +34,8 @@ def current_ma_analysis(dataFrame: pandas.DataFrame, short_period: int = 9, long
     if len(dataFrame) < long_period:
         raise APK.DatabaseError(f"Not enough data points. Required: {long_period}, Got: {len(dataFrame)}")
     
-    # Создаем копию DataFrame
-    df = dataFrame.copy()
+    # Создаем копию DataFrame (или пишем в исходный)
+    df = dataFrame if inplace else dataFrame.copy()
     
     try:
         # Добавляем SMA
@@ -50,8 +52,8 @@ def current_ma_analysis(dataFrame: pandas.DataFrame, short_period: int = 9, long
         # Добавляем сигналы от пересечения MA
         df['MA_Signal'] = 0  # По умолчанию нет сигнала
         
-        # Рассчитываем короткую и длинную MA для сигналов
-        short_ma = df['close'].ewm(span=short_period, adjust=False).mean()
+        # Рассчитываем короткую и длинную MA для сигналов (короткая уже посчитана как EMA)
+        short_ma = df['EMA']
         long_ma = df['close'].ewm(span=long_period, adjust=False).mean()
         
         # Сигнал на покупку (1): короткая MA пересекает длинную MA снизу вверх
@@ -67,6 +69,32 @@ def current_ma_analysis(dataFrame: pandas.DataFrame, short_period: int = 9, long
     except Exception as e:
         raise APK.ApplicationError(f"Error calculating MA indicators: {str(e)}")
 
+@graph.register_operation('crossover', warmup=1)
+def crossover_signal(short_ma: pandas.Series, long_ma: pandas.Series) -> pandas.Series:
+    """Сигнал пересечения: 1 — короткая MA пересекла длинную снизу вверх, -1 — сверху вниз."""
+    signal = pandas.Series(0, index=short_ma.index)
+    signal[(short_ma > long_ma) & (short_ma.shift(1) <= long_ma.shift(1))] = 1
+    signal[(short_ma < long_ma) & (short_ma.shift(1) >= long_ma.shift(1))] = -1
+    return signal
+
+
+@graph.register_operation('scale')
+def scale(series: pandas.Series, factor: float) -> pandas.Series:
+    return series * factor
+
+
+@graph.register_indicator('MA', short_period=9, long_period=21)
+def ma_indicator(short_period: int, long_period: int) -> dict:
+    """Колонки current_ma_analysis в виде узлов графа."""
+    short_ma = graph.ewm('close', short_period)
+    return {
+        'SMA': graph.rolling_mean('close', long_period),
+        'EMA': short_ma,
+        'Volatility': graph.node('scale', graph.rolling_std(graph.pct_change('close'), short_period),
+                                 factor=float(numpy.sqrt(short_period))),
+        'MA_Signal': graph.node('crossover', short_ma, graph.ewm('close', long_period)),
+    }
+
 def get_ma_summary(dataFrame: pandas.DataFrame) -> dict:
     """
     Возвращает сводную информацию по индикаторам MA.
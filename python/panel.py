@@ -0,0 +1,201 @@
+"""
+Индикаторы для панели тикеров: одна широкая таблица время x тикер.
+
+Функции принимают широкий DataFrame закрытий (индекс — время, колонки —
+тикеры) или длинный фрейм с MultiIndex (время, тикер) и считают индикатор
+для всех тикеров одним векторным вызовом pandas/numpy, без цикла по тикерам.
+
+Пропуски: если у тикера нет свечи в какой-то момент (NaN в широкой таблице),
+его значения перед расчётом «уплотняются» — сдвигаются подряд, — так что
+окна и сдвиги идут по его собственным свечам, как при расчёте по отдельному
+фрейму тикера. На местах пропусков во всех результатах стоит NaN.
+"""
+import functools
+import numpy
+import pandas
+import _AppProjectKit as APK
+
+
+def to_panel(frame: pandas.DataFrame, column: str = 'close', ticker: str = 'ticker',
+             time: str = 'begin') -> pandas.DataFrame:
+    """
+    Приводит данные к широкой таблице время x тикер.
+
+    frame -- широкий DataFrame (возвращается как есть), фрейм с MultiIndex
+             (время, тикер) или длинный фрейм с колонками time, ticker и column
+    """
+    if isinstance(frame.index, pandas.MultiIndex):
+        level = ticker if ticker in frame.index.names else -1
+        return frame[column].unstack(level)
+    if ticker in frame.columns and column in frame.columns:
+        return frame.pivot_table(index=time, columns=ticker, values=column, aggfunc='last')
+    return frame
+
+
+def stack_panel(results: dict) -> pandas.DataFrame:
+    """
+    Собирает словарь широких таблиц {колонка: время x тикер} в длинный фрейм
+    с MultiIndex (время, тикер); строки пропусков (все значения NaN) отбрасываются.
+    """
+    stacked = pandas.concat({name: table.stack(future_stack=True) for name, table in results.items()}, axis=1)
+    return stacked.dropna(how='all')
+
+
+def _compact(values: numpy.ndarray) -> tuple:
+    """Сдвигает значения каждой колонки подряд в начало (порядок по времени сохраняется)."""
+    valid = ~numpy.isnan(values)
+    order = numpy.argsort(~valid, axis=0, kind='stable')
+    return numpy.take_along_axis(values, order, axis=0), order, valid
+
+
+def _expand(values: numpy.ndarray, order: numpy.ndarray, valid: numpy.ndarray) -> numpy.ndarray:
+    """Обратное к _compact: возвращает значения на свои места, пропуски — NaN."""
+    result = numpy.empty(values.shape)
+    numpy.put_along_axis(result, order, values, axis=0)
+    result[~valid] = numpy.nan
+    return result
+
+
+def panel_function(kernel):
+    """
+    Декоратор: приводит вход к широкой таблице, уплотняет пропуски, вызывает
+    kernel на уплотнённом DataFrame и раскладывает результат(ы) обратно.
+    kernel возвращает DataFrame или словарь DataFrame той же формы.
+    """
+    @functools.wraps(kernel)
+    def wrapper(close, *args, **kwargs):
+        if isinstance(close, numpy.ndarray):
+            close = pandas.DataFrame(close)
+        close = to_panel(close)
+        if close.ndim != 2:
+            raise APK.InvalidInputError("Ожидается таблица время x тикер.")
+        values = close.to_numpy(dtype=float)
+        compact, order, valid = _compact(values)
+        result = kernel(pandas.DataFrame(compact, columns=close.columns), *args, **kwargs)
+
+        def expand(table):
+            return pandas.DataFrame(_expand(table.to_numpy(dtype=float), order, valid),
+                                    index=close.index, columns=close.columns)
+
+        if isinstance(result, dict):
+            return {name: expand(table) for name, table in result.items()}
+        return expand(result)
+    return wrapper
+
+
+def _crossover(fast: pandas.DataFrame, slow: pandas.DataFrame) -> pandas.DataFrame:
+    signal = pandas.DataFrame(0.0, index=fast.index, columns=fast.columns)
+    signal[(fast > slow) & (fast.shift(1) <= slow.shift(1))] = 1
+    signal[(fast < slow) & (fast.shift(1) >= slow.shift(1))] = -1
+    return signal
+
+
+@panel_function
+def panel_sma(close: pandas.DataFrame, window: int = 20) -> pandas.DataFrame:
+    """Простая скользящая средняя всех тикеров."""
+    return close.rolling(window=window).mean()
+
+
+@panel_function
+def panel_ema(close: pandas.DataFrame, span: int = 9) -> pandas.DataFrame:
+    """Экспоненциальная скользящая средняя всех тикеров (adjust=False)."""
+    return close.ewm(span=span, adjust=False).mean()
+
+
+def _rsi(close: pandas.DataFrame, candle_frame: int) -> pandas.DataFrame:
+    delta = close.diff()
+    avg_pos = delta.where(delta > 0, 0).rolling(window=candle_frame, min_periods=1).mean()
+    avg_neg = delta.where(delta < 0, 0).abs().rolling(window=candle_frame, min_periods=1).mean()
+    rsi = 100 - (100 / (1 + avg_pos / avg_neg))
+    # Окно без движения — 50, как rsi_from_averages с защитой; свечи без цены остаются NaN
+    return rsi.mask((avg_pos == 0) & (avg_neg == 0) & close.notna(), 50.0)
+
+
+@panel_function
+def panel_rsi(close: pandas.DataFrame, candle_frame: int = 18) -> pandas.DataFrame:
+    """RSI всех тикеров, как rsi_call.current_rsi_call."""
+    return _rsi(close, candle_frame)
+
+
+@panel_function
+def panel_crossover(close: pandas.DataFrame, fast: int = 9, slow: int = 21) -> pandas.DataFrame:
+    """Сигнал пересечения EMA(fast) и EMA(slow): 1 — снизу вверх, -1 — сверху вниз."""
+    return _crossover(close.ewm(span=fast, adjust=False).mean(), close.ewm(span=slow, adjust=False).mean())
+
+
+@panel_function
+def panel_ma(close: pandas.DataFrame, short_period: int = 9, long_period: int = 21) -> dict:
+    """SMA, EMA, Volatility и MA_Signal всех тикеров, как moving_averages.current_ma_analysis."""
+    short_ma = close.ewm(span=short_period, adjust=False).mean()
+    long_ma = close.ewm(span=long_period, adjust=False).mean()
+    return {
+        'SMA': close.rolling(window=long_period).mean(),
+        'EMA': short_ma,
+        'Volatility': close.pct_change().rolling(window=short_period).std() * numpy.sqrt(short_period),
+        'MA_Signal': _crossover(short_ma, long_ma),
+    }
+
+
+@panel_function
+def panel_bollinger(close: pandas.DataFrame, window: int = 20, k: float = 2) -> dict:
+    """
+    Полосы Боллинджера и сигналы всех тикеров, как calculate_bollinger_bands
+    и generate_signals из bollinger_strategy.
+    """
+    rolling = close.rolling(window=window)
+    sma = rolling.mean()
+    std = rolling.std()
+    upper = sma + (k * std)
+    lower = sma - (k * std)
+    signal = pandas.DataFrame(0.0, index=close.index, columns=close.columns)
+    signal[close < lower] = 1
+    signal[close > upper] = -1
+    return {'SMA': sma, 'STD': std, 'Upper': upper, 'Lower': lower, 'Signal': signal,
+            'Position': signal.where(signal != 0).ffill().fillna(0)}
+
+
+@panel_function
+def panel_stoch_rsi(close: pandas.DataFrame, period: int = 14, smooth_k: int = 3, smooth_d: int = 3) -> dict:
+    """RSI, StochRSI_K, StochRSI_D и StochRSI_Signal всех тикеров, как calculate_stochastic_rsi."""
+    rsi = _rsi(close, period)
+    lowest_low = rsi.rolling(window=period).min()
+    highest_high = rsi.rolling(window=period).max()
+    k = (100 * (rsi - lowest_low) / (highest_high - lowest_low)).rolling(window=smooth_k).mean()
+    d = k.rolling(window=smooth_d).mean()
+
+    signal = pandas.DataFrame(0.0, index=close.index, columns=close.columns)
+    signal[(k > d) & (k.shift(1) <= d.shift(1)) & (k < 20)] = 1
+    signal[(k < d) & (k.shift(1) >= d.shift(1)) & (k > 80)] = -1
+    return {'RSI': rsi, 'StochRSI_K': k, 'StochRSI_D': d, 'StochRSI_Signal': signal}
+
+
+if __name__ == "__main__":
+    import time
+    from rsi_call import current_rsi_call
+    from moving_averages import current_ma_analysis
+    from bollinger_strategy import calculate_bollinger_bands, generate_signals
+    from Stochastic_RSI import calculate_stochastic_rsi
+
+    # Сравнение: цикл по тикерам против одного вызова на панели
+    rng = numpy.random.default_rng(0)
+    close = pandas.DataFrame(100 * numpy.exp(numpy.cumsum(rng.normal(0, 0.01, size=(500, 300)), axis=0)),
+                             columns=[f"T{i}" for i in range(300)])
+
+    started = time.perf_counter()
+    for name in close.columns:
+        frame = close[[name]].rename(columns={name: 'close'})
+        current_rsi_call(frame, 18)
+        current_ma_analysis(frame)
+        generate_signals(calculate_bollinger_bands(frame.copy()))
+        calculate_stochastic_rsi(frame)
+    loop = time.perf_counter() - started
+
+    started = time.perf_counter()
+    panel_rsi(close)
+    panel_ma(close)
+    panel_bollinger(close)
+    panel_stoch_rsi(close)
+    vectorized = time.perf_counter() - started
+
+    print(f"Цикл по {close.shape[1]} тикерам: {loop:.3f} с")
+    print(f"Панель: {vectorized:.3f} с")
@@ -0,0 +1,206 @@
+"""
+Воспроизведение сохранённых свечей в хронологическом порядке.
+
+Свечи многих тикеров сливаются в один поток k-путевым слиянием на куче
+(heapq.merge) поверх итераторов по тикерам. Поток можно воспроизводить
+в ускоренном реальном времени (speed) или так быстро, как успевает
+потребитель, и передавать в живой движок сигналов.
+
+Источники:
+    store_source   -- раздел колоночного хранилища; читается порциями из memmap,
+                      в памяти держится только текущая порция
+    json_source    -- файл storage/*.json; JSON нельзя читать частями, поэтому
+                      файл разбирается целиком и хранится компактными
+                      numpy-колонками. heapq.merge сразу запрашивает первую
+                      свечу каждого источника, так что все JSON-файлы
+                      читаются в начале воспроизведения.
+    storage_sources -- по одному источнику на тикер: json_source каждой выгрузки
+                      и раздел хранилища тикера сливаются на куче без повторов
+                      свечей, общий объединённый фрейм не строится
+"""
+import argparse
+import heapq
+import os
+import time
+import pandas
+import _AppProjectKit as APK
+from candle_store import CandleStore, STORE_DIR, DATA_DIR, json_ticker, to_columns, iter_json_dumps
+
+
+# Свечей в одной порции чтения из memmap
+CHUNK_SIZE = 4096
+
+
+def _iter_columns(ticker: str, columns: dict, chunk: int, source: int):
+    """Отдаёт (begin в секундах, номер источника, тикер, свеча) по колонкам порциями."""
+    names = [name for name in columns if name != 'begin']
+    total = columns['begin'].size
+    for lo in range(0, total, chunk):
+        begin = columns['begin'][lo:lo + chunk]
+        seconds = begin.astype('<i8').tolist()
+        stamps = begin.astype('datetime64[s]').tolist()
+        values = [columns[name][lo:lo + chunk].tolist() for name in names]
+        for i, row in enumerate(zip(*values)):
+            candle = dict(zip(names, row))
+            candle['begin'] = stamps[i]
+            yield seconds[i], source, ticker, candle
+
+
+def store_source(store: CandleStore, ticker: str, interval: int, start=None, end=None,
+                 chunk: int = CHUNK_SIZE, source: int = 0):
+    """Ленивый итератор по свечам раздела хранилища."""
+    yield from _iter_columns(ticker.upper(), store.read_arrays(ticker, interval, start, end), chunk, source)
+
+
+def json_source(path: str, ticker: str = None, chunk: int = CHUNK_SIZE, source: int = 0):
+    """Итератор по свечам JSON-файла; файл читается при запросе первой свечи."""
+    ticker = ticker or json_ticker(path)
+    if ticker is None:
+        raise APK.InvalidInputError(f"Не удалось определить тикер по имени файла {path}")
+    try:
+        frame = pandas.read_json(path)
+    except (FileNotFoundError, ValueError) as e:
+        raise APK.DatabaseError(f"Не удалось прочитать {path}: {e}")
+    columns = to_columns(frame)
+    del frame
+    yield from _iter_columns(ticker.upper(), columns, chunk, source)
+
+
+def _unique(parts: list, source: int):
+    """
+    Сливает отсортированные источники одного тикера; из свечей с одинаковым
+    begin остаётся свеча источника с большим номером.
+    """
+    previous = None
+    for item in heapq.merge(*parts):
+        if previous is not None and item[0] != previous[0]:
+            yield previous[0], source, previous[2], previous[3]
+        previous = item
+    if previous is not None:
+        yield previous[0], source, previous[2], previous[3]
+
+
+def storage_sources(data_dir: str = DATA_DIR, store: CandleStore = None, interval: int = None,
+                    chunk: int = CHUNK_SIZE) -> list:
+    """
+    Источники для всех данных, по одному на тикер: JSON-выгрузки data_dir
+    и раздел хранилища. Каждая выгрузка — отдельный json_source, и они
+    сливаются с разделом хранилища на куче (_unique): при совпадении begin
+    свеча из JSON заменяет свечу хранилища, более поздний файл — более ранний.
+    Здесь выгрузки читаются по одной только для определения интервала и
+    сразу освобождаются; свечи читаются при воспроизведении в компактные
+    колонки (см. json_source), без объединённых DataFrame всех файлов.
+
+    Аргументы:
+    interval -- воспроизводить только этот интервал; если не задан, у каждого
+                тикера должен быть ровно один интервал, иначе свечи разных
+                интервалов перемешались бы в одном потоке
+    """
+    store = store or CandleStore(STORE_DIR)
+    json_files = {}
+    if os.path.isdir(data_dir):
+        for filename, key, _ in iter_json_dumps(data_dir):
+            if key is not None:
+                json_files.setdefault(key, []).append(os.path.join(data_dir, filename))
+    keys = set(json_files)
+    keys.update((ticker, ticker_interval) for ticker in store.tickers()
+                for ticker_interval in store.intervals(ticker))
+    if interval is not None:
+        keys = {key for key in keys if key[1] == interval}
+
+    intervals = {}
+    for ticker, ticker_interval in keys:
+        intervals.setdefault(ticker, set()).add(ticker_interval)
+    mixed = {ticker: sorted(found) for ticker, found in intervals.items() if len(found) > 1}
+    if mixed:
+        raise APK.InvalidInputError(
+            "У тикеров несколько интервалов, задайте interval: "
+            + ", ".join(f"{ticker} {found}" for ticker, found in sorted(mixed.items())))
+
+    sources = []
+    for ticker, ticker_interval in sorted(keys):
+        parts = []
+        if store.exists(ticker, ticker_interval):
+            parts.append(store_source(store, ticker, ticker_interval, chunk=chunk, source=0))
+        for number, path in enumerate(json_files.get((ticker, ticker_interval), []), 1):
+            parts.append(json_source(path, ticker, chunk=chunk, source=number))
+        sources.append(_unique(parts, len(sources)))
+    return sources
+
+
+def merge(sources):
+    """
+    Сливает отсортированные по времени источники в один хронологический поток
+    (тикер, свеча). На куче одновременно лежит по одной свече от каждого источника;
+    при равном времени порядок определяется номером источника.
+    """
+    for _, _, ticker, candle in heapq.merge(*sources):
+        yield ticker, candle
+
+
+def replay(sources, speed: float = None, clock=time.monotonic, sleep=time.sleep):
+    """
+    Воспроизводит слитый поток.
+
+    Аргументы:
+    speed -- во сколько раз быстрее реального времени; None — без пауз
+    clock, sleep -- часы и функция ожидания (подменяются в тестах)
+    """
+    if speed is not None and speed <= 0:
+        raise APK.InvalidInputError("speed must be positive")
+    if speed is None:
+        yield from merge(sources)
+        return
+
+    first = started = None
+    for seconds, _, ticker, candle in heapq.merge(*sources):
+        if first is None:
+            first, started = seconds, clock()
+        delay = (seconds - first) / speed - (clock() - started)
+        if delay > 0:
+            sleep(delay)
+        yield ticker, candle
+
+
+def run_replay(feed, consumer=None, report_every: int = None) -> dict:
+    """
+    Передаёт поток (тикер, свеча) потребителю consumer(ticker, candle)
+    и считает пропускную способность.
+
+    Аргументы:
+    report_every -- печатать промежуточную скорость каждые N свечей
+    """
+    count = 0
+    started = time.perf_counter()
+    for ticker, candle in feed:
+        if consumer is not None:
+            consumer(ticker, candle)
+        count += 1
+        if report_every and count % report_every == 0:
+            print(f"{count} свечей, {count / (time.perf_counter() - started):,.0f} свечей/с")
+    seconds = time.perf_counter() - started
+    return {'candles': count, 'seconds': seconds,
+            'candles_per_second': count / seconds if seconds > 0 else float('inf')}
+
+
+if __name__ == "__main__":
+    from live_engine import LiveEngine
+
+    parser = argparse.ArgumentParser(description="Воспроизведение сохранённых свечей")
+    parser.add_argument("--speed", type=float, default=None, help="ускорение относительно реального времени")
+    parser.add_argument("--interval", type=int, default=None)
+    parser.add_argument("--events", action="store_true", help="печатать события сигналов")
+    args = parser.parse_args()
+
+    try:
+        sources = storage_sources(interval=args.interval)
+        store = CandleStore(STORE_DIR)
+        watchlist = set(store.tickers())
+        watchlist.update(filter(None, map(json_ticker, os.listdir(DATA_DIR))))
+        engine = LiveEngine(sorted(watchlist), on_event=print if args.events else None)
+        stats = run_replay(replay(sources, args.speed), engine.process, report_every=100_000)
+        print(f"Воспроизведено {stats['candles']} свечей за {stats['seconds']:.2f} с "
+              f"({stats['candles_per_second']:,.0f} свечей/с)")
+        print(engine.latency_report())
+    except APK.ApplicationError as e:
+        print(f"Ошибка: {e}")
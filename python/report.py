@@ -0,0 +1,206 @@
+"""
+Пакетные отчёты по сигналам всех индикаторов и всех тикеров.
+
+Свечи тикеров склеиваются в один фрейм, для каждой сигнальной колонки
+ненулевые строки выбираются булевой маской, и все события собираются
+в одну длинную таблицу (ticker, begin, close, indicator, signal, label).
+Таблица записывается целиком в CSV, JSONL или Parquet через буферизованный
+файл, рядом — короткая текстовая сводка по тикерам и индикаторам.
+Время отчёта определяется векторными операциями над колонками, а не
+числом строк, обрабатываемых в Python.
+"""
+import argparse
+import os
+import numpy
+import pandas
+import _AppProjectKit as APK
+from backtest import to_signal
+from candle_store import combine_candles, load_json_groups
+from instrumentation import instrumented
+
+
+# Путь к директории для хранения данных
+DATA_DIR = "storage"
+REPORTS_DIR = os.path.join(DATA_DIR, "reports")
+
+# Сигнальные колонки индикаторов: колонка -> название в отчёте
+SIGNAL_COLUMNS = {
+    'Signal': 'Bollinger',
+    'MA_Signal': 'MA',
+    'StochRSI_Signal': 'StochRSI',
+    'Volume_Signal': 'Volume',
+    'Hammer': 'Hammer',
+    'HangingMan': 'HangingMan',
+    'Engulfing': 'Engulfing',
+}
+
+EVENT_COLUMNS = ['ticker', 'begin', 'close', 'indicator', 'signal', 'label']
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+# Размер буфера файла при записи отчёта
+BUFFER_SIZE = 1 << 20
+
+
+@instrumented
+def signal_events(frames, columns: dict = None) -> pandas.DataFrame:
+    """
+    Все ненулевые сигналы всех индикаторов одной таблицей.
+
+    Аргументы:
+    frames -- DataFrame или словарь {тикер: DataFrame} с уже рассчитанными сигналами
+    columns -- {колонка: название}; по умолчанию SIGNAL_COLUMNS (отсутствующие пропускаются)
+
+    Возвращает:
+    DataFrame с колонками EVENT_COLUMNS, отсортированный по тикеру и времени.
+    signal — 1 (покупка) или -1 (продажа); label — 'Покупка'/'Продажа'
+    или метка паттерна ('Bullish Engulfing').
+    """
+    if isinstance(frames, pandas.DataFrame):
+        frames = {None: frames}
+    frames = {ticker: frame for ticker, frame in frames.items() if len(frame)}
+    columns = columns or SIGNAL_COLUMNS
+    if not frames:
+        return pandas.DataFrame(columns=EVENT_COLUMNS)
+
+    lengths = [len(frame) for frame in frames.values()]
+    ticker = numpy.repeat(numpy.array(list(frames), dtype=object), lengths)
+    begin = numpy.concatenate([frame['begin'].to_numpy() if 'begin' in frame.columns
+                               else frame.index.to_numpy() for frame in frames.values()])
+    close = numpy.concatenate([frame['close'].to_numpy(dtype=float) for frame in frames.values()])
+
+    parts = []
+    for column, name in columns.items():
+        present = [column in frame.columns for frame in frames.values()]
+        if not any(present):
+            continue
+        values = numpy.concatenate([frame[column].to_numpy() if has else numpy.zeros(len(frame), dtype=numpy.int8)
+                                    for has, frame in zip(present, frames.values())])
+        signal = to_signal(values, column)
+        rows = numpy.flatnonzero(signal)
+        if rows.size == 0:
+            continue
+        if values.dtype == object:
+            label = values[rows].astype(str)
+        else:
+            label = numpy.where(signal[rows] > 0, 'Покупка', 'Продажа')
+        parts.append(pandas.DataFrame({'row': rows, 'ticker': ticker[rows], 'begin': begin[rows],
+                                       'close': close[rows], 'indicator': name,
+                                       'signal': signal[rows], 'label': label}))
+    if not parts:
+        return pandas.DataFrame(columns=EVENT_COLUMNS)
+    # Номер строки склеенного фрейма уже упорядочен по тикеру и времени
+    events = pandas.concat(parts, ignore_index=True).sort_values('row', kind='stable')
+    return events[EVENT_COLUMNS].reset_index(drop=True)
+
+
+def summarize(events: pandas.DataFrame) -> pandas.DataFrame:
+    """Сводка по (тикер, индикатор): число покупок и продаж, последний сигнал и его время."""
+    if events.empty:
+        return pandas.DataFrame(columns=['ticker', 'indicator', 'buys', 'sells', 'last_begin', 'last_label'])
+    flags = events.assign(buy=events['signal'] > 0, sell=events['signal'] < 0)
+    summary = flags.groupby(['ticker', 'indicator'], sort=True, dropna=False).agg(
+        buys=('buy', 'sum'), sells=('sell', 'sum'), last_begin=('begin', 'last'), last_label=('label', 'last'))
+    return summary.reset_index()
+
+
+def format_summary(summary: pandas.DataFrame) -> str:
+    """Человекочитаемая сводка: блок на тикер, строка на индикатор."""
+    lines = []
+    for ticker, rows in summary.groupby('ticker', sort=True, dropna=False):
+        lines.append(f"{ticker}:")
+        for row in rows.itertuples(index=False):
+            lines.append(f"    {row.indicator:12s} покупок: {row.buys:<6d} продаж: {row.sells:<6d} "
+                         f"последний: {row.last_label} ({row.last_begin})")
+    return "\n".join(lines) + "\n"
+
+
+def write_events(events: pandas.DataFrame, path: str, format: str = None) -> str:
+    """
+    Записывает события одним блоком. Формат — по расширению пути
+    (.csv, .jsonl, .parquet) или явно через format.
+    """
+    format = format or os.path.splitext(path)[1].lstrip('.')
+    if format not in FORMATS:
+        raise APK.InvalidInputError(f"Неизвестный формат отчёта: {format}")
+    if format == 'parquet':
+        from data_storage import _pyarrow
+        _pyarrow()
+        events.to_parquet(path, index=False)
+        return path
+    if format == 'csv':
+        try:
+            import pyarrow
+            import pyarrow.csv
+        except ImportError:
+            pyarrow = None
+        if pyarrow is not None and not events.empty:
+            # Писатель CSV из pyarrow на порядок быстрее pandas.to_csv
+            table = pyarrow.Table.from_pandas(events, preserve_index=False)
+            if pyarrow.types.is_timestamp(table.schema.field('begin').type):
+                begin = table.column('begin').cast(pyarrow.timestamp('s'), safe=False)
+                table = table.set_column(table.schema.get_field_index('begin'), 'begin', begin)
+            pyarrow.csv.write_csv(table, path)
+            return path
+    with open(path, 'w', encoding="utf-8", newline='', buffering=BUFFER_SIZE) as f:
+        if format == 'csv':
+            events.to_csv(f, index=False)
+        elif not events.empty:
+            events.to_json(f, orient='records', lines=True, force_ascii=False, date_format='iso')
+    return path
+
+
+def load_frames(data_dir: str = DATA_DIR) -> dict:
+    """
+    Свечи всех JSON-выгрузок data_dir, по одному фрейму на тикер: выгрузки
+    одного тикера объединяются (combine_candles), а не перезаписывают друг
+    друга. Если у тикера выгрузки разных интервалов, ключ — {тикер}_{интервал}.
+    Пропущенные файлы печатаются.
+    """
+    groups, skipped = load_json_groups(data_dir)
+    for filename, reason in skipped:
+        print(f"Пропущен {filename}: {reason}")
+    counts = {}
+    for ticker, _ in groups:
+        counts[ticker] = counts.get(ticker, 0) + 1
+    return {(ticker if counts[ticker] == 1 else f"{ticker}_{interval}"):
+            combine_candles([frame for _, frame in parts])
+            for (ticker, interval), parts in groups.items()}
+
+
+@instrumented
+def generate_report(frames, output_dir: str = REPORTS_DIR, formats=('csv',), name: str = "signals",
+                    enrich: bool = True, columns: dict = None) -> dict:
+    """
+    Отчёт по сигналам: события в каждом из formats и сводка <name>_summary.txt.
+
+    enrich -- досчитать индикаторы (indicator_graph.enrich) для фреймов без сигнальных колонок
+    Возвращает {формат: путь}, сводка — под ключом 'summary'.
+    """
+    if isinstance(frames, pandas.DataFrame):
+        frames = {None: frames}
+    if enrich:
+        import indicator_graph as graph
+        wanted = columns or SIGNAL_COLUMNS
+        frames = {ticker: frame if any(column in frame.columns for column in wanted) else graph.enrich(frame)
+                  for ticker, frame in frames.items()}
+    events = signal_events(frames, columns)
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {format: write_events(events, os.path.join(output_dir, f"{name}.{format}"), format)
+             for format in formats}
+    paths['summary'] = os.path.join(output_dir, f"{name}_summary.txt")
+    with open(paths['summary'], 'w', encoding="utf-8") as f:
+        f.write(format_summary(summarize(events)))
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Отчёт по сигналам всех индикаторов")
+    parser.add_argument("--output", default=REPORTS_DIR)
+    parser.add_argument("--formats", nargs="*", choices=FORMATS, default=['csv'])
+    args = parser.parse_args()
+
+    if not os.path.isdir(DATA_DIR):
+        raise SystemExit(f"Нет директории {DATA_DIR}")
+    for kind, path in generate_report(load_frames(DATA_DIR), args.output, args.formats).items():
+        print(f"{kind}: {path}")
@@ -0,0 +1,193 @@
+"""
+Старшие таймфреймы из базовых свечей без повторной загрузки.
+
+Из самых мелких сохранённых свечей (например, минутных) строятся свечи
+5m, 15m, 1h, 1D, 1W: open — первый, close — последний, high/low —
+экстремумы, volume/value — суммы. Внутридневные свечи выровнены по часам
+(как у ISS), но не пересекают границы торговых сессий MOEX: корзина,
+на которую приходится граница, делится на две свечи, и begin второй
+равен началу сессии.
+
+Старшие таймфреймы хранятся в том же CandleStore под своими кодами
+интервала (TIMEFRAMES). При догрузке базовых свечей пересчитывается только
+последняя (незакрытая) старшая свеча и всё, что новее её, так что для
+мультитаймфреймового анализа нужен один запрос ISS на тикер.
+"""
+import argparse
+import numpy
+import pandas
+import _AppProjectKit as APK
+from candle_store import CandleStore, STORE_DIR, to_columns
+from instrumentation import instrumented
+
+
+# Таймфрейм -> (код интервала в хранилище, длина свечи в минутах; для 1D и 1W — None)
+# Коды 1, 10, 60, 24, 7 совпадают с ISS, 5 и 15 у ISS нет
+TIMEFRAMES = {
+    '1m': (1, 1),
+    '5m': (5, 5),
+    '10m': (10, 10),
+    '15m': (15, 15),
+    '1h': (60, 60),
+    '1D': (24, None),
+    '1W': (7, None),
+}
+
+# Сессии фондового рынка MOEX (московское время): утренняя, основная
+# (с аукционами открытия и закрытия), вечерняя
+MOEX_SESSIONS = (('06:50', '09:50'), ('09:50', '19:00'), ('19:00', '24:00'))
+
+_DAY = 24 * 60 * 60
+
+
+def _session_starts(sessions) -> numpy.ndarray:
+    """Начала сессий в секундах от полуночи."""
+    starts = []
+    for start, _ in sessions or ():
+        hours, minutes = start.split(':')
+        starts.append(int(hours) * 3600 + int(minutes) * 60)
+    return numpy.array(sorted(starts), dtype=numpy.int64)
+
+
+def bar_starts(begin: numpy.ndarray, timeframe: str, sessions=MOEX_SESSIONS) -> numpy.ndarray:
+    """
+    Начало старшей свечи (секунды с эпохи) для каждой базовой свечи.
+
+    begin -- секунды с эпохи (наивное московское время), как в CandleStore
+    sessions -- сессии, границы которых не пересекаются; None — только выравнивание по часам
+    """
+    if timeframe not in TIMEFRAMES:
+        raise APK.InvalidInputError(f"Неизвестный таймфрейм: {timeframe}")
+    _, minutes = TIMEFRAMES[timeframe]
+    begin = numpy.asarray(begin, dtype=numpy.int64)
+    day = begin // _DAY
+    if timeframe == '1D':
+        return day * _DAY
+    if timeframe == '1W':
+        # 1970-01-01 — четверг; неделя начинается с понедельника, как у ISS
+        return (day - (day + 3) % 7) * _DAY
+
+    seconds = begin - day * _DAY
+    start = seconds // (minutes * 60) * (minutes * 60)
+    starts = _session_starts(sessions)
+    if starts.size:
+        # Начало сессии свечи: корзина не может начаться раньше него
+        session = numpy.searchsorted(starts, seconds, side='right') - 1
+        start = numpy.where(session >= 0, numpy.maximum(start, starts[numpy.maximum(session, 0)]), start)
+    return day * _DAY + start
+
+
+def _aggregate(columns: dict, timeframe: str, sessions) -> dict:
+    """Сворачивает отсортированные колонки базовых свечей в старшие свечи."""
+    begin = columns['begin'].astype('<i8')
+    if begin.size == 0:
+        return {name: values[:0] for name, values in columns.items()}
+    keys = bar_starts(begin, timeframe, sessions)
+    first = numpy.flatnonzero(numpy.diff(keys, prepend=keys[0] - 1))
+    last = numpy.append(first[1:], keys.size) - 1
+    result = {'begin': keys[first]}
+    if 'open' in columns:
+        result['open'] = columns['open'][first]
+    if 'high' in columns:
+        result['high'] = numpy.maximum.reduceat(columns['high'], first)
+    if 'low' in columns:
+        result['low'] = numpy.minimum.reduceat(columns['low'], first)
+    if 'close' in columns:
+        result['close'] = columns['close'][last]
+    for name in ('volume', 'value'):
+        if name in columns:
+            result[name] = numpy.add.reduceat(columns[name], first)
+    return result
+
+
+@instrumented
+def resample(frame: pandas.DataFrame, timeframe: str, sessions=MOEX_SESSIONS) -> pandas.DataFrame:
+    """
+    Строит свечи таймфрейма timeframe из свечного фрейма (колонки begin, open,
+    high, low, close, volume, value; лишние колонки отбрасываются).
+    Свечи сортируются по begin, повторы удаляются (последняя побеждает).
+    """
+    bars = _aggregate(to_columns(frame), timeframe, sessions)
+    bars['begin'] = bars['begin'].astype('datetime64[s]')
+    return pandas.DataFrame(bars)
+
+
+def resample_all(frame: pandas.DataFrame, timeframes=('5m', '15m', '1h', '1D', '1W'),
+                 sessions=MOEX_SESSIONS) -> dict:
+    """Все таймфреймы из одного фрейма: {таймфрейм: DataFrame}."""
+    columns = to_columns(frame)
+    result = {}
+    for timeframe in timeframes:
+        bars = _aggregate(columns, timeframe, sessions)
+        bars['begin'] = bars['begin'].astype('datetime64[s]')
+        result[timeframe] = pandas.DataFrame(bars)
+    return result
+
+
+@instrumented
+def update_resampled(store: CandleStore, ticker: str, base_interval: int = 1,
+                     timeframes=('5m', '15m', '1h', '1D', '1W'), sessions=MOEX_SESSIONS) -> dict:
+    """
+    Поддерживает старшие таймфреймы тикера в хранилище в актуальном состоянии.
+
+    Для каждого таймфрейма читаются только базовые свечи начиная с begin
+    последней сохранённой старшей свечи: она пересчитывается (могла быть
+    неполной) и заменяется через CandleStore.append, новые дописываются.
+    Если таймфрейма ещё нет, он строится по всей истории.
+
+    Возвращает {таймфрейм: количество добавленных старших свечей}.
+    """
+    if not store.exists(ticker, base_interval):
+        raise APK.DatabaseError(f"Базовые свечи {ticker} ({base_interval}) отсутствуют в хранилище.")
+    appended = {}
+    for timeframe in timeframes:
+        interval = TIMEFRAMES[timeframe][0] if timeframe in TIMEFRAMES else None
+        if interval is None:
+            raise APK.InvalidInputError(f"Неизвестный таймфрейм: {timeframe}")
+        if interval == base_interval:
+            continue
+        last = store.last_begin(ticker, interval)
+        bars = _aggregate(store.read_arrays(ticker, base_interval, start=last), timeframe, sessions)
+        bars['begin'] = bars['begin'].astype('datetime64[s]')
+        frame = pandas.DataFrame(bars)
+        if last is None:
+            appended[timeframe] = store.write(ticker, interval, frame)
+        else:
+            appended[timeframe] = store.append(ticker, interval, frame)
+    return appended
+
+
+def append_and_resample(store: CandleStore, ticker: str, frame: pandas.DataFrame, base_interval: int = 1,
+                        timeframes=('5m', '15m', '1h', '1D', '1W'), sessions=MOEX_SESSIONS) -> dict:
+    """Дописывает базовые свечи и обновляет старшие таймфреймы тикера."""
+    store.append(ticker, base_interval, frame)
+    return update_resampled(store, ticker, base_interval, timeframes, sessions)
+
+
+def update_timeframes(fetcher, tickers, base_interval: int = 1, timeframes=('5m', '15m', '1h', '1D', '1W'),
+                      start: str = None, store: CandleStore = None, sessions=MOEX_SESSIONS) -> dict:
+    """
+    Один запрос ISS на тикер: догружает базовые свечи (MoexFetcher.update_store)
+    и достраивает из них старшие таймфреймы.
+    Возвращает {тикер: {таймфрейм: количество добавленных свечей}}.
+    """
+    store = store or CandleStore(STORE_DIR)
+    fetcher.update_store(tickers, base_interval, start, store=store, errors="skip")
+    return {ticker: update_resampled(store, ticker, base_interval, timeframes, sessions)
+            for ticker in tickers if store.exists(ticker, base_interval)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Построение старших таймфреймов из базовых свечей хранилища")
+    parser.add_argument("tickers", nargs="*")
+    parser.add_argument("--base", type=int, default=1, help="код интервала базовых свечей")
+    parser.add_argument("--timeframes", nargs="*", choices=sorted(TIMEFRAMES), default=['5m', '15m', '1h', '1D', '1W'])
+    args = parser.parse_args()
+
+    store = CandleStore(STORE_DIR)
+    try:
+        for ticker in args.tickers or store.tickers():
+            if store.exists(ticker, args.base):
+                print(ticker, update_resampled(store, ticker, args.base, args.timeframes))
+    except APK.ApplicationError as e:
+        print(f"Ошибка: {e}")
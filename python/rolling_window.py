@@ -0,0 +1,205 @@
+"""
+Скользящие окна за O(1) амортизированно на свечу.
+
+RollingExtremum — максимум/минимум окна на монотонной деке,
+RollingMean — среднее окна на бегущей сумме.
+Оба класса умеют сохранять и восстанавливать своё состояние (snapshot/restore).
+"""
+import math
+from collections import deque
+import _AppProjectKit as APK
+
+
+class RollingExtremum:
+    """
+    Максимум (mode="max") или минимум (mode="min") последних window значений.
+
+    Дека хранит пары (номер, значение), значения в ней монотонны, поэтому
+    каждое значение добавляется и удаляется ровно один раз. NaN пропускаются,
+    но занимают место в окне — как в pandas rolling().max().
+    """
+
+    def __init__(self, window: int, mode: str = "max"):
+        if window < 1:
+            raise APK.InvalidInputError("window must be positive")
+        if mode not in ("max", "min"):
+            raise APK.InvalidInputError("mode must be 'max' or 'min'")
+        self.window = window
+        self.mode = mode
+        self.count = 0
+        self._deque = deque()
+        self._nans = deque()
+
+    def update(self, value: float) -> float:
+        """Добавляет значение и возвращает экстремум окна (NaN, если окно пустое)."""
+        if math.isnan(value):
+            self._nans.append(self.count)
+        else:
+            if self.mode == "max":
+                while self._deque and self._deque[-1][1] <= value:
+                    self._deque.pop()
+            else:
+                while self._deque and self._deque[-1][1] >= value:
+                    self._deque.pop()
+            self._deque.append((self.count, value))
+        self.count += 1
+        while self._deque and self._deque[0][0] <= self.count - 1 - self.window:
+            self._deque.popleft()
+        while self._nans and self._nans[0] <= self.count - 1 - self.window:
+            self._nans.popleft()
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self._deque[0][1] if self._deque else math.nan
+
+    @property
+    def ready(self) -> bool:
+        """Окно заполнено целиком."""
+        return self.count >= self.window
+
+    @property
+    def valid(self) -> int:
+        """Количество не-NaN значений в окне (аналог min_periods в pandas)."""
+        return min(self.count, self.window) - len(self._nans)
+
+    def snapshot(self) -> dict:
+        return {'window': self.window, 'mode': self.mode, 'count': self.count,
+                'deque': [list(item) for item in self._deque], 'nans': list(self._nans)}
+
+    @classmethod
+    def restore(cls, state: dict) -> "RollingExtremum":
+        rolling = cls(state['window'], state['mode'])
+        rolling.count = state['count']
+        rolling._deque = deque(tuple(item) for item in state['deque'])
+        rolling._nans = deque(state['nans'])
+        return rolling
+
+
+class RollingMean:
+    """
+    Среднее (и стандартное отклонение) последних window значений.
+
+    Повторяет алгоритмы pandas rolling().mean()/std(): сумма Кахана для
+    среднего, метод Уэлфорда с компенсацией для дисперсии и учёт серий
+    одинаковых значений, поэтому результаты совпадают с пакетными функциями
+    вплоть до сравнений на равенство в сигналах.
+    min_periods — минимальное число не-NaN значений для результата.
+    """
+
+    def __init__(self, window: int, min_periods: int = None):
+        if window < 1:
+            raise APK.InvalidInputError("window must be positive")
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self._values = deque()
+        # Состояние среднего: количество, сумма, компенсации, отрицательные значения
+        self.valid = 0
+        self.total = 0.0
+        self._add_error = 0.0
+        self._remove_error = 0.0
+        self._negative = 0
+        # Состояние дисперсии (Уэлфорд)
+        self._var_count = 0
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._var_error = 0.0
+        # Серия одинаковых значений: на ней среднее равно значению, дисперсия — нулю
+        self._same = 0
+        self._last = math.nan
+
+    def _add_mean(self, value: float) -> None:
+        self.valid += 1
+        y = value - self._add_error
+        t = self.total + y
+        self._add_error = t - self.total - y
+        self.total = t
+        if math.copysign(1.0, value) < 0:
+            self._negative += 1
+        self._same = self._same + 1 if value == self._last else 1
+        self._last = value
+
+    def _remove_mean(self, value: float) -> None:
+        self.valid -= 1
+        y = -value - self._remove_error
+        t = self.total + y
+        self._remove_error = t - self.total - y
+        self.total = t
+        if math.copysign(1.0, value) < 0:
+            self._negative -= 1
+
+    def _add_var(self, value: float) -> None:
+        self._var_count += 1
+        prev_mean = self._mean - self._var_error
+        y = value - self._var_error
+        t = y - self._mean
+        self._var_error = t + self._mean - y
+        self._mean = self._mean + t / self._var_count
+        self._ssqdm = self._ssqdm + (value - prev_mean) * (value - self._mean)
+
+    def _remove_var(self, value: float) -> None:
+        self._var_count -= 1
+        if self._var_count:
+            prev_mean = self._mean - self._var_error
+            y = value - self._var_error
+            t = y - self._mean
+            self._var_error = t + self._mean - y
+            self._mean = self._mean - t / self._var_count
+            self._ssqdm = self._ssqdm - (value - prev_mean) * (value - self._mean)
+        else:
+            self._mean = 0.0
+            self._ssqdm = 0.0
+
+    def update(self, value: float) -> float:
+        """Добавляет значение и возвращает среднее окна (NaN, пока значений мало)."""
+        old = self._values.popleft() if len(self._values) == self.window else math.nan
+        self._values.append(value)
+
+        # Порядок операций как в pandas: для среднего сначала удаление, для дисперсии — добавление
+        if not math.isnan(old):
+            self._remove_mean(old)
+        if not math.isnan(value):
+            self._add_mean(value)
+            self._add_var(value)
+        if not math.isnan(old):
+            self._remove_var(old)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.valid == 0 or self.valid < self.min_periods:
+            return math.nan
+        if self._same >= self.valid:
+            return self._last
+        result = self.total / self.valid
+        if self._negative == 0 and result < 0:
+            return 0.0
+        if self._negative == self.valid and result > 0:
+            return 0.0
+        return result
+
+    @property
+    def std(self) -> float:
+        """Выборочное стандартное отклонение окна (ddof=1, как в pandas)."""
+        n = self.valid
+        if n < max(self.min_periods, 2):
+            return math.nan
+        if self._same >= n:
+            return 0.0
+        return math.sqrt(max(self._ssqdm / (n - 1), 0.0))
+
+    @property
+    def ready(self) -> bool:
+        return len(self._values) >= self.window
+
+    def snapshot(self) -> dict:
+        state = dict(vars(self))
+        state['_values'] = list(self._values)
+        return state
+
+    @classmethod
+    def restore(cls, state: dict) -> "RollingMean":
+        rolling = cls(state['window'], state['min_periods'])
+        vars(rolling).update(state)
+        rolling._values = deque(state['_values'])
+        return rolling
@@ -1,25 +1,91 @@
-import requests
+import numpy
 import pandas
 import datetime
 import os
 import re as regular
 """import data_collector"""
 import _AppProjectKit as APK
+import indicator_graph as graph
+from instrumentation import instrumented
 
 
 # Директория для хранения данных
 DATA_DIR = "storage"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)  # Создать директорию, если она отсутствует
 
 
-def current_rsi_call(dataFrame: pandas.DataFrame, candle_frame: int = 18) -> pandas.Series:
+# Способы сглаживания приростов и падений
+SMOOTHING = ('sma', 'wilder', 'ema')
+
+# Сглаживание по умолчанию во всех точках входа (current_rsi_call, rsi_frame, RSIState)
+DEFAULT_SMOOTHING = 'sma'
+
+
+def gains_losses(close: pandas.Series) -> tuple:
+    """
+    Приросты и падения цены (положительные числа). Первая свеча — NaN,
+    у неё нет предыдущего закрытия.
+    """
+    delta = close.diff()
+    return delta.clip(lower=0), (-delta).clip(lower=0)
+
+
+def smooth(values: pandas.Series, period: int, method: str = 'sma') -> pandas.Series:
+    """
+    Сглаживание приростов или падений.
+
+    sma    -- скользящее среднее за period свечей (min_periods=1), NaN считается нулём,
+              как в current_rsi_call
+    wilder -- сглаживание Уайлдера: первое значение — среднее первых period
+              изменений, дальше avg = (avg * (period - 1) + x) / period
+    ema    -- экспоненциальное среднее со span=period от первого изменения
+    """
+    if method == 'sma':
+        return values.fillna(0).rolling(window=period, min_periods=1).mean()
+    if method == 'ema':
+        return values.ewm(span=period, adjust=False).mean()
+    if method == 'wilder':
+        result = pandas.Series(numpy.nan, index=values.index)
+        if values.size <= period:
+            return result
+        seeded = values.iloc[period:].copy()
+        seeded.iloc[0] = values.iloc[1:period + 1].mean()
+        result.iloc[period:] = seeded.ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+        return result
+    raise APK.InvalidInputError(f"Неизвестный способ сглаживания RSI: {method}")
+
+
+def rsi_from_averages(avg_pos, avg_neg, guard: bool = True):
+    """
+    RSI по средним приростам и падениям (Series или массивы).
+    guard -- без деления на ноль: нет падений — 100, нет ни приростов,
+    ни падений — 50. Без guard: 100 и NaN, как в current_rsi_call.
+    """
+    if not guard:
+        rs = avg_pos / avg_neg
+        return 100 - (100 / (1 + rs))
+    pos = numpy.asarray(avg_pos, dtype=float)
+    neg = numpy.asarray(avg_neg, dtype=float)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + pos / neg)
+    rsi = numpy.where(neg == 0, numpy.where(pos > 0, 100.0, 50.0), rsi)
+    rsi[numpy.isnan(pos) | numpy.isnan(neg)] = numpy.nan
+    if isinstance(avg_pos, pandas.Series):
+        return pandas.Series(rsi, index=avg_pos.index)
+    return rsi
+
+
+@instrumented
+def current_rsi_call(dataFrame: pandas.DataFrame, candle_frame: int = 18, method: str = DEFAULT_SMOOTHING,
+                     guard: bool = True) -> pandas.Series:
     """
     Рассчитывает индекс относительной силы (RSI) для переданного DataFrame.
 
     Аргументы:
     dataFrame -- pandas DataFrame с данными, содержащими колонку 'close'
     candle_frame -- период для скользящего среднего (по умолчанию 18)
+    method -- сглаживание: 'sma' (по умолчанию), 'wilder' или 'ema' (см. smooth)
+    guard -- защита от деления на ноль (см. rsi_from_averages): окно без движения
+             даёт 50 вместо NaN; guard=False — прежнее поведение
 
     Возвращает:
     pandas.Series с рассчитанным RSI
@@ -32,6 +98,11 @@ def current_rsi_call(dataFrame: pandas.DataFrame, candle_frame: int = 18) -> pan
     if close.size < candle_frame:
         raise APK.DatabaseError(f"Data frame is too short: {close.size} rows, requires at least {candle_frame}.")
 
+    if method != 'sma':
+        positive, negative = gains_losses(close)
+        return rsi_from_averages(smooth(positive, candle_frame, method), smooth(negative, candle_frame, method),
+                                 guard)
+
     # [1, 3, 6, 10, 15] -> [2, 3, 4, 5]
     delta = close.diff()
 
@@ -43,18 +114,53 @@ def current_rsi_call(dataFrame: pandas.DataFrame, candle_frame: int = 18) -> pan
     avg_pos = positive.rolling(window=candle_frame, min_periods=1).mean()
     avg_neg = negative.rolling(window=candle_frame, min_periods=1).mean()
 
-    # Значение относительной силы
-    rs = avg_pos / avg_neg
+    # Индекс относительной силы (RSI) по отношению средних rs = avg_pos / avg_neg
+    return rsi_from_averages(avg_pos, avg_neg, guard)
 
-    # Индекс относительной силы (RSI)
-    rsi = 100 - (100 / (1 + rs))
 
-    return rsi
+@instrumented
+def rsi_frame(dataFrame: pandas.DataFrame, periods=(7, 14, 18, 21), method: str = DEFAULT_SMOOTHING,
+              guard: bool = True, source: str = 'close') -> pandas.DataFrame:
+    """
+    RSI для нескольких периодов. Общая часть — приросты и падения — считается
+    один раз, сглаживание выполняется отдельно для каждого периода, поэтому
+    выигрыш по сравнению с отдельными вызовами current_rsi_call невелик.
+
+    Возвращает:
+    DataFrame с колонками RSI_<период>
+    """
+    if method not in SMOOTHING:
+        raise APK.InvalidInputError(f"Неизвестный способ сглаживания RSI: {method}")
+    positive, negative = gains_losses(dataFrame[source])
+    result = pandas.DataFrame(index=dataFrame.index)
+    for period in periods:
+        result[f'RSI_{period}'] = rsi_from_averages(smooth(positive, period, method),
+                                                    smooth(negative, period, method), guard)
+    return result
+
+
+@graph.register_operation('rsi')
+def rsi_operation(avg_pos: pandas.Series, avg_neg: pandas.Series) -> pandas.Series:
+    """RSI по средним приростам и падениям, как в current_rsi_call."""
+    return rsi_from_averages(avg_pos, avg_neg)
+
+
+def rsi_node(candle_frame: int = 18, source: str = 'close') -> tuple:
+    """Узел графа индикаторов, эквивалентный current_rsi_call."""
+    delta = graph.diff(source)
+    return graph.node('rsi',
+                      graph.rolling_mean(graph.gain(delta), candle_frame, min_periods=1),
+                      graph.rolling_mean(graph.loss(delta), candle_frame, min_periods=1))
+
+
+@graph.register_indicator('RSI', candle_frame=18)
+def rsi_indicator(candle_frame: int) -> dict:
+    return {'RSI': rsi_node(candle_frame)}
 
 
 if __name__ == "__main__":
     # Чтение данных из файла
-    data = pandas.read_json("storage\MOEX_2024-11-12_1D_[191120].json")
+    data = pandas.read_json(os.path.join(DATA_DIR, "MOEX_2024-11-12_1D_[191120].json"))
     
     # Проверка наличия необходимого столбца 'close'
     if 'close' not in data.columns:
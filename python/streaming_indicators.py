@@ -0,0 +1,441 @@
+"""
+Потоковые (инкрементальные) версии индикаторов.
+
+Каждый объект принимает по одной свече (update) или небольшую пачку
+(update_many), обновляется за O(1) амортизированно и даёт те же значения,
+что и пакетные функции:
+    SMAState        -- close.rolling(window).mean()
+    EMAState        -- close.ewm(span, adjust=False).mean()
+    RSIState        -- rsi_call.current_rsi_call (в том числе method='wilder'/'ema')
+    BollingerState  -- bollinger_strategy.calculate_bollinger_bands + generate_signals
+    MAState         -- moving_averages.current_ma_analysis
+    StochRSIState   -- Stochastic_RSI.calculate_stochastic_rsi
+    VolumeSignalState -- volume.volume_analysis по уровням rolling_support_resistance
+    EngulfingState  -- колонка Engulfing из candlestick_patterns
+Состояние сохраняется в словарь (snapshot) и восстанавливается (restore),
+так что живой цикл может держать «горячими» сотни тикеров.
+"""
+import math
+from abc import ABC, abstractmethod
+import _AppProjectKit as APK
+from rolling_window import RollingExtremum, RollingMean
+from rsi_call import DEFAULT_SMOOTHING
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """Деление с семантикой pandas: x/0 -> ±inf, 0/0 -> NaN."""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class IndicatorState(ABC):
+    """Общий интерфейс потоковых индикаторов."""
+
+    @abstractmethod
+    def update(self, close: float):
+        """Принимает свечу и возвращает текущее значение индикатора."""
+
+    def update_many(self, closes) -> list:
+        """Последовательно применяет update к пачке свечей."""
+        return [self.update(close) for close in closes]
+
+    @abstractmethod
+    def snapshot(self) -> dict:
+        """Состояние в виде словаря, пригодного для JSON."""
+
+    @classmethod
+    @abstractmethod
+    def restore(cls, state: dict):
+        """Восстанавливает объект из snapshot, включая все аргументы конструктора."""
+
+
+class SMAState(IndicatorState):
+    """Простая скользящая средняя."""
+
+    def __init__(self, window: int = 20):
+        self.mean = RollingMean(window)
+
+    def update(self, close: float) -> float:
+        return self.mean.update(close)
+
+    @property
+    def value(self) -> float:
+        return self.mean.value
+
+    def snapshot(self) -> dict:
+        return {'mean': self.mean.snapshot()}
+
+    @classmethod
+    def restore(cls, state: dict) -> "SMAState":
+        sma = cls(state['mean']['window'])
+        sma.mean = RollingMean.restore(state['mean'])
+        return sma
+
+
+class EMAState(IndicatorState):
+    """
+    Экспоненциальная скользящая средняя (adjust=False).
+    Свечи с NaN пропускаются, значение не меняется.
+    """
+
+    def __init__(self, span: int = 9):
+        self.span = span
+        self.alpha = 2 / (span + 1)
+        self.value = math.nan
+
+    def update(self, close: float) -> float:
+        if math.isnan(close):
+            return self.value
+        if math.isnan(self.value):
+            self.value = close
+        else:
+            self.value = self.alpha * close + (1 - self.alpha) * self.value
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {'span': self.span, 'value': self.value}
+
+    @classmethod
+    def restore(cls, state: dict) -> "EMAState":
+        ema = cls(state['span'])
+        ema.value = state['value']
+        return ema
+
+
+class RSIState(IndicatorState):
+    """
+    Индекс относительной силы, как в current_rsi_call.
+
+    method='sma' -- скользящие средние приростов и падений с min_periods=1;
+    method='wilder' или 'ema' -- экспоненциальное сглаживание за O(1) без окна,
+    с защитой от деления на ноль (см. rsi_call.rsi_from_averages).
+    """
+
+    def __init__(self, candle_frame: int = 18, method: str = DEFAULT_SMOOTHING):
+        if method not in ('sma', 'wilder', 'ema'):
+            raise APK.InvalidInputError(f"Неизвестный способ сглаживания RSI: {method}")
+        self.candle_frame = candle_frame
+        self.method = method
+        if method == 'sma':
+            self.avg_pos = RollingMean(candle_frame, min_periods=1)
+            self.avg_neg = RollingMean(candle_frame, min_periods=1)
+        else:
+            # Уайлдер: alpha = 1/n после затравки средним первых n изменений
+            self.alpha = 1 / candle_frame if method == 'wilder' else 2 / (candle_frame + 1)
+            self.avg_pos = self.avg_neg = math.nan
+            self.count = 0
+        self.prev_close = math.nan
+        self.value = math.nan
+
+    def update(self, close: float) -> float:
+        delta = close - self.prev_close
+        self.prev_close = close
+        # Как delta.where(delta > 0, 0): NaN превращается в ноль
+        positive = delta if delta > 0 else 0.0
+        negative = -delta if delta < 0 else 0.0
+        if self.method == 'sma':
+            avg_pos, avg_neg = self.avg_pos.update(positive), self.avg_neg.update(negative)
+            if avg_pos == 0 and avg_neg == 0:
+                # Окно без движения, как rsi_from_averages с защитой
+                self.value = 50.0
+                return self.value
+            rs = _divide(avg_pos, avg_neg)
+            self.value = 100 - _divide(100, 1 + rs) if not math.isinf(rs) else 100.0
+            return self.value
+
+        if math.isnan(delta):
+            return self.value
+        self.count += 1
+        if self.method == 'wilder' and self.count <= self.candle_frame:
+            # Затравка: пока копим суммы, значения нет
+            self.avg_pos = positive if self.count == 1 else self.avg_pos + positive
+            self.avg_neg = negative if self.count == 1 else self.avg_neg + negative
+            if self.count < self.candle_frame:
+                return self.value
+            self.avg_pos /= self.candle_frame
+            self.avg_neg /= self.candle_frame
+        elif self.count == 1:
+            self.avg_pos, self.avg_neg = positive, negative
+        else:
+            self.avg_pos += self.alpha * (positive - self.avg_pos)
+            self.avg_neg += self.alpha * (negative - self.avg_neg)
+
+        if self.avg_neg == 0:
+            self.value = 100.0 if self.avg_pos > 0 else 50.0
+        else:
+            self.value = 100 - 100 / (1 + self.avg_pos / self.avg_neg)
+        return self.value
+
+    def snapshot(self) -> dict:
+        state = {'candle_frame': self.candle_frame, 'method': self.method,
+                 'prev_close': self.prev_close, 'value': self.value}
+        if self.method == 'sma':
+            state.update(avg_pos=self.avg_pos.snapshot(), avg_neg=self.avg_neg.snapshot())
+        else:
+            state.update(avg_pos=self.avg_pos, avg_neg=self.avg_neg, count=self.count)
+        return state
+
+    @classmethod
+    def restore(cls, state: dict) -> "RSIState":
+        rsi = cls(state['candle_frame'], state['method'])
+        if rsi.method == 'sma':
+            rsi.avg_pos = RollingMean.restore(state['avg_pos'])
+            rsi.avg_neg = RollingMean.restore(state['avg_neg'])
+        else:
+            rsi.avg_pos, rsi.avg_neg, rsi.count = state['avg_pos'], state['avg_neg'], state['count']
+        rsi.prev_close = state['prev_close']
+        rsi.value = state['value']
+        return rsi
+
+
+class BollingerState(IndicatorState):
+    """
+    Полосы Боллинджера и сигнал: 1 — цена ниже нижней полосы, -1 — выше верхней.
+    Position — последний ненулевой сигнал.
+    """
+
+    def __init__(self, window: int = 20, k: float = 2):
+        self.k = k
+        self.mean = RollingMean(window)
+        self.position = 0
+        self.value = {}
+
+    def update(self, close: float) -> dict:
+        sma = self.mean.update(close)
+        std = self.mean.std
+        upper = sma + self.k * std
+        lower = sma - self.k * std
+
+        signal = 0
+        if close < lower:
+            signal = 1
+        elif close > upper:
+            signal = -1
+        if signal != 0:
+            self.position = signal
+
+        self.value = {'SMA': sma, 'STD': std, 'Upper': upper, 'Lower': lower,
+                      'Signal': signal, 'Position': self.position}
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {'k': self.k, 'mean': self.mean.snapshot(), 'position': self.position, 'value': self.value}
+
+    @classmethod
+    def restore(cls, state: dict) -> "BollingerState":
+        bollinger = cls(state['mean']['window'], state['k'])
+        bollinger.mean = RollingMean.restore(state['mean'])
+        bollinger.position = state['position']
+        bollinger.value = state['value']
+        return bollinger
+
+
+def _crossover(curr_fast: float, curr_slow: float, prev_fast: float, prev_slow: float) -> int:
+    """1 — быстрая линия пересекла медленную снизу вверх, -1 — сверху вниз, иначе 0."""
+    if curr_fast > curr_slow and prev_fast <= prev_slow:
+        return 1
+    if curr_fast < curr_slow and prev_fast >= prev_slow:
+        return -1
+    return 0
+
+
+class MAState(IndicatorState):
+    """
+    Скользящие средние current_ma_analysis: SMA(long), EMA(short),
+    волатильность доходностей и MA_Signal по пересечению EMA(short) и EMA(long).
+    """
+
+    def __init__(self, short_period: int = 9, long_period: int = 21):
+        self.short_period = short_period
+        self.long_period = long_period
+        self.sma = SMAState(long_period)
+        self.short_ema = EMAState(short_period)
+        self.long_ema = EMAState(long_period)
+        self.returns = RollingMean(short_period)
+        self.prev_close = math.nan
+        self.value = {}
+
+    def update(self, close: float) -> dict:
+        prev_short, prev_long = self.short_ema.value, self.long_ema.value
+        short_ma = self.short_ema.update(close)
+        long_ma = self.long_ema.update(close)
+
+        change = _divide(close, self.prev_close) - 1
+        self.prev_close = close
+        self.returns.update(change)
+
+        self.value = {
+            'SMA': self.sma.update(close),
+            'EMA': short_ma,
+            'Volatility': self.returns.std * math.sqrt(self.short_period),
+            'MA_Signal': _crossover(short_ma, long_ma, prev_short, prev_long),
+        }
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {'short_period': self.short_period, 'long_period': self.long_period,
+                'sma': self.sma.snapshot(), 'short_ema': self.short_ema.snapshot(),
+                'long_ema': self.long_ema.snapshot(), 'returns': self.returns.snapshot(),
+                'prev_close': self.prev_close, 'value': self.value}
+
+    @classmethod
+    def restore(cls, state: dict) -> "MAState":
+        ma = cls(state['short_period'], state['long_period'])
+        ma.sma = SMAState.restore(state['sma'])
+        ma.short_ema = EMAState.restore(state['short_ema'])
+        ma.long_ema = EMAState.restore(state['long_ema'])
+        ma.returns = RollingMean.restore(state['returns'])
+        ma.prev_close = state['prev_close']
+        ma.value = state['value']
+        return ma
+
+
+class StochRSIState(IndicatorState):
+    """
+    Стохастический RSI: экстремумы RSI на монотонных деках,
+    сглаживание %K и %D бегущими суммами.
+    """
+
+    def __init__(self, period: int = 14, smooth_k: int = 3, smooth_d: int = 3):
+        self.period = period
+        self.smooth_k = smooth_k
+        self.smooth_d = smooth_d
+        self.rsi = RSIState(period)
+        self.lowest = RollingExtremum(period, "min")
+        self.highest = RollingExtremum(period, "max")
+        self.k_mean = RollingMean(smooth_k)
+        self.d_mean = RollingMean(smooth_d)
+        self.value = {'RSI': math.nan, 'StochRSI_K': math.nan, 'StochRSI_D': math.nan, 'StochRSI_Signal': 0}
+
+    def update(self, close: float) -> dict:
+        prev_k, prev_d = self.value['StochRSI_K'], self.value['StochRSI_D']
+        rsi = self.rsi.update(close)
+        lowest = self.lowest.update(rsi)
+        highest = self.highest.update(rsi)
+
+        raw_k = math.nan
+        if self.lowest.valid >= self.period:
+            raw_k = _divide(100 * (rsi - lowest), highest - lowest)
+        k = self.k_mean.update(raw_k)
+        d = self.d_mean.update(k)
+
+        signal = 0
+        if k > d and prev_k <= prev_d and k < 20:
+            signal = 1
+        elif k < d and prev_k >= prev_d and k > 80:
+            signal = -1
+
+        self.value = {'RSI': rsi, 'StochRSI_K': k, 'StochRSI_D': d, 'StochRSI_Signal': signal}
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {'period': self.period, 'smooth_k': self.smooth_k, 'smooth_d': self.smooth_d,
+                'rsi': self.rsi.snapshot(),
+                'lowest': self.lowest.snapshot(), 'highest': self.highest.snapshot(),
+                'k_mean': self.k_mean.snapshot(), 'd_mean': self.d_mean.snapshot(), 'value': self.value}
+
+    @classmethod
+    def restore(cls, state: dict) -> "StochRSIState":
+        stoch = cls(state['period'], state['smooth_k'], state['smooth_d'])
+        stoch.rsi = RSIState.restore(state['rsi'])
+        stoch.lowest = RollingExtremum.restore(state['lowest'])
+        stoch.highest = RollingExtremum.restore(state['highest'])
+        stoch.k_mean = RollingMean.restore(state['k_mean'])
+        stoch.d_mean = RollingMean.restore(state['d_mean'])
+        stoch.value = state['value']
+        return stoch
+
+
+class VolumeSignalState(IndicatorState):
+    """
+    Volume_Signal последней свечи: уровни поддержки и сопротивления — минимум
+    и максимум close за lookback предыдущих свечей, без текущей, как в
+    volume.rolling_support_resistance (индикатор Volume с rolling=True),
+    поэтому пробой уровня (±2) возможен.
+    """
+
+    def __init__(self, lookback: int = 20):
+        self.lookback = lookback
+        self.support = RollingExtremum(lookback, "min")
+        self.resistance = RollingExtremum(lookback, "max")
+        self.prev_close = math.nan
+        self.prev_volume = math.nan
+        self.value = 0
+
+    def update(self, close: float, volume: float) -> int:
+        # Уровни окна до текущей свечи; close добавляется в окно после сравнения
+        support = self.support.value
+        resistance = self.resistance.value
+        self.support.update(close)
+        self.resistance.update(close)
+
+        signal = 0
+        if volume > self.prev_volume:
+            if close < support:
+                signal = -2
+            elif close > resistance:
+                signal = 2
+            elif close > self.prev_close:
+                signal = 1
+            elif close < self.prev_close:
+                signal = -1
+
+        self.prev_close = close
+        self.prev_volume = volume
+        self.value = signal
+        return self.value
+
+    def update_many(self, closes, volumes) -> list:
+        return [self.update(close, volume) for close, volume in zip(closes, volumes)]
+
+    def snapshot(self) -> dict:
+        return {'lookback': self.lookback, 'support': self.support.snapshot(),
+                'resistance': self.resistance.snapshot(), 'prev_close': self.prev_close,
+                'prev_volume': self.prev_volume, 'value': self.value}
+
+    @classmethod
+    def restore(cls, state: dict) -> "VolumeSignalState":
+        volume = cls(state['lookback'])
+        volume.support = RollingExtremum.restore(state['support'])
+        volume.resistance = RollingExtremum.restore(state['resistance'])
+        volume.prev_close = state['prev_close']
+        volume.prev_volume = state['prev_volume']
+        volume.value = state['value']
+        return volume
+
+
+class EngulfingState(IndicatorState):
+    """Паттерн поглощения: 'Bullish Engulfing', 'Bearish Engulfing' или False."""
+
+    def __init__(self):
+        self.prev_open = math.nan
+        self.prev_close = math.nan
+        self.value = False
+
+    def update(self, open_: float, close: float):
+        po, pc = self.prev_open, self.prev_close
+        if pc < po and close > open_ and open_ < pc and close > po:
+            self.value = 'Bullish Engulfing'
+        elif pc > po and close < open_ and open_ > pc and close < po:
+            self.value = 'Bearish Engulfing'
+        else:
+            self.value = False
+        self.prev_open, self.prev_close = open_, close
+        return self.value
+
+    def update_many(self, opens, closes) -> list:
+        return [self.update(open_, close) for open_, close in zip(opens, closes)]
+
+    def snapshot(self) -> dict:
+        return {'prev_open': self.prev_open, 'prev_close': self.prev_close, 'value': self.value}
+
+    @classmethod
+    def restore(cls, state: dict) -> "EngulfingState":
+        engulfing = cls()
+        engulfing.prev_open = state['prev_open']
+        engulfing.prev_close = state['prev_close']
+        engulfing.value = state['value']
+        return engulfing
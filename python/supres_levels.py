@@ -1,4 +1,4 @@
-import requests
+import numpy
 import pandas
 import datetime
 import os
@@ -6,11 +6,10 @@ import re as regular
 import datetime
 """import data_collector"""
 import _AppProjectKit as APK
+from instrumentation import instrumented
 
 # Директория для хранения данных
 DATA_DIR = "storage"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)  # Создать директорию, если она отсутствует
 
 # Строчный класс, содержащий дневные уровни
 """class todaySupRes:
@@ -28,19 +27,98 @@ if not os.path.exists(DATA_DIR):
         """
 
 
-def today_levels(dataFrame: pandas.DataFrame) -> APK.todaySupRes:
+# Методы расчёта уровней: имя -> функция(high, low, close) -> словарь уровней.
+# Функции работают и со скалярами, и с массивами/Series.
+LEVEL_METHODS = {}
+
+# Порядок уровней, как в APK.todaySupRes
+LEVEL_NAMES = ['pivot', 'resistance_1', 'resistance_2', 'resistance_3', 'support_1', 'support_2', 'support_3']
+
+
+def register_levels(name: str):
+    """Декоратор, регистрирующий метод расчёта уровней."""
+    def decorator(function):
+        LEVEL_METHODS[name] = function
+        return function
+    return decorator
+
+
+@register_levels('classic')
+def classic_levels(high, low, close) -> dict:
+    pivot = (high + low + close) / 3
+    return {
+        'pivot': pivot,
+        'resistance_1': 2 * pivot - low,
+        'resistance_2': pivot + (high - low),
+        'resistance_3': pivot + 2 * (high - low),
+        'support_1': 2 * pivot - high,
+        'support_2': pivot - (high - low),
+        'support_3': pivot - 2 * (high - low),
+    }
+
+
+@register_levels('fibonacci')
+def fibonacci_levels(high, low, close) -> dict:
+    pivot = (high + low + close) / 3
+    span = high - low
+    return {
+        'pivot': pivot,
+        'resistance_1': pivot + 0.382 * span,
+        'resistance_2': pivot + 0.618 * span,
+        'resistance_3': pivot + span,
+        'support_1': pivot - 0.382 * span,
+        'support_2': pivot - 0.618 * span,
+        'support_3': pivot - span,
+    }
+
+
+@register_levels('camarilla')
+def camarilla_levels(high, low, close) -> dict:
+    pivot = (high + low + close) / 3
+    span = (high - low) * 1.1
+    return {
+        'pivot': pivot,
+        'resistance_1': close + span / 12,
+        'resistance_2': close + span / 6,
+        'resistance_3': close + span / 4,
+        'support_1': close - span / 12,
+        'support_2': close - span / 6,
+        'support_3': close - span / 4,
+    }
+
+
+@register_levels('woodie')
+def woodie_levels(high, low, close) -> dict:
+    pivot = (high + low + 2 * close) / 4
+    return {
+        'pivot': pivot,
+        'resistance_1': 2 * pivot - low,
+        'resistance_2': pivot + (high - low),
+        'resistance_3': high + 2 * (pivot - low),
+        'support_1': 2 * pivot - high,
+        'support_2': pivot - (high - low),
+        'support_3': low - 2 * (high - pivot),
+    }
+
+
+@instrumented
+def today_levels(dataFrame: pandas.DataFrame, method: str = 'classic') -> APK.todaySupRes:
     """
     Рассчитывает дневные уровни поддержки и сопротивления для переданного DataFrame.
 
     Аргументы:
     dataFrame -- pandas DataFrame с свечами
+    method -- метод расчёта из LEVEL_METHODS (classic, fibonacci, camarilla, woodie)
     
     Возвращает:
     Объект класса todaySupRes
     """
+    if method not in LEVEL_METHODS:
+        raise APK.InvalidInputError(f"Неизвестный метод уровней: {method}")
+
     #фильтрация фрейма по сегодняшним свечам
-    now = datetime.datetime.now().date()
-    now_data = dataFrame.loc[dataFrame['begin'] >= now.strftime("%Y-%m-%d")]
+    now = pandas.Timestamp(datetime.datetime.now().date())
+    now_data = dataFrame.loc[pandas.to_datetime(dataFrame['begin']) >= now]
 
     #проаерка на пустоту
     if now_data.empty: raise APK.DatabaseError(f"dataframe is empty")
@@ -51,21 +129,82 @@ def today_levels(dataFrame: pandas.DataFrame) -> APK.todaySupRes:
     close = now_data['close'].iloc[-1]
 
     #вычисления
-    pivot = (high + low + close) / 3
-    resistance_1 = 2 * pivot - low
-    resistance_2 = pivot + (high - low)
-    resistance_3 = pivot + 2 * (high - low)
-    support_1 = 2 * pivot - high
-    support_2 = pivot - (high - low)
-    support_3 = pivot - 2 * (high - low)
-
-    levels_class = APK.todaySupRes(pivot, resistance_1, resistance_2, resistance_3, support_1, support_2, support_3)
+    levels = LEVEL_METHODS[method](high, low, close)
+
+    levels_class = APK.todaySupRes(*(levels[name] for name in LEVEL_NAMES))
     return levels_class
 
 
+def session_levels(dataFrame: pandas.DataFrame, methods=('classic',)) -> pandas.DataFrame:
+    """
+    Уровни по итогам каждой торговой сессии (календарного дня) за всю историю.
+
+    Возвращает:
+    DataFrame с индексом по дате сессии: high, low, close сессии
+    и колонки <метод>_<уровень> для каждого метода.
+    """
+    unknown = [method for method in methods if method not in LEVEL_METHODS]
+    if unknown:
+        raise APK.InvalidInputError(f"Неизвестные методы уровней: {', '.join(unknown)}")
+    if 'begin' not in dataFrame.columns:
+        raise APK.InvalidInputError("Data does not contain 'begin' column.")
+
+    session = pandas.to_datetime(dataFrame['begin']).dt.normalize().rename('session')
+    sessions = dataFrame.groupby(session, sort=True).agg(high=('high', 'max'), low=('low', 'min'),
+                                                         close=('close', 'last'))
+    for method in methods:
+        levels = LEVEL_METHODS[method](sessions['high'], sessions['low'], sessions['close'])
+        for name in LEVEL_NAMES:
+            sessions[f'{method}_{name}'] = levels[name]
+    return sessions
+
+
+def history_levels(dataFrame: pandas.DataFrame, methods=('classic',), mode: str = 'previous') -> pandas.DataFrame:
+    """
+    Уровни, действовавшие на момент каждой свечи, выровненные по её строкам.
+
+    Аргументы:
+    methods -- методы из LEVEL_METHODS
+    mode -- "previous": уровни по итогам предыдущей сессии (классический вариант,
+            без заглядывания вперёд); "running": уровни по данным текущей сессии
+            до этой свечи включительно — то, что вернул бы today_levels в тот момент
+
+    Возвращает:
+    DataFrame с индексом dataFrame и колонками <метод>_<уровень>.
+    """
+    if mode not in ('previous', 'running'):
+        raise APK.InvalidInputError("mode must be 'previous' or 'running'")
+    unknown = [method for method in methods if method not in LEVEL_METHODS]
+    if unknown:
+        raise APK.InvalidInputError(f"Неизвестные методы уровней: {', '.join(unknown)}")
+
+    if mode == 'previous':
+        sessions = session_levels(dataFrame, methods).drop(columns=['high', 'low', 'close'])
+        session = pandas.to_datetime(dataFrame['begin']).dt.normalize()
+        # Сессия i получает уровни сессии i-1
+        code = sessions.index.get_indexer(session) - 1
+        values = sessions.to_numpy()
+        result = numpy.full((len(dataFrame), values.shape[1]), numpy.nan)
+        valid = code >= 0
+        result[valid] = values[code[valid]]
+        return pandas.DataFrame(result, index=dataFrame.index, columns=sessions.columns)
+
+    session = pandas.to_datetime(dataFrame['begin']).dt.normalize()
+    grouped = dataFrame.groupby(session, sort=False)
+    high = grouped['high'].cummax()
+    low = grouped['low'].cummin()
+    close = dataFrame['close']
+    result = pandas.DataFrame(index=dataFrame.index)
+    for method in methods:
+        levels = LEVEL_METHODS[method](high, low, close)
+        for name in LEVEL_NAMES:
+            result[f'{method}_{name}'] = levels[name]
+    return result
+
+
 if __name__ == "__main__":
     # Чтение данных из файла
-    data = pandas.read_json("storage\MOEX_2024-11-12_1D_[191120].json")
+    data = pandas.read_json(os.path.join(DATA_DIR, "MOEX_2024-11-12_1D_[191120].json"))
     
     # Проверка наличия необходимого столбца 'begin'
     if 'begin' not in data.columns:
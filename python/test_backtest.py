@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+import pandas as pd
+import _AppProjectKit as APK
+from bollinger_strategy import calculate_bollinger_bands, generate_signals, calculate_returns
+from backtest import backtest, combine_signals, positions, to_signal
+
+
+def make_frame(rows, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=rows)))
+    return pd.DataFrame({'begin': pd.date_range('2024-01-01', periods=rows, freq='h'), 'close': close,
+                         'MA_Signal': rng.choice([-1, 0, 0, 0, 0, 1], size=rows).astype(float)})
+
+
+class TestBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = {'SBER': make_frame(1500, 1), 'GAZP': make_frame(800, 2)}
+
+    def test_matches_calculate_returns(self):
+        """Без издержек доходность совпадает с calculate_returns, а сделки складываются в неё же."""
+        expected = {}
+        for ticker, frame in self.frames.items():
+            frame['Signal'] = generate_signals(calculate_bollinger_bands(frame.copy()))['Signal'].astype(float)
+            expected[ticker] = calculate_returns(generate_signals(calculate_bollinger_bands(frame.copy())))
+
+        result = backtest(self.frames, 'Signal')
+        for ticker, data in expected.items():
+            row = result.summary.set_index('ticker').loc[ticker]
+            self.assertAlmostEqual(row['total_return'], data['Cumulative_Returns'].iloc[-1] - 1, places=10)
+            trades = result.trades[result.trades['ticker'] == ticker]
+            self.assertAlmostEqual(np.prod(1 + trades['return']) - 1, row['total_return'], places=10)
+            self.assertEqual(row['trades'], len(trades))
+        # Позиция первого тикера не переходит на первую свечу второго
+        first = result.equity.groupby('ticker').head(1)
+        self.assertTrue((first['strategy_returns'] == 0).all())
+
+    def test_costs_and_sizing(self):
+        """Издержки списываются с оборота, размер позиции ограничен max_leverage."""
+        free = backtest(self.frames, 'MA_Signal')
+        paid = backtest(self.frames, 'MA_Signal', commission=0.0005, slippage_bps=5)
+        np.testing.assert_allclose(paid.summary['costs'], free.summary['turnover'] * 0.001)
+        self.assertTrue((paid.summary['total_return'] < free.summary['total_return']).all())
+
+        sized = backtest(self.frames, 'MA_Signal', vol_target=0.002, max_leverage=0.5)
+        self.assertLessEqual(sized.equity['position'].abs().max(), 0.5)
+        self.assertTrue((sized.equity.groupby('ticker')['position'].head(20) == 0).all())
+
+        longs = backtest(self.frames, 'MA_Signal', direction='long')
+        self.assertTrue((longs.trades['direction'] == 1).all())
+
+    def test_signal_rules(self):
+        """Свечные флажки и правила объединения сигналов."""
+        np.testing.assert_array_equal(to_signal(np.array(['Bullish Engulfing', False, 'Bearish Engulfing'],
+                                                         dtype=object)), [1, 0, -1])
+        np.testing.assert_array_equal(to_signal(np.array([True, False]), 'HangingMan'), [-1, 0])
+        frame = pd.DataFrame({'a': [1, 1, -1, 0], 'b': [1, -1, -1, 1], 'c': [1, -1, 0, 1]})
+        np.testing.assert_array_equal(combine_signals(frame, ['a', 'b', 'c'], 'all'), [1, 0, 0, 0])
+        np.testing.assert_array_equal(combine_signals(frame, ['a', 'b', 'c'], 'sum'), [1, -1, -1, 1])
+        np.testing.assert_array_equal(combine_signals(frame, ['a', 'b', 'c'], 'any'), [1, 1, -1, 1])
+
+        signal = np.array([1, 0, 0, 0, 0, -1, 0, 0], dtype=np.int8)
+        np.testing.assert_array_equal(positions(signal, [8], hold_bars=2), [1, 1, 0, 0, 0, -1, -1, 0])
+        np.testing.assert_array_equal(positions(signal, [3, 5]), [1, 1, 1, 0, 0, -1, -1, -1])
+        with self.assertRaises(APK.InvalidInputError):
+            backtest(self.frames, 'Missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
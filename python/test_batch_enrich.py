@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import _AppProjectKit as APK
+import indicator_graph as graph
+from candle_store import CandleStore
+from batch_enrich import batch_enrich, list_jobs
+
+
+class TestBatchEnrich(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp, 'data')
+        self.output = os.path.join(self.tmp, 'enriched')
+        self.store = CandleStore(os.path.join(self.tmp, 'candles'))
+        os.makedirs(self.data_dir)
+
+        rng = np.random.default_rng(3)
+        self.frames = {}
+        for i, ticker in enumerate(('SBER', 'GAZP', 'LKOH')):
+            T = 300
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=T)))
+            open_ = close * rng.uniform(0.99, 1.01, size=T)
+            frame = pd.DataFrame({
+                'open': open_, 'close': close,
+                'high': np.maximum(open_, close) * 1.01,
+                'low': np.minimum(open_, close) * 0.99,
+                'value': close * 1000, 'volume': rng.integers(1000, 10000, size=T).astype(float),
+                'begin': pd.date_range('2024-01-01', periods=T, freq='D'),
+            })
+            self.frames[ticker] = frame
+            if i < 2:
+                frame.to_json(os.path.join(self.data_dir, f'{ticker}.json'))
+            else:
+                self.store.write(ticker, 24, frame)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_enrich_all_sources(self):
+        """Файлы JSON и разделы хранилища обогащаются в пуле процессов."""
+        jobs = list_jobs("all", self.data_dir, self.store.root)
+        self.assertEqual(len(jobs), 3)
+
+        seen = []
+        summaries = batch_enrich(jobs, self.output, max_workers=2, chunksize=1,
+                                 progress=lambda done, total, s: seen.append(done), store_root=self.store.root)
+        self.assertEqual(sorted(seen), [1, 2, 3])
+        self.assertEqual([s['job'] for s in summaries], jobs)
+
+        for summary in summaries:
+            ticker = os.path.basename(summary['output']).split('_')[0].split('.')[0]
+            result = pd.read_json(summary['output'])
+            expected = graph.enrich(self.frames[ticker])
+            np.testing.assert_allclose(result['RSI'], expected['RSI'])
+            self.assertEqual(result['StochRSI_Signal'].tolist(), expected['StochRSI_Signal'].tolist())
+            self.assertEqual(result['Volume_Signal'].tolist(), expected['Volume_Signal'].tolist())
+
+    def test_errors(self):
+        """Ошибки заданий поднимаются или возвращаются в сводках."""
+        with open(os.path.join(self.data_dir, 'BROKEN.json'), 'w') as f:
+            f.write('{"close": ')
+        jobs = list_jobs("json", self.data_dir)
+        with self.assertRaises(APK.DatabaseError):
+            batch_enrich(jobs, self.output, max_workers=2, progress=None)
+        summaries = batch_enrich(jobs, self.output, max_workers=2, progress=None, errors="skip")
+        self.assertEqual(sum(1 for s in summaries if s['error']), 1)
+
+    def test_skip_any_exception(self):
+        """Неожиданные исключения задания (не ошибки приложения) тоже не прерывают пакет."""
+        with open(os.path.join(self.data_dir, 'TEXT.json'), 'w') as f:
+            f.write('{"close": {"0": "a", "1": "b"}}')
+        jobs = list_jobs("json", self.data_dir)
+        summaries = batch_enrich(jobs, self.output, {'RSI': None}, max_workers=2, progress=None,
+                                 errors="skip")
+        errors = {os.path.basename(s['job'][1]): s['error'] for s in summaries}
+        self.assertTrue(errors['TEXT.json'].startswith('TypeError'))
+        self.assertIsNone(errors['SBER.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
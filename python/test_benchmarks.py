@@ -0,0 +1,54 @@
+import unittest
+import _AppProjectKit as APK
+from benchmarks import BENCHMARKS, generate_ohlcv, run_suite, compare, measure, register_benchmark
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_generate_ohlcv(self):
+        """Синтетические свечи согласованы: low <= open, close <= high."""
+        frame = generate_ohlcv(500, seed=1)
+        self.assertEqual(len(frame), 500)
+        self.assertTrue((frame['low'] <= frame[['open', 'close']].min(axis=1)).all())
+        self.assertTrue((frame['high'] >= frame[['open', 'close']].max(axis=1)).all())
+
+    def test_suite_smoke(self):
+        """Все бенчмарки выполняются на маленькой сетке, сравнение отчётов работает."""
+        report = run_suite(rows=(300,), tickers=(1, 2), repeat=1, progress=None)
+        self.assertEqual(len(report['results']), 2 * len(BENCHMARKS))
+        for result in report['results']:
+            self.assertGreater(result['min_s'], 0)
+            self.assertIsNotNone(result['peak_mb'])
+        rows = compare(report, report)
+        self.assertEqual(len(rows), len(report['results']))
+        self.assertFalse(any(row['regression'] for row in rows))
+
+    def test_setup_outside_timing(self):
+        """Подготовка входа выполняется один раз вне замера и освобождается после него."""
+        calls = {'setup': 0, 'run': [], 'teardown': 0}
+
+        def setup(frame):
+            calls['setup'] += 1
+            return len(frame)
+
+        def teardown(prepared):
+            calls['teardown'] += 1
+
+        register_benchmark('_prepared', setup=setup, teardown=teardown)(calls['run'].append)
+        try:
+            measure('_prepared', 300, tickers=2, repeat=2, memory=False)
+        finally:
+            del BENCHMARKS['_prepared']
+        # Два тикера и один фрейм прогрева
+        self.assertEqual(calls['setup'], 3)
+        self.assertEqual(calls['teardown'], 3)
+        self.assertEqual(calls['run'], [100, 300, 300, 300, 300])
+
+        # Вход из setup не копируется, поэтому mutates с setup отклоняется при регистрации
+        with self.assertRaises(APK.InvalidInputError):
+            register_benchmark('_mutating', mutates=True, setup=setup)
+        self.assertNotIn('_mutating', BENCHMARKS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,7 +8,8 @@ from bollinger_strategy import (
     calculate_returns,
     plot_bollinger_bands,
     plot_strategy_performance,
-    generate_recommendation
+    generate_recommendation,
+    sweep_parameters
 )
 
 class TestBollingerStrategy(unittest.TestCase):
@@ -109,5 +110,31 @@ class TestBollingerStrategy(unittest.TestCase):
         self.assertIn('Cumulative_Returns', data.columns)
         self.assertFalse(data['Cumulative_Returns'].isnull().all())
 
+
+class TestBollingerSweep(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=500)))
+        self.data = pd.DataFrame({'close': close})
+
+    def test_sweep_matches_single_run(self):
+        """Строка сетки совпадает с последовательным расчётом стратегии."""
+        before = self.data.copy()
+        results = sweep_parameters({'MOEX': self.data}, windows=[10, 20], ks=[1.5, 2])
+        self.assertEqual(len(results), 4)
+        self.assertTrue(self.data.equals(before))
+
+        for row in results.itertuples():
+            data = calculate_returns(generate_signals(calculate_bollinger_bands(self.data.copy(), row.window, row.k)))
+            strategy = data['Strategy_Returns']
+            self.assertAlmostEqual(row.total_return, data['Cumulative_Returns'].iloc[-1] - 1)
+            self.assertAlmostEqual(row.sharpe, strategy.mean() / strategy.std() * np.sqrt(252))
+            equity = data['Cumulative_Returns'].fillna(1)
+            self.assertAlmostEqual(row.max_drawdown, (equity / equity.cummax() - 1).min())
+            position = data['Position'].astype(float)
+            self.assertEqual(row.trades, int((position.diff().fillna(position.iloc[0]) != 0).sum()))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
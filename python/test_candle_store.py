@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from candle_store import CandleStore, infer_interval, json_ticker, migrate_json_storage
+
+
+def make_candles(start, periods, freq='10min', seed=0):
+    """Генерирует свечной фрейм в формате apimoex."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=periods)))
+    begin = pd.date_range(start=start, periods=periods, freq=freq)
+    return pd.DataFrame({
+        'begin': begin.strftime('%Y-%m-%d %H:%M:%S'),
+        'open': close * rng.uniform(0.99, 1.01, size=periods),
+        'close': close,
+        'high': close * 1.02,
+        'low': close * 0.98,
+        'value': close * 1000,
+        'volume': rng.integers(1000, 10000, size=periods),
+    })
+
+
+class TestCandleStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = CandleStore(os.path.join(self.tmp, "candles"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_roundtrip_is_zero_copy(self):
+        """Записанные свечи читаются без потерь и поверх memmap."""
+        candles = make_candles('2024-11-12 10:00', 50)
+        self.assertEqual(self.store.write('moex', 10, candles), 50)
+
+        arrays = self.store.read_arrays('MOEX', 10)
+        self.assertIsInstance(arrays['close'], np.memmap)
+
+        frame = self.store.read_frame('MOEX', 10)
+        values = frame['close'].to_numpy()
+        self.assertTrue(isinstance(values, np.memmap) or isinstance(values.base, np.memmap))
+        np.testing.assert_allclose(frame['close'], candles['close'])
+        self.assertTrue((frame['begin'] == pd.to_datetime(candles['begin'])).all())
+        self.assertEqual(self.store.tickers(), ['MOEX'])
+        self.assertEqual(self.store.intervals('MOEX'), [10])
+
+    def test_time_range(self):
+        """Диапазон по времени включает обе границы."""
+        self.store.write('MOEX', 10, make_candles('2024-11-12 10:00', 50))
+        frame = self.store.read_frame('MOEX', 10, start='2024-11-12 11:00', end='2024-11-12 12:00')
+        self.assertEqual(len(frame), 7)
+        self.assertEqual(frame['begin'].iloc[0], pd.Timestamp('2024-11-12 11:00'))
+
+    def test_append_deduplicates_boundary(self):
+        """Дозапись заменяет граничную свечу и добавляет только новые."""
+        candles = make_candles('2024-11-12 10:00', 30)
+        self.store.write('MOEX', 10, candles.iloc[:20])
+        self.assertEqual(self.store.last_begin('MOEX', 10), pd.Timestamp('2024-11-12 13:10'))
+
+        update = candles.iloc[15:].copy()
+        update.loc[19, 'close'] = 1.0  # граничная свеча успела измениться
+        self.assertEqual(self.store.append('MOEX', 10, update), 10)
+        self.assertEqual(self.store.append('MOEX', 10, update), 0)
+
+        frame = self.store.read_frame('MOEX', 10)
+        self.assertEqual(len(frame), 30)
+        self.assertEqual(frame['close'].iloc[19], 1.0)
+        self.assertTrue(frame['begin'].is_monotonic_increasing)
+        np.testing.assert_allclose(frame['close'].iloc[20:], candles['close'].iloc[20:])
+
+    def test_infer_interval(self):
+        """Интервал определяется по шагу свечей."""
+        self.assertEqual(infer_interval(make_candles('2024-11-12', 20, '1min')['begin']), 1)
+        self.assertEqual(infer_interval(make_candles('2024-11-12', 20, 'h')['begin']), 60)
+        self.assertEqual(infer_interval(make_candles('2024-11-12', 20, 'B')['begin']), 24)
+
+    def test_migrate_json_storage(self):
+        """Миграция объединяет пересекающиеся JSON-файлы одного тикера."""
+        candles = make_candles('2024-11-12 10:00', 60)
+        candles.iloc[:40].to_json(os.path.join(self.tmp, "MOEX_2024-11-12_1D_[100000].json"))
+        candles.iloc[30:].to_json(os.path.join(self.tmp, "MOEX_2024-11-12_1D_[110000].json"))
+        # Производный файл data_preprocessor — не выгрузка тикера PREPROCESSED
+        candles.to_json(os.path.join(self.tmp, "preprocessed_MOEX_2024-11-12_1D_[100000]_[120000].json"))
+
+        report = migrate_json_storage(self.store, self.tmp)
+        self.assertEqual([(t, i, rows) for t, i, rows, _ in report], [('MOEX', 10, 60)])
+        self.assertEqual(json_ticker("storage/fees_2024-11-10_3D_[183522].json"), 'FEES')
+        self.assertIsNone(json_ticker("preprocessed_MOEX.json"))
+        np.testing.assert_allclose(self.store.read_frame('MOEX', 10)['close'], candles['close'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import numpy as np
+import pandas as pd
+from candlestick_patterns import (
+    current_candlestick_patterns,
+    register_pattern,
+    is_hammer,
+    is_hanging_man,
+    is_engulfing,
+    PATTERNS
+)
+
+
+class TestCandlestickPatterns(unittest.TestCase):
+
+    def setUp(self):
+        # Цены с шагом 0.5, чтобы встречались равные закрытия (нестрогая монотонность)
+        rng = np.random.default_rng(7)
+        T = 400
+        close = 100 + np.cumsum(rng.choice([-2, -0.5, 0, 0.5, 2], size=T))
+        open_ = close + rng.choice([-3, -1.5, -0.5, 0, 0.5, 1.5, 3], size=T)
+        self.data = pd.DataFrame({
+            'open': open_,
+            'close': close,
+            'high': np.maximum(open_, close) + rng.choice([0, 0.1, 1], size=T),
+            'low': np.minimum(open_, close) - rng.choice([0, 0.5, 3], size=T),
+        })
+
+    def test_matches_row_by_row_detectors(self):
+        """Векторные колонки совпадают с построчными is_hammer/is_hanging_man/is_engulfing."""
+        found = set()
+        for window in (1, 2, 3, 4):
+            data = self.data.copy()
+            result = current_candlestick_patterns(data, window)
+
+            expected_hammer = [is_hammer(row, data, i, window) for i, row in data.iterrows()]
+            expected_hanging = [is_hanging_man(row, data, i, window) for i, row in data.iterrows()]
+            expected_engulfing = [is_engulfing(data, i) for i in range(len(data))]
+
+            self.assertEqual(list(result.columns), ['Hammer', 'HangingMan', 'Engulfing'])
+            self.assertEqual(result['Hammer'].tolist(), expected_hammer)
+            self.assertEqual(result['HangingMan'].tolist(), expected_hanging)
+            self.assertEqual(result['Engulfing'].tolist(), expected_engulfing)
+            found.update(name for name, flags in [('Hammer', expected_hammer),
+                                                  ('HangingMan', expected_hanging),
+                                                  ('Engulfing', expected_engulfing)] if any(flags))
+        # Данные должны содержать все три паттерна, иначе сравнение бессмысленно
+        self.assertEqual(found, {'Hammer', 'HangingMan', 'Engulfing'})
+
+    def test_extra_patterns(self):
+        """Дополнительные паттерны считаются по запросу."""
+        names = ['Doji', 'Harami', 'MorningStar', 'ThreeWhiteSoldiers', 'ThreeBlackCrows']
+        result = current_candlestick_patterns(self.data.copy(), patterns=names)
+        self.assertEqual(list(result.columns), names)
+        self.assertTrue(result['Doji'].any())
+        self.assertTrue(set(result['Harami']) <= {False, 'Bullish Harami', 'Bearish Harami'})
+
+    def test_three_candle_patterns(self):
+        """MorningStar, ThreeWhiteSoldiers и ThreeBlackCrows на построенных вручную свечах."""
+        def candles(bodies):
+            open_, close = np.array(bodies, dtype=float).T
+            return pd.DataFrame({'open': open_, 'close': close,
+                                 'high': np.maximum(open_, close) + 0.5, 'low': np.minimum(open_, close) - 0.5})
+
+        cases = {
+            'MorningStar': (
+                # Длинная медвежья, маленькое тело, бычья выше середины тела первой (105)
+                [(110, 100), (99, 98.5), (99, 107)],
+                # Третья свеча закрывается ниже середины тела первой
+                [(110, 100), (99, 98.5), (99, 104)],
+            ),
+            'ThreeWhiteSoldiers': (
+                [(100, 105), (103, 108), (106, 111)],
+                # Третья открывается с разрывом выше тела второй
+                [(100, 105), (103, 108), (109, 114)],
+            ),
+            'ThreeBlackCrows': (
+                [(111, 106), (108, 103), (105, 100)],
+                # Третья закрывается выше закрытия второй
+                [(111, 106), (108, 103), (104, 103.5)],
+            ),
+        }
+        for name, (positive, negative) in cases.items():
+            result = current_candlestick_patterns(candles(positive), patterns=[name])
+            self.assertEqual(result[name].tolist(), [False, False, True], name)
+            result = current_candlestick_patterns(candles(negative), patterns=[name])
+            self.assertEqual(result[name].tolist(), [False, False, False], name)
+
+    def test_register_pattern(self):
+        """Новое правило регистрируется и вычисляется вместе с остальными."""
+        @register_pattern('LongBody')
+        def long_body(f):
+            return f['body'] > 1
+        try:
+            result = current_candlestick_patterns(self.data.copy(), patterns=['LongBody'])
+            self.assertEqual(result['LongBody'].tolist(),
+                             ((self.data['close'] - self.data['open']).abs() > 1).tolist())
+        finally:
+            del PATTERNS['LongBody']
+
+
+if __name__ == '__main__':
+    unittest.main()
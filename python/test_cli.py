@@ -0,0 +1,89 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from cli import main
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestCli(unittest.TestCase):
+
+    def test_imports_have_no_side_effects(self):
+        """Импорт модулей не создаёт storage/ и не тянет matplotlib и requests."""
+        with tempfile.TemporaryDirectory() as directory:
+            code = ("import sys, cli, indicator_graph, data_storage, backtest, resample;"
+                    "indicator_graph.load_indicators();"
+                    "print(sorted({'matplotlib', 'requests'} & set(sys.modules)))")
+            result = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True, text=True,
+                                    env={**os.environ, "PYTHONPATH": HERE})
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout.strip(), "[]")
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_signals_and_backtest(self):
+        """signals и backtest работают по JSON-файлу; ошибка данных — код 1 без трассировки."""
+        rng = np.random.default_rng(0)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=200)))
+        frame = pd.DataFrame({'begin': pd.date_range('2024-01-01', periods=200, freq='D').astype(str),
+                              'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                              'volume': rng.integers(1000, 5000, size=200).astype(float)})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "SBER_test.json")
+            frame.to_json(path)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(main(["signals", path, "--quiet", "--tail", "5"]), 0)
+                self.assertEqual(main(["backtest", path, "--signal", "MA_Signal", "--commission", "0.001"]), 0)
+            self.assertIn("Рекомендация", output.getvalue())
+            self.assertIn("total_return", output.getvalue())
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(main(["signals", os.path.join(directory, "missing"), "--quiet"]), 1)
+
+    def test_instrumented_stages(self):
+        """С TRADEBOT_INSTRUMENT=1 сводка main.py содержит этапы загрузки, индикаторов и вывода."""
+        rng = np.random.default_rng(2)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=100)))
+        frame = pd.DataFrame({'begin': pd.date_range('2024-01-01', periods=100, freq='D').astype(str),
+                              'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                              'volume': rng.integers(1000, 5000, size=100).astype(float)})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "SBER_test.json")
+            frame.to_json(path)
+            result = subprocess.run([sys.executable, os.path.join(HERE, "main.py"), "signals", path, "--quiet"],
+                                    cwd=directory, capture_output=True, text=True,
+                                    env={**os.environ, "PYTHONPATH": HERE, "TRADEBOT_INSTRUMENT": "1"})
+        self.assertEqual(result.returncode, 0, result.stderr)
+        stages = {line.split()[0]: int(line.split()[1]) for line in result.stdout.splitlines()
+                  if line.startswith("cli.")}
+        self.assertEqual(stages, {"cli.load": 1, "cli.indicators": 1, "cli.output": 1})
+
+    def test_report_merges_dumps(self):
+        """report объединяет несколько выгрузок одного тикера: события берутся по всей истории."""
+        rng = np.random.default_rng(1)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=300)))
+        frame = pd.DataFrame({'begin': pd.date_range('2024-01-01', periods=300, freq='D').astype(str),
+                              'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                              'volume': rng.integers(1000, 5000, size=300).astype(float)})
+        with tempfile.TemporaryDirectory() as directory:
+            first = os.path.join(directory, "SBER_2024-01-01_1D_[100000].json")
+            second = os.path.join(directory, "SBER_2024-06-01_1D_[110000].json")
+            frame.iloc[:180].to_json(first)
+            frame.iloc[150:].to_json(second)
+            output = os.path.join(directory, "reports")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(main(["report", first, second, "--output", output, "--formats", "csv"]), 0)
+            events = pd.read_csv(os.path.join(output, "signals.csv"))
+            self.assertEqual(list(events['ticker'].unique()), ['SBER'])
+            begin = pd.to_datetime(events['begin'])
+            self.assertLess(begin.min(), pd.Timestamp('2024-05-01'))
+            self.assertGreater(begin.max(), pd.Timestamp('2024-07-01'))
+
+
+if __name__ == '__main__':
+    unittest.main()
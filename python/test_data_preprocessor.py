@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+import pandas as pd
+import indicator_graph as graph
+from benchmarks import generate_ohlcv
+from moving_averages import current_ma_analysis
+from Stochastic_RSI import calculate_stochastic_rsi
+from volume import find_support_resistance, volume_analysis
+from data_preprocessor import fits_float32, compact_candles, compact_indicators, memory_per_million
+
+
+class TestCompactFrames(unittest.TestCase):
+
+    def setUp(self):
+        self.data = generate_ohlcv(5000, seed=4)
+        for name in ('open', 'high', 'low', 'close'):
+            self.data[name] = self.data[name].round(2)
+        self.data['begin'] = self.data['begin'].dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    def test_fits_float32(self):
+        self.assertTrue(fits_float32(np.array([101.25, 99.99, 1234.5])))
+        self.assertFalse(fits_float32(np.array([1234567.891])))
+        self.assertFalse(fits_float32(np.array([1 / 3])))
+
+    def test_compact_candles(self):
+        """Свечи сжимаются без потери цен и занимают меньше памяти."""
+        compact = compact_candles(self.data)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(compact['begin']))
+        self.assertEqual(compact['close'].dtype, np.float32)
+        np.testing.assert_array_equal(compact['close'].astype(float).round(2), self.data['close'])
+        self.assertLess(memory_per_million(compact)['total'], memory_per_million(self.data)['total'] / 2)
+
+        enriched = graph.enrich(compact, inplace=True, compact=True)
+        self.assertIs(enriched, compact)
+        self.assertEqual(compact['StochRSI_Signal'].dtype, np.int8)
+        self.assertEqual(compact['Engulfing'].dtype, 'category')
+        self.assertEqual(compact['RSI'].dtype, np.float32)
+
+    def test_inplace_modes(self):
+        """В режиме inplace функции пишут только новые колонки в исходный фрейм, значения те же."""
+        columns = list(self.data.columns)
+        expected = {
+            'ma': current_ma_analysis(self.data),
+            'stoch': calculate_stochastic_rsi(self.data),
+        }
+        levels = find_support_resistance(self.data)
+        expected['volume'] = volume_analysis(self.data, levels.support_1, levels.resistance_1)
+        self.assertEqual(list(self.data.columns), columns)
+
+        self.assertIs(current_ma_analysis(self.data, inplace=True), self.data)
+        self.assertIs(calculate_stochastic_rsi(self.data, inplace=True), self.data)
+        self.assertIs(volume_analysis(self.data, levels.support_1, levels.resistance_1, inplace=True), self.data)
+        self.assertEqual(list(self.data.columns), columns + ['SMA', 'EMA', 'Volatility', 'MA_Signal', 'RSI',
+                                                            'StochRSI_K', 'StochRSI_D', 'StochRSI_Signal',
+                                                            'Volume_Signal'])
+        for name in ('SMA', 'EMA', 'Volatility', 'MA_Signal'):
+            pd.testing.assert_series_equal(self.data[name], expected['ma'][name])
+        for name in ('StochRSI_K', 'StochRSI_D', 'StochRSI_Signal'):
+            pd.testing.assert_series_equal(self.data[name], expected['stoch'][name])
+        pd.testing.assert_series_equal(self.data['Volume_Signal'], expected['volume']['Volume_Signal'])
+
+        compact_indicators(self.data)
+        self.assertEqual(self.data['MA_Signal'].dtype, np.int8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import data_storage
+
+
+def make_candles(rows, start='2024-01-01', freq='h', seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=rows)))
+    return pd.DataFrame({
+        'begin': pd.date_range(start, periods=rows, freq=freq).astype(str),
+        'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+        'volume': rng.integers(1000, 10000, size=rows).astype(float),
+    })
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow не установлен")
+class TestParquetStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.frame = make_candles(3000)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_roundtrip_partitions(self):
+        """Свечи сохраняются по тикеру/интервалу/месяцу и читаются без потерь."""
+        data_storage.save_parquet(self.frame, 'sber', root=self.root)
+        data_storage.save_parquet(make_candles(50, seed=1), 'GAZP', root=self.root)
+        self.assertEqual(data_storage.list_parquet_tickers(self.root), ['GAZP', 'SBER'])
+        months = os.listdir(os.path.join(self.root, 'ticker=SBER', 'interval=60'))
+        self.assertEqual(len(months), 5)
+
+        loaded = data_storage.load_parquet('SBER', root=self.root)
+        np.testing.assert_array_equal(loaded['close'], self.frame['close'])
+        self.assertTrue((loaded['begin'] == pd.to_datetime(self.frame['begin'])).all())
+
+        self.assertEqual(set(data_storage.load_parquet(root=self.root)['ticker']), {'SBER', 'GAZP'})
+
+    def test_partial_month_save_keeps_history(self):
+        """Сохранение части месяца дополняет его: остальные свечи месяца не теряются, новые значения побеждают."""
+        data_storage.save_parquet(self.frame.iloc[:2990], 'SBER', root=self.root)
+        today = self.frame.iloc[2980:].copy()
+        today['close'] += 1
+        data_storage.save_parquet(today, 'SBER', root=self.root)
+        loaded = data_storage.load_parquet('SBER', root=self.root)
+        self.assertEqual(len(loaded), 3000)
+        self.assertTrue((loaded['begin'] == pd.to_datetime(self.frame['begin'])).all())
+        np.testing.assert_array_equal(loaded['close'].iloc[:2980], self.frame['close'].iloc[:2980])
+        np.testing.assert_array_equal(loaded['close'].iloc[2980:], today['close'])
+
+    def test_projection_and_time_range(self):
+        """Загружаются только запрошенные колонки и свечи из диапазона."""
+        data_storage.save_parquet(self.frame, 'SBER', root=self.root)
+        loaded = data_storage.load_parquet('SBER', ['begin', 'close'], start='2024-03-10', end='2024-04-09 23:00',
+                                           root=self.root)
+        self.assertEqual(list(loaded.columns), ['begin', 'close'])
+        begin = pd.to_datetime(self.frame['begin'])
+        expected = self.frame[(begin >= '2024-03-10') & (begin <= '2024-04-09 23:00')]
+        np.testing.assert_array_equal(loaded['close'], expected['close'])
+        self.assertEqual(len(loaded), 31 * 24)
+
+    def test_convert_merges_dumps(self):
+        """Пересекающиеся выгрузки одного тикера объединяются, а не заменяют друг друга."""
+        data_dir = os.path.join(self.root, 'json')
+        os.makedirs(data_dir)
+        frame = make_candles(100, start='2024-11-12 10:00', freq='10min')
+        frame.iloc[:60].to_json(os.path.join(data_dir, 'SBER_2024-11-12_1D_[100000].json'))
+        frame.iloc[40:].to_json(os.path.join(data_dir, 'SBER_2024-11-12_1D_[120000].json'))
+        # Одной свечи мало для определения интервала — файл пропускается
+        frame.iloc[:1].to_json(os.path.join(data_dir, 'GAZP_2024-11-12_1D_[100000].json'))
+        parquet = os.path.join(self.root, 'parquet')
+
+        converted = data_storage.convert_json_to_parquet(parquet, data_dir)
+        self.assertEqual(sorted(converted), ['SBER_2024-11-12_1D_[100000].json', 'SBER_2024-11-12_1D_[120000].json'])
+        loaded = data_storage.load_parquet('SBER', root=parquet)
+        self.assertEqual(len(loaded), 100)
+        np.testing.assert_allclose(loaded['close'], frame['close'], rtol=1e-9)
+
+        # Повторная конвертация новой выгрузки дополняет уже сохранённый месяц
+        more = make_candles(130, start='2024-11-12 10:00', freq='10min')
+        more.iloc[100:].to_json(os.path.join(data_dir, 'SBER_2024-11-13_1D_[100000].json'))
+        for name in converted:
+            os.remove(os.path.join(data_dir, name))
+        data_storage.convert_json_to_parquet(parquet, data_dir)
+        self.assertEqual(len(data_storage.load_parquet('SBER', root=parquet)), 130)
+
+
+if __name__ == '__main__':
+    unittest.main()
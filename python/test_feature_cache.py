@@ -0,0 +1,115 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import indicator_graph as graph
+from feature_cache import FeatureCache, cached_enrich, frame_fingerprint
+from rsi_call import current_rsi_call
+
+
+class TestFeatureCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        T = 2000
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=T)))
+        open_ = close * rng.uniform(0.99, 1.01, size=T)
+        self.data = pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_, close) * 1.01,
+            'low': np.minimum(open_, close) * 0.99,
+            'close': close,
+            'volume': rng.integers(1000, 10000, size=T),
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_hits_persist_between_instances(self):
+        """Повторное обогащение того же фрейма берётся из кэша, в том числе после перезапуска."""
+        first = cached_enrich(self.data, 'MOEX', 10, cache=FeatureCache(self.tmp))
+        cache = FeatureCache(self.tmp)
+        second = cached_enrich(self.data, 'MOEX', 10, cache=cache)
+        self.assertTrue(first.equals(second))
+        self.assertEqual(cache.stats()['misses'], 0)
+        self.assertGreater(cache.stats()['hits'], 0)
+
+        # Другие параметры — другой ключ
+        cached_enrich(self.data, 'MOEX', 10, {'RSI': {'candle_frame': 14}}, cache=cache)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_incremental_extension(self):
+        """После дописывания свечей считается только хвост, результат совпадает с полным расчётом."""
+        cache = FeatureCache(self.tmp)
+        compute = lambda frame: current_rsi_call(frame, 18)
+        cache.get_or_compute('MOEX', 10, self.data.iloc[:1500], 'RSI', {'candle_frame': 18}, compute, lookback=19)
+        value = cache.get_or_compute('MOEX', 10, self.data, 'RSI', {'candle_frame': 18}, compute, lookback=19)
+        np.testing.assert_allclose(value, compute(self.data))
+        self.assertEqual(cache.stats()['extensions'], 1)
+
+    def test_wilder_tail_tolerance(self):
+        """Хвост рекурсивного сглаживания приближённый: погрешность убывает с lookback."""
+        compute = lambda frame: current_rsi_call(frame, 14, method='wilder')
+        expected = compute(self.data)
+        errors = []
+        for lookback in (50, 400):
+            cache = FeatureCache(f"{self.tmp}/{lookback}")
+            cache.get_or_compute('MOEX', 10, self.data.iloc[:1500], 'RSI', {}, compute, lookback=lookback)
+            value = cache.get_or_compute('MOEX', 10, self.data, 'RSI', {}, compute, lookback=lookback)
+            errors.append(np.nanmax(np.abs(value - expected)))
+        self.assertGreater(errors[0], errors[1])
+        self.assertLess(errors[1], 1e-9)
+
+    def test_enrich_extends_tail(self):
+        """cached_enrich после дописывания свечей считает хвост и совпадает с полным расчётом."""
+        cache = FeatureCache(self.tmp)
+        cached_enrich(self.data.iloc[:1500], 'MOEX', 10, cache=cache)
+        value = cached_enrich(self.data, 'MOEX', 10, cache=cache)
+        finite = [name for name in graph.INDICATORS if graph.indicator_warmup(name) is not None]
+        self.assertEqual(cache.stats()['extensions'], len(finite))
+
+        expected = graph.enrich(self.data)
+        for column in expected.columns:
+            if expected[column].dtype == object:
+                self.assertTrue(value[column].equals(expected[column]), column)
+            else:
+                np.testing.assert_allclose(value[column].to_numpy(float), expected[column].to_numpy(float),
+                                           rtol=1e-9, atol=1e-9, err_msg=column)
+        # Позиция Боллинджера и статические уровни объёма зависят от всей истории
+        self.assertIsNone(graph.indicator_warmup('Bollinger'))
+        self.assertIsNone(graph.indicator_warmup('Volume'))
+        self.assertEqual(graph.indicator_warmup('RSI', {'candle_frame': 14}), 14)
+
+    def test_fingerprint_is_stable_across_processes(self):
+        """Отпечаток фрейма с текстовыми и категориальными колонками не зависит от процесса."""
+        script = ("import pandas as pd; from feature_cache import frame_fingerprint; "
+                  "frame = pd.DataFrame({'close': [1.0, 2.0, 3.0], 'label': ['a', 'b', 'a']}); "
+                  "frame['pattern'] = frame['label'].astype('category'); "
+                  "print(frame_fingerprint(frame))")
+        frame = pd.DataFrame({'close': [1.0, 2.0, 3.0], 'label': ['a', 'b', 'a']})
+        frame['pattern'] = frame['label'].astype('category')
+        other = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        self.assertEqual(other.stdout.strip(), frame_fingerprint(frame))
+
+        changed = frame.copy()
+        changed.loc[2, 'pattern'] = 'b'
+        self.assertNotEqual(frame_fingerprint(changed), frame_fingerprint(frame))
+
+    def test_lru_eviction(self):
+        """При превышении лимита вытесняются давно не использованные записи."""
+        compute = lambda frame: current_rsi_call(frame, 18)
+        cache = FeatureCache(self.tmp, max_bytes=40_000)
+        for ticker in ('A', 'B', 'C'):
+            cache.get_or_compute(ticker, 10, self.data, 'RSI', {}, compute)
+        self.assertGreater(cache.stats()['evictions'], 0)
+        self.assertLessEqual(cache.stats()['bytes'], 40_000)
+        cache.get_or_compute('C', 10, self.data, 'RSI', {}, compute)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+import pandas as pd
+import indicator_graph as graph
+from rsi_call import current_rsi_call
+from moving_averages import current_ma_analysis
+from bollinger_strategy import calculate_bollinger_bands, generate_signals
+from Stochastic_RSI import calculate_stochastic_rsi
+from candlestick_patterns import current_candlestick_patterns
+from volume import find_support_resistance, volume_analysis
+
+
+class TestIndicatorGraph(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        T = 1000
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=T)))
+        open_ = close * rng.uniform(0.99, 1.01, size=T)
+        self.data = pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_, close) * 1.01,
+            'low': np.minimum(open_, close) * 0.99,
+            'close': close,
+            'volume': rng.integers(1000, 10000, size=T),
+        })
+
+    def test_enrich_matches_modules(self):
+        """Колонки графа совпадают с результатами функций модулей."""
+        result = graph.enrich(self.data)
+
+        expected = {'RSI': current_rsi_call(self.data, 18)}
+        expected.update(current_ma_analysis(self.data)[['SMA', 'EMA', 'Volatility', 'MA_Signal']])
+        expected.update(generate_signals(calculate_bollinger_bands(self.data.copy()))[['Upper', 'Lower', 'Signal', 'Position']])
+        expected.update(calculate_stochastic_rsi(self.data)[['StochRSI_K', 'StochRSI_D', 'StochRSI_Signal']])
+        expected.update(current_candlestick_patterns(self.data.copy()))
+        levels = find_support_resistance(self.data)
+        expected['Volume_Signal'] = volume_analysis(self.data, levels.support_1, levels.resistance_1)['Volume_Signal']
+
+        for name, values in expected.items():
+            if values.dtype == object and name != 'Position':
+                self.assertEqual(result[name].tolist(), values.tolist(), name)
+            else:
+                np.testing.assert_allclose(result[name].astype(float), values.astype(float), err_msg=name)
+
+    def test_shared_intermediates(self):
+        """Общие промежуточные узлы попадают в план один раз."""
+        graph.load_indicators()
+        outputs, order = graph.build_plan({'RSI': {'candle_frame': 14}, 'StochRSI': {'period': 14},
+                                           'MA': {'long_period': 20}, 'Bollinger': {'window': 20}})
+        self.assertEqual(len(order), len(set(order)))
+        self.assertEqual(outputs['RSI'], outputs['StochRSI_K'][1][0][1][0])
+        self.assertEqual(sum(1 for n in order if n == graph.rolling_mean('close', 20)), 1)
+        self.assertEqual(sum(1 for n in order if n[0] == 'diff'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+import pandas as pd
+import instrumentation
+from instrumentation import instrumented, timed
+from rsi_call import current_rsi_call
+
+
+@instrumented(name='test.allocate')
+def allocate(frame):
+    return np.ones((len(frame), 1000))
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.reset()
+        self.data = pd.DataFrame({'close': 100 + np.random.default_rng(0).normal(size=2000).cumsum()})
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_records_nothing(self):
+        current_rsi_call(self.data)
+        with timed('stage'):
+            pass
+        self.assertEqual(instrumentation.STATS, {})
+
+    def test_records_calls(self):
+        """Записываются вызовы, строки, время и пиковая память, в том числе вложенных этапов."""
+        instrumentation.enable(memory=True, report_at_exit=False)
+        with timed('pipeline', rows=len(self.data)):
+            current_rsi_call(self.data)
+            current_rsi_call(self.data)
+            allocate(self.data)
+
+        stats = {entry['name']: entry for entry in instrumentation.report()}
+        rsi = stats['rsi_call.current_rsi_call']
+        self.assertEqual(rsi['calls'], 2)
+        self.assertEqual(rsi['rows'], 4000)
+        self.assertGreater(rsi['rows_per_s'], 0)
+        # Массив 2000 x 1000 float64 — около 16 МБ
+        self.assertGreater(stats['test.allocate']['peak_bytes'], 15 * 1024 ** 2)
+        self.assertGreaterEqual(stats['pipeline']['peak_bytes'], stats['test.allocate']['peak_bytes'])
+        self.assertIn('rsi_call.current_rsi_call', instrumentation.format_report())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import _AppProjectKit as APK
+import indicator_graph as graph
+from candle_store import CandleStore
+from live_engine import LiveEngine, frame_feed, moex_poll, EVENT_FIELDS
+
+
+class TestLiveEngine(unittest.TestCase):
+
+    def setUp(self):
+        # Свечи сохраняются в хранилище и воспроизводятся из него
+        self.tmp = tempfile.mkdtemp()
+        store = CandleStore(self.tmp)
+        rng = np.random.default_rng(11)
+        for ticker in ('SBER', 'GAZP'):
+            T = 400
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=T)))
+            open_ = close * (1 + rng.normal(0, 0.01, size=T))
+            store.write(ticker, 10, pd.DataFrame({
+                'begin': pd.date_range('2024-11-12 10:00', periods=T, freq='10min'),
+                'open': open_, 'close': close,
+                'high': np.maximum(open_, close) * 1.005,
+                'low': np.minimum(open_, close) * 0.995,
+                'value': close * 100, 'volume': rng.integers(100, 1000, size=T).astype(float),
+            }))
+        self.frames = {ticker: store.read_frame(ticker, 10) for ticker in ('SBER', 'GAZP')}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_replay_matches_batch(self):
+        """События воспроизведения совпадают с изменениями сигналов пакетного расчёта."""
+        received = []
+        engine = LiveEngine(['SBER', 'GAZP'], on_event=received.append)
+        events = engine.run(frame_feed(self.frames))
+        self.assertEqual(len(events), len(received))
+
+        for ticker, frame in self.frames.items():
+            expected = graph.enrich(frame)
+            last = expected.iloc[-1]
+            for name in ('RSI', 'Upper', 'Lower', 'EMA', 'Volatility', 'StochRSI_K', 'StochRSI_D'):
+                self.assertAlmostEqual(engine.values(ticker)[name], last[name], msg=name)
+
+            # Volume_Signal — как индикатор Volume со скользящими уровнями (без текущей свечи)
+            expected['Volume_Signal'] = graph.enrich(frame, {'Volume': {'rolling': True}})['Volume_Signal']
+            for name in EVENT_FIELDS:
+                column = expected[name].replace(False, 0)
+                changes = int((column != column.shift(1).fillna(0)).sum())
+                count = sum(1 for e in events if e.ticker == ticker and e.name == name)
+                self.assertEqual(count, changes, f"{ticker} {name}")
+
+            volume = [e for e in events if e.ticker == ticker and e.name == 'Volume_Signal']
+            by_begin = expected.set_index('begin')['Volume_Signal']
+            self.assertEqual([e.value for e in volume], [by_begin[pd.Timestamp(e.begin)] for e in volume])
+            self.assertTrue(any(abs(e.value) == 2 for e in volume))
+
+        report = engine.latency_report()
+        self.assertEqual(report['ticks'], 800)
+        self.assertGreater(report['p99_us'], 0)
+
+    def test_restart_from_saved_state(self):
+        """После сохранения и загрузки состояния поток продолжается без изменений."""
+        whole = LiveEngine(['SBER', 'GAZP'])
+        expected = whole.run(frame_feed(self.frames))
+
+        first = LiveEngine(['SBER', 'GAZP'])
+        events = first.run(frame_feed(self.frames), max_ticks=500)
+        path = os.path.join(self.tmp, 'state.json')
+        first.save_state(path)
+
+        second = LiveEngine(['SBER', 'GAZP'])
+        second.load_state(path)
+        # Уже обработанные свечи пропускаются
+        events += second.run(frame_feed(self.frames))
+        self.assertEqual([repr(e) for e in events], [repr(e) for e in expected])
+
+    def test_feed_orders_by_time_not_text(self):
+        """Порядок задаётся временем, а не строками: номера строк и разные форматы begin."""
+        plain = pd.DataFrame({'close': np.arange(12.0)})
+        order = [candle['close'] for _, candle in frame_feed({'A': plain})]
+        self.assertEqual(order, list(np.arange(12.0)))
+
+        frames = {
+            'A': pd.DataFrame({'begin': ['2024-11-12 10:00', '2024-11-12T09:30'], 'close': [1.0, 2.0]}),
+            'B': pd.DataFrame({'begin': ['2024-11-12T09:45:00', '2024-11-12 10:15'], 'close': [3.0, 4.0]}),
+        }
+        self.assertEqual([candle['close'] for _, candle in frame_feed(frames)], [2.0, 3.0, 1.0, 4.0])
+
+        engine = LiveEngine(['A'])
+        engine.process('A', {'begin': '2024-11-12T10:00', 'open': 1.0, 'close': 1.0, 'volume': 1.0})
+        self.assertEqual(engine.ticks, 1)
+        # Та же свеча в другом формате и более ранняя свеча пропускаются
+        engine.process('A', {'begin': '2024-11-12 10:00:00', 'open': 1.0, 'close': 1.0, 'volume': 1.0})
+        engine.process('A', {'begin': '2024-11-12 9:50', 'open': 1.0, 'close': 1.0, 'volume': 1.0})
+        self.assertEqual(engine.ticks, 1)
+
+    def test_poll_reports_fetch_errors(self):
+        """Ошибки загрузки при опросе передаются в on_error, остальные тикеры продолжают работу."""
+        class Fetcher:
+            def iter_fetch(self, jobs, interval, since):
+                yield ('SBER', interval), APK.DatabaseError("HTTP 503")
+                yield ('GAZP', interval), pd.DataFrame({'begin': ['2024-11-12 10:00', '2024-11-12 10:10'],
+                                                        'close': [1.0, 2.0]})
+
+        errors = []
+        feed = moex_poll(Fetcher(), ['SBER', 'GAZP'], poll_interval=0,
+                         on_error=lambda ticker, error: errors.append((ticker, str(error))))
+        self.assertEqual(next(feed)[0], 'GAZP')
+        self.assertEqual(errors, [('SBER', 'HTTP 503')])
+        with self.assertRaises(APK.DatabaseError):
+            next(moex_poll(Fetcher(), ['SBER'], poll_interval=0, on_error=None))
+
+
+if __name__ == '__main__':
+    unittest.main()
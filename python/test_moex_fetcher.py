@@ -0,0 +1,170 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+import _AppProjectKit as APK
+from candle_store import CandleStore
+from moex_fetcher import MoexFetcher, PAGE_SIZE
+
+CANDLES_URL = re.compile(r'^/iss/engines/stock/markets/shares/boards/TQBR/securities/(\w+)/candles\.json$')
+
+
+def stub_candles(ticker, rows):
+    """Свечи заглушки: у каждого тикера своя цена, шаг 10 минут."""
+    begin = pd.date_range('2024-11-12 10:00', periods=rows, freq='10min')
+    base = sum(map(ord, ticker))
+    return [[b.strftime('%Y-%m-%d %H:%M:%S'), base + i, base + i + 0.5, base + i + 1, base + i - 1,
+             1000.0 * i, 10 * i] for i, b in enumerate(begin)]
+
+
+class IssStub(BaseHTTPRequestHandler):
+    """Заглушка эндпоинта ISS candles.json (компактный формат, страницы по PAGE_SIZE)."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        match = CANDLES_URL.match(url.path)
+
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            server.requests += 1
+            server.clients.add(self.client_address)
+            failures = server.failures.get(match.group(1), 0) if match else 0
+            if failures:
+                server.failures[match.group(1)] = failures - 1
+        try:
+            time.sleep(0.01)
+            if match is None:
+                return self._reply(404, {})
+            if failures:
+                return self._reply(503, {})
+            if match.group(1) in server.malformed:
+                return self._reply(200, {'error': 'unexpected'})
+
+            data = [row for row in server.candles[match.group(1)] if row[0] >= query.get('from', '')]
+            start = int(query.get('start', 0))
+            self._reply(200, {'candles': {
+                'columns': query['candles.columns'].split(','),
+                'data': data[start:start + PAGE_SIZE],
+            }})
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestMoexFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), IssStub)
+        self.server.lock = threading.Lock()
+        self.server.active = self.server.peak = self.server.requests = 0
+        self.server.clients = set()
+        self.server.failures = {}
+        self.server.malformed = set()
+        self.server.candles = {t: stub_candles(t, n) for t, n in
+                               [('MOEX', 1200), ('FEES', 30), ('SBER', 501), ('GAZP', 0)]}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/iss"
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp)
+
+    def test_fetch_many_paginates_with_bounded_concurrency(self):
+        """Все страницы загружаются, параллелизм и число соединений ограничены."""
+        with MoexFetcher(self.base_url, max_workers=2, backoff=0) as fetcher:
+            frames = fetcher.fetch_many(['MOEX', 'FEES', 'SBER', 'GAZP'], interval=10)
+
+        self.assertEqual({k: len(v) for k, v in frames.items()},
+                         {('MOEX', 10): 1200, ('FEES', 10): 30, ('SBER', 10): 501, ('GAZP', 10): 0})
+        self.assertEqual(list(frames[('FEES', 10)].columns),
+                         ['begin', 'open', 'close', 'high', 'low', 'value', 'volume'])
+        self.assertLessEqual(self.server.peak, 2)
+        # keep-alive: не больше соединений, чем размер пула
+        self.assertLessEqual(len(self.server.clients), 2)
+        self.assertEqual(self.server.requests, 3 + 1 + 2 + 1)
+
+    def test_retry_with_backoff(self):
+        """Временные ошибки 5xx повторяются, постоянные — собираются в ошибку."""
+        self.server.failures = {'FEES': 2, 'SBER': 10}
+        with MoexFetcher(self.base_url, max_workers=4, retries=2, backoff=0) as fetcher:
+            results = dict(fetcher.iter_fetch(['FEES', 'SBER']))
+            self.assertEqual(len(results[('FEES', 10)]), 30)
+            self.assertIsInstance(results[('SBER', 10)], APK.DatabaseError)
+            with self.assertRaises(APK.DatabaseError):
+                fetcher.fetch_many(['SBER'])
+
+    def test_malformed_response_is_per_ticker_error(self):
+        """Неожиданный ответ ISS не прерывает пакет при errors="skip"."""
+        self.server.malformed = {'SBER'}
+        store = CandleStore(os.path.join(self.tmp, 'candles'))
+        errors = []
+        on_error = lambda key, error: errors.append((key, type(error)))
+        with MoexFetcher(self.base_url, max_workers=2, backoff=0) as fetcher:
+            frames = fetcher.fetch_many(['FEES', 'SBER'], errors="skip", on_error=on_error)
+            self.assertEqual(list(frames), [('FEES', 10)])
+            self.assertEqual(fetcher.update_store(['FEES', 'SBER'], store=store, errors="skip", on_error=on_error),
+                             {('FEES', 10): 30})
+            self.assertEqual(errors, [(('SBER', 10), APK.DatabaseError)] * 2)
+            with self.assertRaises(APK.DatabaseError):
+                fetcher.fetch_many(['FEES', 'SBER'])
+            with self.assertRaises(APK.InvalidInputError):
+                fetcher.fetch_many(['FEES'], errors="ignore")
+
+    def test_update_store_reports_store_errors(self):
+        """Сбой записи в хранилище при errors="skip" передаётся в on_error, а не теряется молча."""
+        class FailingStore(CandleStore):
+            def append(self, ticker, interval, frame):
+                if ticker == 'SBER':
+                    raise OSError("No space left on device")
+                return super().append(ticker, interval, frame)
+
+        store = FailingStore(os.path.join(self.tmp, 'candles'))
+        errors = []
+        with MoexFetcher(self.base_url, max_workers=2, backoff=0) as fetcher:
+            appended = fetcher.update_store(['FEES', 'SBER'], store=store, errors="skip",
+                                            on_error=lambda key, error: errors.append((key, str(error))))
+            self.assertEqual(appended, {('FEES', 10): 30})
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(errors[0][0], ('SBER', 10))
+            self.assertIn("No space left on device", errors[0][1])
+            with self.assertRaises(OSError):
+                fetcher.update_store(['SBER'], store=store)
+
+    def test_update_store_fetches_only_new_candles(self):
+        """Повторное обновление запрашивает свечи с последней сохранённой."""
+        store = CandleStore(os.path.join(self.tmp, 'candles'))
+        full = self.server.candles['FEES']
+        self.server.candles['FEES'] = full[:20]
+        with MoexFetcher(self.base_url, max_workers=2, backoff=0) as fetcher:
+            self.assertEqual(fetcher.update_store(['FEES'], store=store), {('FEES', 10): 20})
+            self.server.candles['FEES'] = full
+            self.assertEqual(fetcher.update_store(['FEES'], store=store), {('FEES', 10): 10})
+        self.assertEqual(store.length('FEES', 10), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
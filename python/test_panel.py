@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+import pandas as pd
+from rsi_call import current_rsi_call
+from moving_averages import current_ma_analysis
+from bollinger_strategy import calculate_bollinger_bands, generate_signals
+from Stochastic_RSI import calculate_stochastic_rsi
+from panel import (
+    to_panel,
+    stack_panel,
+    panel_sma,
+    panel_ema,
+    panel_rsi,
+    panel_crossover,
+    panel_ma,
+    panel_bollinger,
+    panel_stoch_rsi
+)
+
+
+class TestPanel(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(17)
+        T, N = 300, 5
+        index = pd.date_range('2024-01-01', periods=T, freq='D')
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(T, N)), axis=0))
+        self.close = pd.DataFrame(close, index=index, columns=['SBER', 'GAZP', 'LKOH', 'MOEX', 'FEES'])
+        # Пропуски: GAZP не торговался часть дней, FEES появился позже
+        self.close.iloc[rng.choice(T, 40, replace=False), 1] = np.nan
+        self.close.iloc[:60, 4] = np.nan
+
+    def per_ticker(self, ticker):
+        series = self.close[ticker].dropna()
+        return pd.DataFrame({'close': series})
+
+    def assertPanelEqual(self, table, ticker, expected):
+        expected = expected.astype(float).reindex(self.close.index)
+        np.testing.assert_allclose(table[ticker].to_numpy(), expected.to_numpy(), rtol=1e-12, atol=1e-12,
+                                   err_msg=ticker)
+
+    def test_matches_per_ticker_functions(self):
+        """Панельные индикаторы совпадают с расчётом по фреймам отдельных тикеров, в том числе с пропусками."""
+        rsi = panel_rsi(self.close)
+        sma, ema = panel_sma(self.close, 20), panel_ema(self.close, 9)
+        ma = panel_ma(self.close)
+        bollinger = panel_bollinger(self.close)
+        stoch = panel_stoch_rsi(self.close)
+        crossover = panel_crossover(self.close)
+
+        for ticker in self.close.columns:
+            frame = self.per_ticker(ticker)
+            self.assertPanelEqual(rsi, ticker, current_rsi_call(frame, 18))
+            self.assertPanelEqual(sma, ticker, frame['close'].rolling(20).mean())
+            self.assertPanelEqual(ema, ticker, frame['close'].ewm(span=9, adjust=False).mean())
+
+            expected = current_ma_analysis(frame)
+            for name in ('SMA', 'EMA', 'Volatility', 'MA_Signal'):
+                self.assertPanelEqual(ma[name], ticker, expected[name])
+            self.assertPanelEqual(crossover, ticker, expected['MA_Signal'])
+
+            expected = generate_signals(calculate_bollinger_bands(frame.copy()))
+            for name in ('SMA', 'STD', 'Upper', 'Lower', 'Signal', 'Position'):
+                self.assertPanelEqual(bollinger[name], ticker, expected[name])
+
+            expected = calculate_stochastic_rsi(frame)
+            for name in ('RSI', 'StochRSI_K', 'StochRSI_D', 'StochRSI_Signal'):
+                self.assertPanelEqual(stoch[name], ticker, expected[name])
+
+        # На местах пропусков — NaN
+        self.assertTrue(rsi['GAZP'][self.close['GAZP'].isna()].isna().all())
+
+    def test_long_frame_round_trip(self):
+        """Длинный фрейм с MultiIndex переводится в панель и обратно."""
+        long = self.close.stack().rename('close').to_frame()
+        long.index.names = ['begin', 'ticker']
+        self.assertTrue(to_panel(long).equals(self.close.dropna(how='all')))
+
+        result = stack_panel(panel_bollinger(long))
+        self.assertEqual(len(result), self.close.notna().sum().sum())
+        self.assertIn('Upper', result.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import _AppProjectKit as APK
+from candle_store import CandleStore
+from live_engine import LiveEngine
+from replay import json_source, store_source, storage_sources, merge, replay, run_replay
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = CandleStore(os.path.join(self.tmp, 'candles'))
+        self.frames = {}
+        rng = np.random.default_rng(5)
+        for i, ticker in enumerate(('SBER', 'GAZP', 'MOEX')):
+            T = 50
+            close = 100 + rng.normal(size=T).cumsum()
+            self.frames[ticker] = pd.DataFrame({
+                # Сдвиг на i минут, чтобы свечи тикеров перемежались
+                'begin': pd.date_range('2024-11-12 10:00', periods=T, freq='10min') + pd.Timedelta(minutes=i),
+                'open': close, 'close': close, 'high': close + 1, 'low': close - 1,
+                'volume': rng.integers(100, 1000, size=T).astype(float), 'value': close * 100,
+            })
+        self.store.write('SBER', 10, self.frames['SBER'])
+        self.store.write('GAZP', 10, self.frames['GAZP'])
+        # В JSON-файлах begin хранится строкой, как его отдаёт ISS
+        self.frames['MOEX'].assign(begin=self.frames['MOEX']['begin'].dt.strftime('%Y-%m-%d %H:%M:%S')).to_json(os.path.join(self.tmp, 'MOEX_2024-11-12_1D_[191120].json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_chronological_merge(self):
+        """Источники сливаются в один поток по времени без потерь."""
+        sources = storage_sources(self.tmp, self.store)
+        stream = list(merge(sources))
+        self.assertEqual(len(stream), 150)
+        begins = [candle['begin'] for _, candle in stream]
+        self.assertEqual(begins, sorted(begins))
+        self.assertEqual([t for t, _ in stream[:3]], ['SBER', 'GAZP', 'MOEX'])
+        sber = [candle['close'] for ticker, candle in stream if ticker == 'SBER']
+        np.testing.assert_allclose(sber, self.frames['SBER']['close'])
+
+    def test_dumps_are_deduplicated(self):
+        """Пересекающиеся выгрузки тикера и его раздел хранилища дают каждую свечу один раз."""
+        moex = self.frames['MOEX']
+        later = moex.iloc[30:].assign(begin=moex['begin'].iloc[30:].dt.strftime('%Y-%m-%dT%H:%M:%S'))
+        later.to_json(os.path.join(self.tmp, 'MOEX_2024-11-13_1D_[101500].json'))
+        self.store.write('MOEX', 10, moex.iloc[:40])
+        stream = list(merge(storage_sources(self.tmp, self.store)))
+        moex_begins = [candle['begin'] for ticker, candle in stream if ticker == 'MOEX']
+        self.assertEqual(moex_begins, list(moex['begin'].to_numpy(dtype='datetime64[s]').tolist()))
+        self.assertEqual(len(stream), 150)
+
+    def test_dumps_read_during_replay(self):
+        """storage_sources не держит свечи выгрузок: json_source читает файл при воспроизведении."""
+        path = os.path.join(self.tmp, 'MOEX_2024-11-12_1D_[191120].json')
+        sources = storage_sources(self.tmp, self.store)
+        moex = self.frames['MOEX']
+        moex.assign(begin=moex['begin'].dt.strftime('%Y-%m-%d %H:%M:%S'), close=moex['close'] + 1).to_json(path)
+        closes = [candle['close'] for ticker, candle in merge(sources) if ticker == 'MOEX']
+        np.testing.assert_allclose(closes, moex['close'] + 1)
+
+    def test_single_interval_per_ticker(self):
+        """Интервалы тикера не перемешиваются: без interval нужно ровно один интервал."""
+        daily = self.frames['SBER'].assign(begin=pd.date_range('2024-01-01', periods=50, freq='D'))
+        self.store.write('SBER', 24, daily)
+        with self.assertRaises(APK.InvalidInputError):
+            storage_sources(self.tmp, self.store)
+        stream = list(merge(storage_sources(self.tmp, self.store, interval=24)))
+        self.assertEqual({ticker for ticker, _ in stream}, {'SBER'})
+        self.assertEqual(len(stream), 50)
+
+    def test_speed(self):
+        """С ускорением паузы соответствуют шагу свечей, делённому на speed."""
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        source = store_source(self.store, 'SBER', 10, chunk=7)
+        stream = list(replay([source], speed=600, clock=lambda: now[0], sleep=sleep))
+        self.assertEqual(len(stream), 50)
+        # 10 минут при ускорении x600 — одна секунда
+        self.assertEqual(len(sleeps), 49)
+        np.testing.assert_allclose(sleeps, 1.0)
+
+    def test_feeds_live_engine(self):
+        """Поток воспроизведения питает живой движок и даёт пропускную способность."""
+        engine = LiveEngine(['SBER', 'GAZP', 'MOEX'])
+        stats = run_replay(replay(storage_sources(self.tmp, self.store)), engine.process)
+        self.assertEqual(stats['candles'], 150)
+        self.assertGreater(stats['candles_per_second'], 0)
+        self.assertEqual(engine.ticks, 150)
+
+        expected = LiveEngine(['MOEX'])
+        expected.run(merge([json_source(os.path.join(self.tmp, 'MOEX_2024-11-12_1D_[191120].json'))]))
+        self.assertEqual(engine.values('MOEX'), expected.values('MOEX'))
+
+
+if __name__ == '__main__':
+    unittest.main()
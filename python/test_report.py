@@ -0,0 +1,88 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import indicator_graph as graph
+from bollinger_strategy import save_signals_to_file
+from report import generate_report, load_frames, signal_events, summarize
+
+
+def make_candles(rows, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=rows)))
+    open_ = close * rng.uniform(0.99, 1.01, size=rows)
+    return pd.DataFrame({'begin': pd.date_range('2024-01-01', periods=rows, freq='h'), 'open': open_,
+                         'high': np.maximum(open_, close) * 1.005, 'low': np.minimum(open_, close) * 0.995,
+                         'close': close, 'volume': rng.integers(1000, 5000, size=rows).astype(float)})
+
+
+class TestReport(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.frames = {'SBER': graph.enrich(make_candles(600, 1)), 'GAZP': graph.enrich(make_candles(400, 2))}
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_events_match_signal_columns(self):
+        """Каждое ненулевое значение сигнальной колонки — одно событие с верным направлением и меткой."""
+        events = signal_events(self.frames)
+        for ticker, frame in self.frames.items():
+            mine = events[events['ticker'] == ticker]
+            bollinger = mine[mine['indicator'] == 'Bollinger']
+            expected = frame[frame['Signal'] != 0]
+            np.testing.assert_array_equal(bollinger['begin'], expected['begin'])
+            np.testing.assert_array_equal(bollinger['signal'], expected['Signal'])
+            engulfing = mine[mine['indicator'] == 'Engulfing']
+            self.assertEqual(list(engulfing['label']), list(frame.loc[frame['Engulfing'] != False, 'Engulfing']))
+            self.assertTrue((mine.loc[mine['indicator'] == 'HangingMan', 'signal'] == -1).all())
+            self.assertTrue(mine['begin'].is_monotonic_increasing)
+        self.assertEqual(list(events['ticker'].unique()), ['SBER', 'GAZP'])
+
+        summary = summarize(events).set_index(['ticker', 'indicator'])
+        self.assertEqual(summary.loc[('SBER', 'MA'), 'buys'], (self.frames['SBER']['MA_Signal'] == 1).sum())
+
+    def test_report_files(self):
+        """События пишутся в CSV и JSONL (и Parquet при наличии pyarrow) и читаются обратно."""
+        formats = ['csv', 'jsonl'] + (['parquet'] if importlib.util.find_spec('pyarrow') else [])
+        paths = generate_report({ticker: make_candles(300, seed) for seed, ticker in enumerate(['A', 'B'])},
+                                self.root, formats)
+        events = pd.read_csv(paths['csv'])
+        self.assertEqual(len(pd.read_json(paths['jsonl'], lines=True)), len(events))
+        if 'parquet' in paths:
+            self.assertEqual(len(pd.read_parquet(paths['parquet'])), len(events))
+        with open(paths['summary'], encoding="utf-8") as f:
+            self.assertIn("Bollinger", f.read())
+
+    def test_load_frames_merges_dumps(self):
+        """Две выгрузки одного тикера объединяются в один фрейм, а не перезаписывают друг друга."""
+        candles = make_candles(300, 3)
+        candles['begin'] = candles['begin'].astype(str)
+        candles.iloc[:200].to_json(os.path.join(self.root, "SBER_2024-01-01_1H_[100000].json"))
+        candles.iloc[150:].to_json(os.path.join(self.root, "SBER_2024-01-07_1H_[110000].json"))
+        make_candles(100, 4).assign(begin=lambda f: f['begin'].astype(str)).to_json(
+            os.path.join(self.root, "GAZP_2024-01-01_1H_[100000].json"))
+        frames = load_frames(self.root)
+        self.assertEqual(sorted(frames), ['GAZP', 'SBER'])
+        self.assertEqual(len(frames['SBER']), 300)
+        np.testing.assert_array_equal(frames['SBER']['begin'], pd.to_datetime(candles['begin']))
+        np.testing.assert_allclose(frames['SBER']['close'], candles['close'], rtol=1e-9)
+
+    def test_bollinger_text_file(self):
+        """Текстовый файл сигналов Боллинджера не изменил формат."""
+        data = pd.DataFrame({'close': [10.0, 9.0, 11.0], 'Upper': [10.5, 10.5, 10.5],
+                             'Lower': [9.5, 9.5, 9.5], 'Signal': [0, 1, -1]})
+        path = os.path.join(self.root, "bollinger.txt")
+        save_signals_to_file(data, path)
+        with open(path) as f:
+            self.assertEqual(f.read(), "Дата: 1, Сигнал: Покупка\nДата: 2, Сигнал: Продажа\n\n"
+                                       "Анализ последних данных:\n"
+                                       "Рекомендация: ПРОДАВАТЬ. Цена выше верхней полосы Боллинджера.\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import _AppProjectKit as APK
+from candle_store import CandleStore
+from resample import TIMEFRAMES, append_and_resample, resample, update_resampled
+
+AGGREGATION = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum', 'value': 'sum'}
+
+
+def make_minutes(start, periods, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, size=periods)))
+    return pd.DataFrame({'begin': pd.date_range(start, periods=periods, freq='min'),
+                         'open': close * rng.uniform(0.999, 1.001, size=periods),
+                         'high': close * 1.002, 'low': close * 0.998, 'close': close,
+                         'volume': rng.integers(1, 100, size=periods).astype(float),
+                         'value': close * 10})
+
+
+class TestResample(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.frame = make_minutes('2024-11-08 06:50', 5 * 24 * 60)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_matches_pandas_resample(self):
+        """Без сессий свечи совпадают с pandas resample (неделя — с понедельника)."""
+        for timeframe, rule in (('5m', '5min'), ('1h', 'h'), ('1D', 'D'), ('1W', 'W-MON')):
+            expected = (self.frame.set_index('begin').resample(rule, label='left', closed='left')
+                        .agg(AGGREGATION).dropna().reset_index())
+            result = resample(self.frame, timeframe, sessions=None)
+            np.testing.assert_array_equal(result['begin'].to_numpy('datetime64[s]'),
+                                          expected['begin'].to_numpy('datetime64[s]'))
+            np.testing.assert_allclose(result[list(AGGREGATION)], expected[list(AGGREGATION)])
+
+    def test_session_boundaries(self):
+        """Свеча не пересекает границу сессии: час 09:00 делится на 09:00-09:50 и 09:50-10:00."""
+        hours = resample(self.frame, '1h')
+        day = hours[hours['begin'].dt.date == pd.Timestamp('2024-11-11').date()]
+        split = day.set_index(day['begin'].dt.strftime('%H:%M'))
+        self.assertEqual(list(split.index[6:13]), ['06:00', '06:50', '07:00', '08:00', '09:00', '09:50', '10:00'])
+        self.assertEqual(list(split.index[-6:]), ['18:00', '19:00', '20:00', '21:00', '22:00', '23:00'])
+        self.assertEqual(split.loc['09:00', 'volume'] + split.loc['09:50', 'volume'],
+                         self.frame.set_index('begin').loc['2024-11-11 09:00':'2024-11-11 09:59', 'volume'].sum())
+        with self.assertRaises(APK.InvalidInputError):
+            resample(self.frame, '3m')
+
+    def test_incremental_matches_full(self):
+        """Догрузка базовых свечей пересчитывает последнюю старшую свечу и совпадает с полным расчётом."""
+        store = CandleStore(self.root)
+        store.write('SBER', 1, self.frame.iloc[:4000])
+        update_resampled(store, 'SBER')
+        for lo in range(4000, len(self.frame), 777):
+            append_and_resample(store, 'SBER', self.frame.iloc[lo:lo + 777])
+        for timeframe in ('5m', '15m', '1h', '1D', '1W'):
+            stored = store.read_frame('SBER', TIMEFRAMES[timeframe][0])
+            expected = resample(self.frame, timeframe)
+            np.testing.assert_array_equal(stored['begin'], expected['begin'])
+            np.testing.assert_allclose(stored[list(AGGREGATION)], expected[list(AGGREGATION)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+import pandas as pd
+import _AppProjectKit as APK
+from rsi_call import current_rsi_call, rsi_frame
+
+
+class TestRSI(unittest.TestCase):
+
+    def setUp(self):
+        # Цены по GBM с участком без движения
+        rng = np.random.default_rng(7)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=500)))
+        close[100:140] = close[100]
+        self.data = pd.DataFrame({'close': close})
+
+    def test_wilder_reference(self):
+        """Сглаживание Уайлдера совпадает с рекуррентной формулой из определения."""
+        period = 14
+        delta = np.diff(self.data['close'].to_numpy())
+        gain, loss = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+        avg_gain, avg_loss = gain[:period].mean(), loss[:period].mean()
+        expected = [np.nan] * period
+        for i in range(period, len(delta) + 1):
+            if i > period:
+                avg_gain = (avg_gain * (period - 1) + gain[i - 1]) / period
+                avg_loss = (avg_loss * (period - 1) + loss[i - 1]) / period
+            expected.append(50.0 if avg_gain == avg_loss == 0 else
+                            100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss))
+        np.testing.assert_allclose(current_rsi_call(self.data, period, method='wilder'), expected,
+                                   rtol=1e-9, atol=1e-9)
+
+    def test_multi_period(self):
+        """Несколько периодов совпадают с расчётом по одному периоду; защита от деления на ноль."""
+        for method in ('sma', 'wilder', 'ema'):
+            for guard in (True, False):
+                frame = rsi_frame(self.data, periods=(7, 14, 21), method=method, guard=guard)
+                self.assertEqual(list(frame.columns), ['RSI_7', 'RSI_14', 'RSI_21'])
+                for period in (7, 14, 21):
+                    pd.testing.assert_series_equal(frame[f'RSI_{period}'],
+                                                   current_rsi_call(self.data, period, method=method, guard=guard),
+                                                   check_names=False)
+        # Одинаковое сглаживание по умолчанию во всех точках входа
+        pd.testing.assert_series_equal(rsi_frame(self.data, periods=(18,))['RSI_18'], current_rsi_call(self.data),
+                                       check_names=False)
+        # Окно SMA целиком на плоском участке: без защиты 0/0 = NaN, с защитой 50
+        self.assertTrue(np.isnan(current_rsi_call(self.data, 14, guard=False).iloc[139]))
+        guarded = current_rsi_call(self.data, 14)
+        self.assertTrue(guarded.notna().all())
+        self.assertEqual(guarded.iloc[139], 50.0)
+        rising = rsi_frame(pd.DataFrame({'close': np.arange(50.0)}), periods=(14,), method='ema')['RSI_14']
+        self.assertTrue((rising.iloc[1:] == 100.0).all())
+        with self.assertRaises(APK.InvalidInputError):
+            rsi_frame(self.data, method='hull')
+
+if __name__ == '__main__':
+    unittest.main()
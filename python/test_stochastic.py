@@ -0,0 +1,75 @@
+import json
+import unittest
+import numpy as np
+import pandas as pd
+from Stochastic import calculate_stochastic, stochastic_frame, StochasticStream
+
+
+def reference_stochastic(data, period=14):
+    """Исходный расчёт с пересканированием окна для каждой свечи."""
+    values = []
+    for i in range(period, len(data)):
+        highest_high = max(item['high'] for item in data[i - period:i])
+        lowest_low = min(item['low'] for item in data[i - period:i])
+        close = data[i]['close']
+        if highest_high != lowest_low:
+            stochastic = ((close - lowest_low) / (highest_high - lowest_low)) * 100
+        else:
+            stochastic = 50
+        values.append({'date': data[i]['date'], 'stochastic': stochastic})
+    return values
+
+
+class TestStochastic(unittest.TestCase):
+
+    def setUp(self):
+        # Цены по GBM с участком без движения для проверки деления на ноль
+        rng = np.random.default_rng(7)
+        T = 500
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=T)))
+        close[150:180] = close[150]
+        spread = np.abs(rng.normal(0, 0.5, size=T))
+        spread[150:180] = 0
+        self.data = pd.DataFrame({
+            'date': pd.date_range('2024-01-01', periods=T, freq='D').strftime('%Y-%m-%d'),
+            'high': close + spread,
+            'low': close - spread,
+            'close': close,
+        })
+
+    def assertSeriesEqual(self, actual, expected):
+        np.testing.assert_allclose(np.asarray(actual, dtype=float), np.asarray(expected, dtype=float),
+                                   rtol=1e-9, atol=1e-9)
+
+    def test_matches_reference(self):
+        """Векторный расчёт совпадает с исходным циклом, в том числе на окнах без движения."""
+        records = self.data.to_dict('records')
+        for period in (5, 14):
+            expected = reference_stochastic(records, period)
+            for data in (records, self.data):
+                actual = calculate_stochastic(data, period)
+                self.assertEqual([item['date'] for item in actual], [item['date'] for item in expected])
+                self.assertSeriesEqual([item['stochastic'] for item in actual],
+                                       [item['stochastic'] for item in expected])
+
+            frame = stochastic_frame(self.data, period)
+            self.assertTrue(frame['Stoch_K'].iloc[:period].isna().all())
+            self.assertSeriesEqual(frame['Stoch_K'].iloc[period:], [item['stochastic'] for item in expected])
+
+    def test_stream_matches_frame(self):
+        """Потоковый расчёт совпадает с пакетным, в том числе после snapshot/restore."""
+        for smooth_k, smooth_d in ((1, 3), (3, 3)):
+            expected = stochastic_frame(self.data, 14, smooth_k, smooth_d)
+            stream = StochasticStream(14, smooth_k, smooth_d)
+            candles = self.data[['high', 'low', 'close']].to_numpy()
+            streamed = [stream.update(*candle) for candle in candles[:250]]
+            stream = StochasticStream.restore(json.loads(json.dumps(stream.snapshot())))
+            self.assertEqual((stream.period, stream.smooth_k, stream.smooth_d), (14, smooth_k, smooth_d))
+            streamed += [stream.update(*candle) for candle in candles[250:]]
+
+            self.assertSeriesEqual([k for k, _ in streamed], expected['Stoch_K'])
+            self.assertSeriesEqual([d for _, d in streamed], expected['Stoch_D'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import unittest
+import numpy as np
+import pandas as pd
+from rsi_call import current_rsi_call
+from bollinger_strategy import calculate_bollinger_bands, generate_signals
+from moving_averages import current_ma_analysis
+from Stochastic_RSI import calculate_stochastic_rsi
+from volume import rolling_support_resistance, volume_analysis
+from streaming_indicators import (
+    IndicatorState,
+    SMAState,
+    EMAState,
+    RSIState,
+    BollingerState,
+    MAState,
+    StochRSIState,
+    VolumeSignalState
+)
+
+
+class TestStreamingIndicators(unittest.TestCase):
+
+    def setUp(self):
+        # Генерируем цены по GBM, с участком без движения для проверки деления на ноль
+        rng = np.random.default_rng(42)
+        T = 600
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=T)))
+        close[200:230] = close[200]
+        self.data = pd.DataFrame({'close': close})
+
+    def assertSeriesEqual(self, streamed, expected):
+        np.testing.assert_allclose(np.asarray(streamed, dtype=float), np.asarray(expected, dtype=float),
+                                   rtol=1e-9, atol=1e-9)
+
+    def stream(self, state, field=None):
+        values = state.update_many(self.data['close'])
+        return [v[field] for v in values] if field else values
+
+    def test_sma_ema(self):
+        """SMA и EMA совпадают с pandas rolling/ewm."""
+        self.assertSeriesEqual(self.stream(SMAState(20)), self.data['close'].rolling(20).mean())
+        self.assertSeriesEqual(self.stream(EMAState(9)), self.data['close'].ewm(span=9, adjust=False).mean())
+
+    def test_rsi(self):
+        """RSI совпадает с current_rsi_call."""
+        self.assertSeriesEqual(self.stream(RSIState(18)), current_rsi_call(self.data, 18))
+
+    def test_rsi_wilder_ema(self):
+        """RSI с затравкой Уайлдера и EMA совпадает с пакетным расчётом, в том числе после restore."""
+        for method in ('wilder', 'ema'):
+            state = RSIState(14, method)
+            head = state.update_many(self.data['close'][:300])
+            state = RSIState.restore(json.loads(json.dumps(state.snapshot())))
+            streamed = head + state.update_many(self.data['close'][300:])
+            self.assertSeriesEqual(streamed, current_rsi_call(self.data, 14, method=method))
+
+    def test_bollinger(self):
+        """Полосы и сигналы совпадают с пакетной стратегией."""
+        expected = generate_signals(calculate_bollinger_bands(self.data.copy()))
+        for field in ('SMA', 'STD', 'Upper', 'Lower', 'Signal', 'Position'):
+            self.assertSeriesEqual(self.stream(BollingerState(), field), expected[field])
+
+    def test_moving_averages(self):
+        """SMA, EMA, волатильность и MA_Signal совпадают с current_ma_analysis."""
+        expected = current_ma_analysis(self.data)
+        for field in ('SMA', 'EMA', 'Volatility', 'MA_Signal'):
+            self.assertSeriesEqual(self.stream(MAState(), field), expected[field])
+
+    def test_stoch_rsi(self):
+        """StochRSI совпадает с calculate_stochastic_rsi."""
+        expected = calculate_stochastic_rsi(self.data)
+        for field in ('RSI', 'StochRSI_K', 'StochRSI_D', 'StochRSI_Signal'):
+            self.assertSeriesEqual(self.stream(StochRSIState(), field), expected[field])
+        self.assertTrue(expected['StochRSI_Signal'].abs().sum() > 0)
+
+    def test_snapshot_restore(self):
+        """Состояние переживает сериализацию в JSON посреди ряда."""
+        closes = self.data['close'].tolist()
+        for cls in (SMAState, EMAState, RSIState, BollingerState, MAState, StochRSIState):
+            whole = cls()
+            expected = whole.update_many(closes)
+
+            first = cls()
+            first.update_many(closes[:300])
+            restored = cls.restore(json.loads(json.dumps(first.snapshot())))
+            self.assertEqual(json.dumps(restored.update_many(closes[300:])), json.dumps(expected[300:]),
+                             cls.__name__)
+
+    def test_restore_keeps_constructor_arguments(self):
+        """restore возвращает объект с теми же параметрами, что и у исходного."""
+        with self.assertRaises(TypeError):
+            IndicatorState()
+        stoch = StochRSIState(10, smooth_k=5, smooth_d=2)
+        stoch.update_many(self.data['close'][:50])
+        restored = StochRSIState.restore(json.loads(json.dumps(stoch.snapshot())))
+        self.assertEqual((restored.period, restored.smooth_k, restored.smooth_d), (10, 5, 2))
+
+    def test_volume_signal_breakout(self):
+        """Уровни берутся до текущей свечи: пробои дают ±2, как у пакетного расчёта со скользящими уровнями."""
+        rng = np.random.default_rng(3)
+        data = self.data.assign(volume=rng.integers(100, 1000, size=len(self.data)).astype(float))
+        support, resistance = rolling_support_resistance(data, 20)
+        expected = volume_analysis(data, support, resistance)['Volume_Signal']
+        streamed = VolumeSignalState(20).update_many(data['close'], data['volume'])
+        self.assertEqual(streamed, expected.tolist())
+        self.assertIn(2, streamed)
+        self.assertIn(-2, streamed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import datetime
+import unittest
+import numpy as np
+import pandas as pd
+import _AppProjectKit as APK
+from supres_levels import LEVEL_METHODS, LEVEL_NAMES, today_levels, session_levels, history_levels
+
+
+class TestSupResLevels(unittest.TestCase):
+
+    def setUp(self):
+        # Пять сессий по 54 десятиминутные свечи, последняя — сегодня
+        rng = np.random.default_rng(9)
+        today = pd.Timestamp(datetime.datetime.now().date())
+        begin = np.concatenate([pd.date_range(today - pd.Timedelta(days=4 - d) + pd.Timedelta(hours=10),
+                                              periods=54, freq='10min') for d in range(5)])
+        close = 100 + rng.normal(size=begin.size).cumsum()
+        self.data = pd.DataFrame({
+            'begin': pd.DatetimeIndex(begin).strftime('%Y-%m-%d %H:%M:%S'),
+            'open': close, 'high': close + rng.uniform(0, 1, begin.size),
+            'low': close - rng.uniform(0, 1, begin.size), 'close': close,
+        })
+
+    def test_previous_session(self):
+        """Каждая свеча получает уровни предыдущей сессии."""
+        methods = tuple(LEVEL_METHODS)
+        levels = history_levels(self.data, methods)
+        session = pd.to_datetime(self.data['begin']).dt.normalize()
+        days = session.unique()
+        self.assertTrue(levels[session == days[0]].isna().all().all())
+
+        for previous, day in zip(days[:-1], days[1:]):
+            prior = self.data[session == previous]
+            for method in methods:
+                expected = LEVEL_METHODS[method](prior['high'].max(), prior['low'].min(), prior['close'].iloc[-1])
+                for name in LEVEL_NAMES:
+                    np.testing.assert_allclose(levels.loc[session == day, f'{method}_{name}'], expected[name])
+
+    def test_running_matches_today_levels(self):
+        """В режиме running последняя свеча совпадает с today_levels."""
+        levels = history_levels(self.data, ('classic', 'woodie'), mode='running')
+        for method in ('classic', 'woodie'):
+            expected = today_levels(self.data, method)
+            for name in LEVEL_NAMES:
+                self.assertAlmostEqual(levels[f'{method}_{name}'].iloc[-1], getattr(expected, name))
+
+        sessions = session_levels(self.data)
+        self.assertEqual(len(sessions), 5)
+        self.assertAlmostEqual(sessions['classic_pivot'].iloc[-1], today_levels(self.data).pivot)
+
+    def test_unknown_method(self):
+        with self.assertRaises(APK.InvalidInputError):
+            history_levels(self.data, ('gann',))
+
+
+if __name__ == '__main__':
+    unittest.main()
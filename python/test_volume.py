@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+import pandas as pd
+import indicator_graph as graph
+from volume import (
+    rolling_vwap,
+    session_vwap,
+    obv,
+    volume_profile,
+    rolling_volume_profile,
+    rolling_support_resistance,
+    volume_analysis
+)
+
+
+class TestVolumeAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(21)
+        T = 600
+        close = 100 + rng.normal(0, 0.5, size=T).cumsum()
+        self.data = pd.DataFrame({
+            'begin': pd.date_range('2024-11-12 10:00', periods=T, freq='10min'),
+            'close': close, 'high': close + 0.3, 'low': close - 0.3,
+            'volume': rng.integers(100, 1000, size=T).astype(float),
+        })
+
+    def test_vwap_and_obv(self):
+        """VWAP и OBV совпадают с прямым расчётом."""
+        price = (self.data['high'] + self.data['low'] + self.data['close']) / 3
+        volume = self.data['volume']
+        i = 300
+        expected = (price[i - 19:i + 1] * volume[i - 19:i + 1]).sum() / volume[i - 19:i + 1].sum()
+        self.assertAlmostEqual(rolling_vwap(self.data, 20).iloc[i], expected)
+
+        day = self.data['begin'].dt.normalize() == self.data['begin'].dt.normalize().iloc[i]
+        head = self.data.index[day][0]
+        expected = (price[head:i + 1] * volume[head:i + 1]).sum() / volume[head:i + 1].sum()
+        self.assertAlmostEqual(session_vwap(self.data).iloc[i], expected)
+
+        expected = sum(np.sign(self.data['close'][k] - self.data['close'][k - 1]) * volume[k] for k in range(1, i + 1))
+        self.assertAlmostEqual(obv(self.data).iloc[i], expected)
+
+    def test_profile(self):
+        """Зона стоимости содержит POC и не меньше заданной доли объёма."""
+        profile = volume_profile(self.data, bins=30)
+        table = profile['profile']
+        self.assertAlmostEqual(table['volume'].sum(), self.data['volume'].sum())
+        self.assertEqual(profile['poc'], table['price'][table['volume'].idxmax()])
+        self.assertLessEqual(profile['value_area_low'], profile['poc'])
+        self.assertGreaterEqual(profile['value_area_high'], profile['poc'])
+        inside = table['price'].between(profile['value_area_low'], profile['value_area_high'])
+        self.assertGreaterEqual(table['volume'][inside].sum(), 0.7 * table['volume'].sum())
+
+    def test_value_area_contiguous(self):
+        """Зона стоимости растёт от POC непрерывно, а не собирает объёмные корзины по всему диапазону."""
+        prices = [100.0, 101.0, 102.0, 103.0, 105.0]
+        volumes = [200.0, 150.0, 300.0, 0.0, 250.0]
+        data = pd.DataFrame({'close': prices, 'high': prices, 'low': prices, 'volume': volumes})
+        profile = volume_profile(data, bins=5, value_area=0.7)
+        price = profile['profile']['price']
+        self.assertEqual(profile['poc'], price[2])
+        # Корзина 4 объёмнее корзины 0, но отделена от POC пустой корзиной 3
+        self.assertEqual((profile['value_area_low'], profile['value_area_high']), (price[0], price[2]))
+        profile = volume_profile(data, bins=5, value_area=0.3)
+        self.assertEqual((profile['value_area_low'], profile['value_area_high']), (price[2], price[2]))
+
+    def test_rolling_profile(self):
+        """Скользящий профиль совпадает с профилем самого окна и не зависит от будущих свечей."""
+        rolling = rolling_volume_profile(self.data, window=50, bins=30, chunk=64)
+        self.assertTrue(rolling.iloc[:49].isna().all().all())
+        for i in (49, 200, 333, len(self.data) - 1):
+            window = volume_profile(self.data.iloc[i - 49:i + 1], bins=30)
+            self.assertAlmostEqual(rolling['POC'].iloc[i], window['poc'])
+            self.assertAlmostEqual(rolling['VA_High'].iloc[i], window['value_area_high'])
+            self.assertAlmostEqual(rolling['VA_Low'].iloc[i], window['value_area_low'])
+
+        future = self.data.copy()
+        future.loc[400:, ['close', 'high', 'low']] *= 3
+        shifted = rolling_volume_profile(future, window=50, bins=30)
+        pd.testing.assert_frame_equal(shifted.iloc[:400], rolling.iloc[:400])
+
+    def test_rolling_levels_signal(self):
+        """Со скользящими уровнями появляются сильные сигналы пробоя."""
+        support, resistance = rolling_support_resistance(self.data, 20)
+        signals = volume_analysis(self.data, support, resistance)['Volume_Signal']
+        self.assertTrue((signals.abs() == 2).any())
+        result = graph.enrich(self.data[['close', 'volume']], {'Volume': {'rolling': True}})
+        self.assertEqual(result['Volume_Signal'].tolist(), signals.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
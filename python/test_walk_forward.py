@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import pandas as pd
+import _AppProjectKit as APK
+from moving_averages import current_ma_analysis
+from Stochastic_RSI import calculate_stochastic_rsi
+from walk_forward import StatCache, make_folds, ma_signal, stoch_rsi_signal, walk_forward
+
+
+class TestWalkForward(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.frames = {f"T{i}": pd.DataFrame({'close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=900)))})
+                       for i in range(3)}
+
+    def test_folds(self):
+        """Окна проверки идут подряд после окон обучения; расширяющийся режим начинается с нуля."""
+        self.assertEqual(make_folds(1000, 500, 200), [(0, 500, 500, 700), (200, 700, 700, 900)])
+        self.assertEqual(make_folds(1000, 500, 200, anchored=True)[1], (0, 700, 700, 900))
+        with self.assertRaises(APK.InvalidInputError):
+            make_folds(1000, 0, 100)
+
+    def test_signals_match_indicators(self):
+        """Сигналы стратегий из кэша статистик совпадают с исходными индикаторами."""
+        frame = self.frames['T0']
+        stats = StatCache(frame['close'].to_numpy())
+        np.testing.assert_array_equal(ma_signal(stats, 9, 21), current_ma_analysis(frame)['MA_Signal'])
+        np.testing.assert_array_equal(stoch_rsi_signal(stats, 14, 3, 3),
+                                      calculate_stochastic_rsi(frame)['StochRSI_Signal'])
+        ma_signal(stats, 9, 30)
+        self.assertGreaterEqual(stats.hits, 1)
+
+    def test_pool_matches_in_process(self):
+        """Пул процессов с общей памятью даёт тот же результат, что и расчёт в текущем процессе."""
+        grids = {'bollinger': {'window': (10, 20), 'k': (1.5, 2)}, 'ma': None}
+        local = walk_forward(self.frames, grids, train=300, test=200, max_workers=0)
+        pooled = walk_forward(self.frames, grids, train=300, test=200, max_workers=2, chunksize=3)
+        pd.testing.assert_frame_equal(local, pooled)
+        self.assertEqual(len(local), 2 * 3 * 3)
+        self.assertTrue((local['test_start'] == local['train_end']).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
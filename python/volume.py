@@ -1,13 +1,14 @@
 import json
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import _AppProjectKit as APK
+import indicator_graph as graph
+from instrumentation import instrumented
 
 # Директория для хранения данных
 DATA_DIR = "storage"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
 
 def load_data(filename):
     """Загружает данные из JSON-файла в DataFrame."""
@@ -63,7 +64,8 @@ def find_support_resistance(df, lookback=20):
     except Exception as e:
         raise APK.InvalidInputError(f"Ошибка при расчете уровней: {str(e)}")
 
-def volume_analysis(df, support, resistance):
+@instrumented
+def volume_analysis(df, support, resistance, inplace=False):
     """
     Анализирует объемы и цены, возвращает DataFrame с сигналами.
     
@@ -73,32 +75,178 @@ def volume_analysis(df, support, resistance):
     0  = Нет сигнала
     -1 = Слабый сигнал на продажу (падение цены при высоком объеме)
     -2 = Сильный сигнал на продажу (прорыв поддержки с высоким объемом)
+
+    inplace -- дописать только колонку Volume_Signal прямо в df, без копии
+    и без вспомогательных колонок prev_close/prev_volume
     """
-    df = df.copy()
-    df['prev_close'] = df['close'].shift(1)
-    df['prev_volume'] = df['volume'].shift(1)
-    df['Volume_Signal'] = 0
+    prev_close = df['close'].shift(1)
+    prev_volume = df['volume'].shift(1)
+    if not inplace:
+        df = df.copy()
+        df['prev_close'] = prev_close
+        df['prev_volume'] = prev_volume
+    signal = pd.Series(0, index=df.index)
+    rising_volume = df['volume'] > prev_volume
     
     # Сильный сигнал на покупку
-    df.loc[(df['close'] > resistance) & 
-           (df['volume'] > df['prev_volume']), 'Volume_Signal'] = 2
+    signal[(df['close'] > resistance) & rising_volume] = 2
     
     # Сильный сигнал на продажу
-    df.loc[(df['close'] < support) & 
-           (df['volume'] > df['prev_volume']), 'Volume_Signal'] = -2
+    signal[(df['close'] < support) & rising_volume] = -2
     
     # Слабый сигнал на покупку
-    df.loc[(df['close'] > df['prev_close']) & 
-           (df['volume'] > df['prev_volume']) & 
-           (df['Volume_Signal'] == 0), 'Volume_Signal'] = 1
+    signal[(df['close'] > prev_close) & rising_volume & (signal == 0)] = 1
     
     # Слабый сигнал на продажу
-    df.loc[(df['close'] < df['prev_close']) & 
-           (df['volume'] > df['prev_volume']) & 
-           (df['Volume_Signal'] == 0), 'Volume_Signal'] = -1
+    signal[(df['close'] < prev_close) & rising_volume & (signal == 0)] = -1
     
+    df['Volume_Signal'] = signal
     return df
 
+def rolling_support_resistance(df, lookback=20):
+    """
+    Скользящие уровни для volume_analysis: минимум и максимум close
+    за предыдущие lookback свечей (без текущей), чтобы пробой был возможен.
+    """
+    previous = df['close'].shift(1).rolling(window=lookback, min_periods=1)
+    return previous.min(), previous.max()
+
+@graph.register_operation('volume_signal', warmup=lambda lookback, rolling: lookback + 1 if rolling else None)
+def volume_signal(close: pd.Series, volume: pd.Series, lookback: int, rolling: bool = False) -> pd.Series:
+    """
+    Volume_Signal относительно уровней за lookback свечей: статических
+    (find_support_resistance по концу фрейма) или скользящих.
+    """
+    df = pd.DataFrame({'close': close, 'volume': volume})
+    if rolling:
+        support, resistance = rolling_support_resistance(df, lookback)
+    else:
+        sup_res = find_support_resistance(df, lookback)
+        support, resistance = sup_res.support_1, sup_res.resistance_1
+    return volume_analysis(df, support, resistance)['Volume_Signal']
+
+@graph.register_indicator('Volume', lookback=20, rolling=False)
+def volume_indicator(lookback: int, rolling: bool) -> dict:
+    return {'Volume_Signal': graph.node('volume_signal', 'close', 'volume', lookback=lookback, rolling=rolling)}
+
+def typical_price(df):
+    """Типичная цена свечи (high + low + close) / 3 или close, если high/low нет."""
+    if 'high' in df.columns and 'low' in df.columns:
+        return (df['high'] + df['low'] + df['close']) / 3
+    return df['close']
+
+def rolling_vwap(df, window=20):
+    """VWAP за последние window свечей (бегущие суммы цены*объёма и объёма)."""
+    volume = df['volume'].astype(float)
+    turnover = (typical_price(df) * volume).rolling(window=window).sum()
+    return turnover / volume.rolling(window=window).sum()
+
+def session_vwap(df):
+    """VWAP, накопленный с начала каждой торговой сессии (календарного дня по begin)."""
+    session = pd.to_datetime(df['begin']).dt.normalize()
+    volume = df['volume'].astype(float)
+    turnover = (typical_price(df) * volume).groupby(session).cumsum()
+    return turnover / volume.groupby(session).cumsum()
+
+def obv(df):
+    """On-Balance Volume: накопленный объём со знаком изменения цены."""
+    direction = np.sign(df['close'].diff().fillna(0))
+    return (direction * df['volume']).cumsum()
+
+def _bin_index(price, low, high, bins):
+    """Номера корзин цены на сетке из bins корзин между low и high и шаг сетки."""
+    step = np.where(high > low, (high - low) / bins, 1.0)
+    return np.clip(((price - low) / step).astype(np.int64), 0, bins - 1), step
+
+def _value_area(histogram, share):
+    """
+    POC и зона стоимости по строкам гистограмм (номера корзин). Зона растёт
+    от POC непрерывно: на каждом шаге добавляется соседняя корзина (сверху
+    или снизу) с большим объёмом, пока зона не наберёт share объёма строки.
+    """
+    rows, bins = histogram.shape
+    row = np.arange(rows)
+    poc = histogram.argmax(axis=1)
+    low, high = poc.copy(), poc.copy()
+    volume = histogram[row, poc]
+    target = share * histogram.sum(axis=1)
+    for _ in range(bins - 1):
+        grow = (volume < target) & ((low > 0) | (high < bins - 1))
+        if not grow.any():
+            break
+        below = np.where(low > 0, histogram[row, np.maximum(low - 1, 0)], -np.inf)
+        above = np.where(high < bins - 1, histogram[row, np.minimum(high + 1, bins - 1)], -np.inf)
+        up = grow & (above >= below)
+        down = grow & ~up
+        high += up
+        low -= down
+        volume = volume + np.where(up, above, 0.0) + np.where(down, below, 0.0)
+    return poc, low, high
+
+def volume_profile(df, bins=50, value_area=0.7):
+    """
+    Профиль объёма по цене за весь фрейм.
+
+    Объём каждой свечи относится к корзине её типичной цены (np.bincount),
+    корзины делят диапазон low..high фрейма на bins частей.
+    Возвращает словарь: profile (DataFrame price/volume), poc — цена корзины
+    с максимальным объёмом, value_area_high/value_area_low — границы
+    непрерывной зоны вокруг POC, содержащей value_area всего объёма.
+    """
+    price = typical_price(df).to_numpy(dtype=float)
+    low = df['low'].min() if 'low' in df.columns else price.min()
+    high = df['high'].max() if 'high' in df.columns else price.max()
+    index, step = _bin_index(price, low, high, bins)
+    histogram = np.bincount(index, weights=df['volume'].to_numpy(dtype=float), minlength=bins)
+    centers = low + step * (np.arange(bins) + 0.5)
+    poc, va_low, va_high = (centers[i[0]] for i in _value_area(histogram[None, :], value_area))
+    empty = histogram.sum() <= 0
+    return {
+        'profile': pd.DataFrame({'price': centers, 'volume': histogram}),
+        'poc': np.nan if empty else float(poc),
+        'value_area_high': np.nan if empty else float(va_high),
+        'value_area_low': np.nan if empty else float(va_low),
+    }
+
+def rolling_volume_profile(df, window=100, bins=50, value_area=0.7, chunk=8192):
+    """
+    POC и зона стоимости профиля объёма за последние window свечей для каждой свечи.
+
+    Корзины строятся по диапазону самого окна (скользящие минимум low и
+    максимум high), так что значение на свече t зависит только от свечей
+    до t включительно и совпадает с volume_profile этого окна. Гистограммы
+    окон собираются одним np.bincount на порцию из chunk окон: время
+    O(n * window), память — O(chunk * (window + bins)).
+    Возвращает DataFrame с колонками POC, VA_High, VA_Low.
+    """
+    price = typical_price(df).to_numpy(dtype=float)
+    volume = df['volume'].to_numpy(dtype=float)
+    lows = df['low'] if 'low' in df.columns else pd.Series(price, index=df.index)
+    highs = df['high'] if 'high' in df.columns else pd.Series(price, index=df.index)
+    window_low = lows.rolling(window).min().to_numpy(dtype=float)
+    window_high = highs.rolling(window).max().to_numpy(dtype=float)
+    n = volume.size
+    result = np.full((n, 3), np.nan)
+    if n < window:
+        return pd.DataFrame(result, index=df.index, columns=['POC', 'VA_High', 'VA_Low'])
+
+    prices = np.lib.stride_tricks.sliding_window_view(price, window)
+    volumes = np.lib.stride_tricks.sliding_window_view(volume, window)
+    for start in range(0, n - window + 1, chunk):
+        stop = min(start + chunk, n - window + 1)
+        rows = stop - start
+        last = slice(start + window - 1, stop + window - 1)
+        low = window_low[last]
+        index, step = _bin_index(prices[start:stop], low[:, None], window_high[last, None], bins)
+        flat = (np.arange(rows)[:, None] * bins + index).ravel()
+        histogram = np.bincount(flat, weights=volumes[start:stop].ravel(), minlength=rows * bins).reshape(rows, bins)
+        empty = histogram.sum(axis=1) <= 0
+        step = step[:, 0]
+        poc, va_low, va_high = (np.where(empty, np.nan, low + step * (i + 0.5))
+                                for i in _value_area(histogram, value_area))
+        result[last] = np.column_stack((poc, va_high, va_low))
+    return pd.DataFrame(result, index=df.index, columns=['POC', 'VA_High', 'VA_Low'])
+
 def get_volume_summary(data: pd.DataFrame) -> dict:
     """
     Создает сводку по текущим значениям объемов и сигналам
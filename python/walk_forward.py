@@ -0,0 +1,318 @@
+"""
+Walk-forward оптимизация параметров стратегий.
+
+История каждого тикера делится на скользящие (или расширяющиеся) пары
+окон обучение/проверка. Для каждого окна обучения по сетке выбираются
+параметры стратегии с лучшей метрикой, и эти параметры оцениваются на
+следующем за ним окне проверки — вне выборки.
+
+Задания (стратегия, тикер, параметры) выполняются в пуле процессов.
+Цены закрытия всех тикеров один раз копируются в общую память
+(multiprocessing.shared_memory), процессы читают их без копирования
+и без передачи фреймов через pickle. Индикаторы причинные (значение на
+свече t зависит только от свечей до t), поэтому сигнал считается один раз
+по всей истории, а окна — это срезы его доходностей. Скользящие
+статистики (SMA/STD окна, EMA, RSI периода) кэшируются в процессе
+и переиспользуются всеми наборами параметров с тем же окном.
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy
+import pandas
+import _AppProjectKit as APK
+from bollinger_strategy import _hold
+from rsi_call import current_rsi_call
+
+
+# Стратегии: имя -> (функция сигналов, сетка параметров по умолчанию)
+STRATEGIES = {}
+
+RESULT_COLUMNS = ['strategy', 'ticker', 'fold', 'train_start', 'train_end', 'test_start', 'test_end',
+                  'params', 'train_score', 'test_score']
+
+
+def register_strategy(name: str, **grid):
+    """
+    Декоратор, регистрирующий стратегию. Функция получает кэш статистик
+    тикера (StatCache) и параметры, возвращает массив сигналов -1, 0, 1.
+    grid -- значения параметров для перебора по умолчанию.
+    """
+    def decorator(function):
+        STRATEGIES[name] = (function, grid)
+        return function
+    return decorator
+
+
+class StatCache:
+    """Скользящие статистики цен закрытия одного тикера, посчитанные один раз."""
+
+    def __init__(self, close: numpy.ndarray):
+        self.close = pandas.Series(close)
+        self.stats = {}
+        self.hits = 0
+
+    def get(self, key: tuple, compute):
+        if key in self.stats:
+            self.hits += 1
+        else:
+            self.stats[key] = compute()
+        return self.stats[key]
+
+    def sma(self, window: int) -> pandas.Series:
+        return self.get(('sma', window), lambda: self.close.rolling(window=window).mean())
+
+    def std(self, window: int) -> pandas.Series:
+        return self.get(('std', window), lambda: self.close.rolling(window=window).std())
+
+    def ema(self, span: int) -> pandas.Series:
+        return self.get(('ema', span), lambda: self.close.ewm(span=span, adjust=False).mean())
+
+    def rsi(self, period: int) -> pandas.Series:
+        return self.get(('rsi', period), lambda: current_rsi_call(pandas.DataFrame({'close': self.close}), period))
+
+    def stoch(self, period: int) -> pandas.Series:
+        """Несглаженная линия StochRSI, как в calculate_stochastic_rsi."""
+        def compute():
+            rsi = self.rsi(period)
+            lowest_low = rsi.rolling(window=period).min()
+            return 100 * (rsi - lowest_low) / (rsi.rolling(window=period).max() - lowest_low)
+        return self.get(('stoch', period), compute)
+
+
+@register_strategy('bollinger', window=(10, 15, 20, 25, 30), k=(1.5, 2, 2.5))
+def bollinger_signal(stats: StatCache, window: int, k: float) -> numpy.ndarray:
+    """Сигнал generate_signals: 1 — ниже нижней полосы, -1 — выше верхней."""
+    sma, std = stats.sma(window).to_numpy(), stats.std(window).to_numpy()
+    close = stats.close.to_numpy()
+    return (close < sma - k * std).astype(numpy.int8) - (close > sma + k * std)
+
+
+@register_strategy('ma', short_period=(5, 9, 12), long_period=(21, 30, 50))
+def ma_signal(stats: StatCache, short_period: int, long_period: int) -> numpy.ndarray:
+    """MA_Signal из current_ma_analysis: пересечение EMA(short) и EMA(long)."""
+    fast, slow = stats.ema(short_period), stats.ema(long_period)
+    up = (fast > slow) & (fast.shift(1) <= slow.shift(1))
+    down = (fast < slow) & (fast.shift(1) >= slow.shift(1))
+    return up.to_numpy(numpy.int8) - down.to_numpy(numpy.int8)
+
+
+@register_strategy('stoch_rsi', period=(10, 14, 20), smooth_k=(3, 5), smooth_d=(3, 5))
+def stoch_rsi_signal(stats: StatCache, period: int, smooth_k: int, smooth_d: int) -> numpy.ndarray:
+    """StochRSI_Signal из calculate_stochastic_rsi."""
+    k = stats.stoch(period).rolling(window=smooth_k).mean()
+    d = k.rolling(window=smooth_d).mean()
+    up = (k > d) & (k.shift(1) <= d.shift(1)) & (k < 20)
+    down = (k < d) & (k.shift(1) >= d.shift(1)) & (k > 80)
+    return numpy.where(down, -1, numpy.where(up, 1, 0)).astype(numpy.int8)
+
+
+@register_strategy('rsi', candle_frame=(10, 14, 18, 24), lower=(30,), upper=(70,))
+def rsi_signal(stats: StatCache, candle_frame: int, lower: float, upper: float) -> numpy.ndarray:
+    """1 — RSI ниже lower (перепроданность), -1 — выше upper."""
+    rsi = stats.rsi(candle_frame).to_numpy()
+    return (rsi < lower).astype(numpy.int8) - (rsi > upper)
+
+
+def parameter_sets(grid: dict) -> list:
+    """Все комбинации сетки; для пар short/long оставляются только short < long."""
+    names = list(grid)
+    sets = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    return [params for params in sets
+            if not ('short_period' in params and params['short_period'] >= params['long_period'])]
+
+
+def make_folds(length: int, train: int, test: int, step: int = None, anchored: bool = False) -> list:
+    """
+    Окна (train_start, train_end, test_start, test_end) по номерам свечей, концы не включаются.
+
+    step -- сдвиг между окнами (по умолчанию test: окна проверки идут подряд)
+    anchored -- окно обучения всегда начинается с первой свечи (расширяющееся)
+    """
+    if train <= 1 or test <= 0:
+        raise APK.InvalidInputError("train must be > 1 and test > 0")
+    step = step or test
+    folds = []
+    start = 0
+    while start + train + test <= length:
+        folds.append((0 if anchored else start, start + train, start + train, start + train + test))
+        start += step
+    return folds
+
+
+def strategy_returns(close: numpy.ndarray, signal: numpy.ndarray, rate: float = 0.0) -> numpy.ndarray:
+    """
+    Доходность стратегии по свечам: позиция — последний ненулевой сигнал
+    с исполнением на следующей свече, издержки rate с оборота.
+    """
+    position = _hold(signal).astype(float)
+    returns = numpy.zeros(close.size)
+    returns[1:] = numpy.nan_to_num(close[1:] / close[:-1] - 1)
+    previous = numpy.concatenate(([0.0], position[:-1]))
+    return previous * returns - numpy.abs(position - previous) * rate
+
+
+def score(returns: numpy.ndarray, metric: str = 'sharpe', periods_per_year: int = 252) -> float:
+    """Метрика среза доходностей: 'sharpe' (годовой) или 'total_return'."""
+    if metric == 'total_return':
+        return float(numpy.prod(1 + returns) - 1)
+    std = returns.std(ddof=1)
+    if not std > 0:
+        return numpy.nan
+    return float(returns.mean() / std * numpy.sqrt(periods_per_year))
+
+
+# Состояние процесса: общая память с ценами и кэш статистик текущего тикера
+_shared = {}
+
+
+def _attach(name: str, layout: dict) -> None:
+    """Инициализатор процесса: подключается к общей памяти с ценами закрытия."""
+    memory = shared_memory.SharedMemory(name=name)
+    total = sum(length for _, length in layout.values())
+    _shared['memory'] = memory
+    _shared['close'] = numpy.ndarray((total,), dtype=numpy.float64, buffer=memory.buf)
+    _shared['layout'] = layout
+    _shared['cache'] = None
+
+
+def _stats(ticker: str) -> StatCache:
+    cache = _shared['cache']
+    if cache is None or cache[0] != ticker:
+        start, length = _shared['layout'][ticker]
+        cache = _shared['cache'] = (ticker, StatCache(_shared['close'][start:start + length]))
+    return cache[1]
+
+
+def _evaluate(job: tuple) -> tuple:
+    """Задание: метрики одного набора параметров на всех окнах обучения и проверки."""
+    strategy, ticker, params, folds, rate, metric, periods_per_year = job
+    stats = _stats(ticker)
+    returns = strategy_returns(stats.close.to_numpy(), STRATEGIES[strategy][0](stats, **params), rate)
+    train = [score(returns[lo:hi], metric, periods_per_year) for lo, hi, _, _ in folds]
+    test = [score(returns[lo:hi], metric, periods_per_year) for _, _, lo, hi in folds]
+    return strategy, ticker, params, train, test
+
+
+def _evaluate_chunk(jobs: list) -> list:
+    return [_evaluate(job) for job in jobs]
+
+
+def walk_forward(frames, strategies=None, train: int = 500, test: int = 100, step: int = None,
+                 anchored: bool = False, metric: str = 'sharpe', commission: float = 0.0,
+                 slippage_bps: float = 0.0, periods_per_year: int = 252, max_workers: int = None,
+                 chunksize: int = None) -> pandas.DataFrame:
+    """
+    Walk-forward оптимизация.
+
+    Аргументы:
+    frames -- DataFrame с колонкой close или словарь {тикер: DataFrame}
+    strategies -- {имя: сетка} или список имён из STRATEGIES (сетка по умолчанию);
+                  по умолчанию все стратегии
+    train, test, step, anchored -- размеры окон в свечах (см. make_folds)
+    metric -- 'sharpe' или 'total_return'
+    commission, slippage_bps -- издержки с оборота, как в backtest
+    max_workers -- число процессов; 0 — считать в текущем процессе
+    chunksize -- заданий на одну отправку; задания одного тикера идут подряд,
+                 так что кэш статистик процесса переиспользуется
+
+    Возвращает:
+    DataFrame по (стратегия, тикер, окно): границы окон, лучшие на обучении
+    параметры, train_score и test_score (метрика этих параметров вне выборки).
+    """
+    if metric not in ('sharpe', 'total_return'):
+        raise APK.InvalidInputError(f"Неизвестная метрика: {metric}")
+    if isinstance(frames, pandas.DataFrame):
+        frames = {None: frames}
+    if strategies is None:
+        strategies = list(STRATEGIES)
+    if not isinstance(strategies, dict):
+        strategies = {name: None for name in strategies}
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown:
+        raise APK.InvalidInputError(f"Неизвестные стратегии: {', '.join(unknown)}")
+    grids = {name: parameter_sets(grid or STRATEGIES[name][1]) for name, grid in strategies.items()}
+
+    closes = {ticker: frame['close'].to_numpy(dtype=numpy.float64) for ticker, frame in frames.items()}
+    folds = {ticker: make_folds(close.size, train, test, step, anchored) for ticker, close in closes.items()}
+    rate = commission + slippage_bps / 10000
+    jobs = [(name, ticker, params, folds[ticker], rate, metric, periods_per_year)
+            for ticker in closes if folds[ticker]
+            for name, sets in grids.items() for params in sets]
+    if not jobs:
+        return pandas.DataFrame(columns=RESULT_COLUMNS)
+
+    # Цены всех тикеров — одним блоком общей памяти
+    layout, offset = {}, 0
+    for ticker, close in closes.items():
+        layout[ticker] = (offset, close.size)
+        offset += close.size
+    memory = shared_memory.SharedMemory(create=True, size=max(offset, 1) * 8)
+    try:
+        block = numpy.ndarray((offset,), dtype=numpy.float64, buffer=memory.buf)
+        for ticker, close in closes.items():
+            start, length = layout[ticker]
+            block[start:start + length] = close
+        del block
+
+        if max_workers == 0:
+            _attach(memory.name, layout)
+            results = _evaluate_chunk(jobs)
+            _shared.clear()
+        else:
+            max_workers = max_workers or os.cpu_count() or 1
+            chunksize = chunksize or max(1, len(jobs) // (max_workers * 4))
+            chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach,
+                                     initargs=(memory.name, layout)) as executor:
+                results = [result for chunk in executor.map(_evaluate_chunk, chunks) for result in chunk]
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return _select(results, folds)
+
+
+def _select(results: list, folds: dict) -> pandas.DataFrame:
+    """Для каждого окна — параметры с лучшей метрикой на обучении и их метрика на проверке."""
+    best = {}
+    for strategy, ticker, params, train, test in results:
+        for fold, (train_score, test_score) in enumerate(zip(train, test)):
+            key = (strategy, ticker, fold)
+            # NaN (нет сделок на обучении) проигрывает любой метрике
+            ranked = -numpy.inf if numpy.isnan(train_score) else train_score
+            if key not in best or ranked > best[key][0]:
+                best[key] = (ranked, params, train_score, test_score)
+
+    rows = []
+    for (strategy, ticker, fold), (_, params, train_score, test_score) in best.items():
+        train_start, train_end, test_start, test_end = folds[ticker][fold]
+        rows.append({'strategy': strategy, 'ticker': ticker, 'fold': fold,
+                     'train_start': train_start, 'train_end': train_end,
+                     'test_start': test_start, 'test_end': test_end,
+                     'params': params, 'train_score': train_score, 'test_score': test_score})
+    return pandas.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+if __name__ == "__main__":
+    import time
+    from data_storage import DATA_DIR, list_files, load_json
+
+    parser = argparse.ArgumentParser(description="Walk-forward оптимизация параметров стратегий")
+    parser.add_argument("--strategies", nargs="*", choices=sorted(STRATEGIES), default=None)
+    parser.add_argument("--train", type=int, default=500)
+    parser.add_argument("--test", type=int, default=100)
+    parser.add_argument("--anchored", action="store_true")
+    parser.add_argument("--metric", choices=("sharpe", "total_return"), default="sharpe")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    frames = {name: load_json(name) for name in list_files(".json")}
+    started = time.perf_counter()
+    report = walk_forward(frames, args.strategies, args.train, args.test, anchored=args.anchored,
+                          metric=args.metric, max_workers=args.workers)
+    print(report.to_string())
+    print(report.groupby('strategy')[['train_score', 'test_score']].mean())
+    print(f"{time.perf_counter() - started:.1f} с, данные: {DATA_DIR}")